@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import argparse
+import contextvars
+import csv
+import json
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from agent.config import Settings, get_settings
+from agent.openai_client import OpenAIClient
+from agent.pipeline import (
+    AgentInput,
+    build_client,
+    generate_sector_payload,
+    publish_sector_payloads,
+    slugify,
+)
+from agent.ratelimit import RateLimiter
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_OPENAI_RPM = 60
+DEFAULT_SANITY_RPS = 5
+DEFAULT_PUBLISH_CHUNK = 20
+PUBLISH_LINGER = 2.0
+DEFAULT_INCLUDE = ["about", "blog", "press", "careers"]
+# CSV cells hold lists separated by ";", "|" or newlines.
+LIST_SEPARATORS = re.compile(r"[;|\n]")
+DONE_STATUSES = {"published", "generated"}
+
+
+@dataclass
+class BatchRow:
+    row_id: str
+    agent_input: AgentInput
+
+
+def split_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in LIST_SEPARATORS.split(str(value)) if item.strip()]
+
+
+def pick(record: Dict[str, Any], *names: str) -> Any:
+    for name in names:
+        if record.get(name) not in (None, ""):
+            return record[name]
+    return None
+
+
+def row_from_record(record: Dict[str, Any], index: int) -> BatchRow:
+    company = str(pick(record, "company_name", "company") or "").strip()
+    sector = str(pick(record, "sector_label", "sector") or "").strip()
+    if not company or not sector:
+        raise ValueError(f"Row {index + 1}: company and sector are required")
+    slug = str(pick(record, "slug") or "").strip() or None
+    website = str(pick(record, "website") or "").strip()
+    include = split_list(pick(record, "include_categories", "include"))
+    if website and not include:
+        include = list(DEFAULT_INCLUDE)
+    agent_input = AgentInput(
+        company_name=company,
+        sector_label=sector,
+        slug=slug,
+        context=str(pick(record, "context") or ""),
+        files=split_list(pick(record, "files", "docs", "doc")),
+        links=split_list(pick(record, "links", "link")),
+        website=website,
+        include_categories=include,
+        exclude_patterns=split_list(pick(record, "exclude_patterns", "exclude")),
+        discovery=str(pick(record, "discovery") or "").strip() or None,
+    )
+    row_id = str(pick(record, "id") or slug or slugify(company))
+    return BatchRow(row_id=row_id, agent_input=agent_input)
+
+
+def read_manifest(path: str) -> List[BatchRow]:
+    with open(path, "r", encoding="utf-8") as handle:
+        if path.lower().endswith(".csv"):
+            records: Iterable[Dict[str, Any]] = list(csv.DictReader(handle))
+        else:
+            records = [json.loads(line) for line in handle if line.strip()]
+    rows = [row_from_record(record, index) for index, record in enumerate(records)]
+    seen: Set[str] = set()
+    for row in rows:
+        if row.row_id in seen:
+            raise ValueError(f"Duplicate manifest id: {row.row_id}")
+        seen.add(row.row_id)
+    return rows
+
+
+def read_completed(results_path: str, publish: bool) -> Set[str]:
+    done: Set[str] = set()
+    if not os.path.exists(results_path):
+        return done
+    wanted = {"published"} if publish else DONE_STATUSES
+    with open(results_path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("status") in wanted:
+                done.add(record["id"])
+            else:
+                done.discard(record.get("id"))
+    return done
+
+
+class ResultsWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record)
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(line + "\n")
+                handle.flush()
+                os.fsync(handle.fileno())
+
+
+class Checkpoints:
+    # Generated payloads are kept on disk until published, so a batch that
+    # crashes between generation and publishing does not pay for the model
+    # call again on resume.
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, row_id: str) -> str:
+        return os.path.join(self.directory, f"{slugify(row_id)}.json")
+
+    def load(self, row_id: str) -> Optional[dict]:
+        try:
+            with open(self.path(row_id), "r", encoding="utf-8") as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, row_id: str, payload: dict) -> None:
+        tmp_path = self.path(row_id) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle)
+        os.replace(tmp_path, self.path(row_id))
+
+    def clear(self, row_id: str) -> None:
+        try:
+            os.remove(self.path(row_id))
+        except OSError:
+            pass
+
+
+@dataclass
+class BatchOptions:
+    concurrency: int = DEFAULT_CONCURRENCY
+    openai_rpm: float = DEFAULT_OPENAI_RPM
+    sanity_rps: float = DEFAULT_SANITY_RPS
+    publish_chunk: int = DEFAULT_PUBLISH_CHUNK
+    publish: bool = True
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        settings: Settings,
+        results_path: str,
+        options: BatchOptions,
+        client: Optional[OpenAIClient] = None,
+    ):
+        self.settings = settings
+        self.options = options
+        # The limit applies per model request, not per row: a row makes one
+        # call in single mode, more with repairs or in sections mode.
+        self.openai_limit = RateLimiter(options.openai_rpm, per=60.0)
+        self.client = (client or build_client(settings)).limited(self.openai_limit)
+        self.results = ResultsWriter(results_path)
+        self.checkpoints = Checkpoints(results_path + ".d")
+        self.sanity_limit = RateLimiter(options.sanity_rps, per=1.0)
+        self.publish_queue: queue.Queue = queue.Queue()
+
+    def record(self, row: BatchRow, status: str, started: float, **fields: Any) -> None:
+        self.results.write(
+            {
+                "id": row.row_id,
+                "status": status,
+                "company": row.agent_input.company_name,
+                "elapsed": round(time.monotonic() - started, 3),
+                **fields,
+            }
+        )
+
+    def generate(self, row: BatchRow) -> None:
+        started = time.monotonic()
+        payload = self.checkpoints.load(row.row_id)
+        try:
+            if payload is None:
+                payload = generate_sector_payload(row.agent_input, self.settings, self.client)
+                self.checkpoints.save(row.row_id, payload)
+        except Exception as exc:
+            self.record(row, "failed", started, stage="generate", error=str(exc))
+            return
+        if self.options.publish:
+            self.publish_queue.put((row, payload, started))
+        else:
+            self.record(row, "generated", started, slug=payload.get("slug"))
+
+    def publisher(self) -> None:
+        # Collect finished payloads for up to PUBLISH_LINGER seconds (or a
+        # full chunk) and publish them as one Sanity transaction.
+        while True:
+            item = self.publish_queue.get()
+            if item is None:
+                return
+            items = [item]
+            closing = False
+            linger_until = time.monotonic() + PUBLISH_LINGER
+            while len(items) < self.options.publish_chunk:
+                timeout = linger_until - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.publish_queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                items.append(item)
+            self.publish_items(items)
+            if closing:
+                return
+
+    def publish_items(self, items: List[tuple]) -> None:
+        try:
+            outcomes = publish_sector_payloads(
+                [payload for _, payload, _ in items],
+                self.settings,
+                max_mutations=self.options.publish_chunk,
+                limiter=self.sanity_limit,
+            )
+        except Exception as exc:
+            for row, _, started in items:
+                self.record(row, "failed", started, stage="publish", error=str(exc))
+            return
+        for (row, _, started), outcome in zip(items, outcomes):
+            if not outcome.ok:
+                self.record(row, "failed", started, stage="publish", error=outcome.error)
+                continue
+            self.record(
+                row,
+                "published",
+                started,
+                slug=outcome.slug,
+                url=outcome.url,
+                pageIndex=outcome.page_index,
+            )
+            self.checkpoints.clear(row.row_id)
+
+    def run(self, rows: List[BatchRow]) -> None:
+        # Generation runs on a worker pool while a single publisher drains
+        # finished payloads, so Sanity writes overlap the next model calls.
+        # Each task runs in a copy of the caller's context, so an active
+        # tracer or usage total sees the whole batch.
+        publisher = threading.Thread(
+            target=contextvars.copy_context().run, args=(self.publisher,), daemon=True
+        )
+        publisher.start()
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, self.options.concurrency)) as pool:
+                tasks = [pool.submit(contextvars.copy_context().run, self.generate, row) for row in rows]
+                for task in tasks:
+                    task.result()
+        finally:
+            self.publish_queue.put(None)
+            publisher.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate sector pages from a manifest")
+    parser.add_argument("manifest", help="JSONL or CSV manifest of pages")
+    parser.add_argument("--results", help="Per-row results JSONL (default: <manifest>.results.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Rows generated at once")
+    parser.add_argument("--openai-rpm", type=float, default=DEFAULT_OPENAI_RPM, help="OpenAI requests per minute")
+    parser.add_argument("--sanity-rps", type=float, default=DEFAULT_SANITY_RPS, help="Sanity API requests per second")
+    parser.add_argument(
+        "--publish-chunk",
+        type=int,
+        default=DEFAULT_PUBLISH_CHUNK,
+        help="Documents per Sanity transaction",
+    )
+    parser.add_argument("--no-publish", action="store_true", help="Generate only")
+    parser.add_argument("--restart", action="store_true", help="Ignore previous results and start over")
+    args = parser.parse_args()
+
+    results_path = args.results or f"{os.path.splitext(args.manifest)[0]}.results.jsonl"
+    if args.restart:
+        if os.path.exists(results_path):
+            os.remove(results_path)
+        shutil.rmtree(results_path + ".d", ignore_errors=True)
+
+    rows = read_manifest(args.manifest)
+    completed = read_completed(results_path, publish=not args.no_publish)
+    pending = [row for row in rows if row.row_id not in completed]
+    print(f"{len(rows)} rows, {len(rows) - len(pending)} already done, {len(pending)} to run")
+
+    options = BatchOptions(
+        concurrency=args.concurrency,
+        openai_rpm=args.openai_rpm,
+        sanity_rps=args.sanity_rps,
+        publish_chunk=args.publish_chunk,
+        publish=not args.no_publish,
+    )
+    BatchRunner(get_settings(), results_path, options).run(pending)
+    print(f"Results: {results_path}")
+
+
+if __name__ == "__main__":
+    main()
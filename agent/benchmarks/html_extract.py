@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import argparse
+import glob
+import os
+import re
+import statistics
+import time
+from typing import Callable, Dict, List, Tuple
+from urllib.parse import urljoin, urlparse
+
+from agent.html_text import extract_links, html_to_text
+
+DEFAULT_MAX_CHARS = 5000
+
+
+def legacy_html_to_text(html: str) -> str:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    return " ".join(soup.get_text(separator=" ").split())
+
+
+def legacy_extract_links(html: str, base_url: str) -> List[str]:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    return [urljoin(base_url, anchor["href"]) for anchor in soup.find_all("a", href=True)]
+
+
+def synthetic_page(index: int, paragraphs: int = 400) -> str:
+    nav = "".join(f'<li><a href="/section-{i}">Section {i}</a></li>' for i in range(60))
+    body = "".join(
+        f"<p>Paragraph {i} of page {index} describes how the team ships "
+        f"reliable systems with measurable outcomes.</p>"
+        for i in range(paragraphs)
+    )
+    return (
+        "<html><head><style>body{color:#000}</style>"
+        "<script>var tracking = {};</script></head><body>"
+        f"<nav><ul>{nav}</ul></nav>"
+        '<div class="cookie-banner">We use cookies. Accept all?</div>'
+        f"<main><article><h1>Page {index}</h1>{body}</article></main>"
+        f"<footer><ul>{nav}</ul>Copyright</footer></body></html>"
+    )
+
+
+# (name, html, text that must survive, text that must be dropped). Checked
+# before timing so a filter change cannot trade content for speed.
+EXTRACTION_CASES = [
+    (
+        "body state class",
+        '<body class="has-cookie-banner"><main><p>We build AI pipelines for retail teams.</p>'
+        "</main></body>",
+        "We build AI pipelines",
+        "",
+    ),
+    (
+        "modal-open wrapper",
+        '<body><div class="modal-open page"><p>Our consulting practice ships weekly.</p></div></body>',
+        "consulting practice",
+        "",
+    ),
+    (
+        "consent-active body",
+        '<html class="js"><body class="cookie-consent-active"><div id="cookie-banner">'
+        "Accept all cookies?</div><article><p>Case study: forecasting demand.</p></article>"
+        "</body></html>",
+        "forecasting demand",
+        "Accept all cookies",
+    ),
+    (
+        "newsletter overlay",
+        '<body><main><p>Platform overview for finance teams.</p><div class="popup newsletter">'
+        "Subscribe to our newsletter</div></main></body>",
+        "Platform overview",
+        "Subscribe",
+    ),
+]
+
+
+def check_cases() -> None:
+    failures = []
+    for name, html, keep, drop in EXTRACTION_CASES:
+        text = html_to_text(html)
+        if keep not in text or (drop and drop in text):
+            failures.append(f"{name}: {text!r}")
+    for failure in failures:
+        print(f"extraction check failed - {failure}")
+    if failures:
+        raise SystemExit(1)
+    print(f"{len(EXTRACTION_CASES)} extraction checks passed")
+
+
+def load_corpus(corpus: str, synthetic: int) -> List[Tuple[str, str]]:
+    pages: List[Tuple[str, str]] = []
+    if corpus:
+        for path in sorted(glob.glob(os.path.join(corpus, "*.html"))):
+            with open(path, "r", encoding="utf-8", errors="ignore") as handle:
+                pages.append((os.path.basename(path), handle.read()))
+    if not pages:
+        pages = [(f"synthetic-{i}.html", synthetic_page(i)) for i in range(synthetic)]
+    return pages
+
+
+def save_pages(corpus: str, urls: List[str]) -> None:
+    from agent import transport
+
+    os.makedirs(corpus, exist_ok=True)
+    for url in urls:
+        response = transport.fetch(url)
+        response.raise_for_status()
+        parsed = urlparse(url)
+        name = re.sub(r"[^a-z0-9]+", "-", f"{parsed.netloc}{parsed.path}".lower()).strip("-")
+        with open(os.path.join(corpus, f"{name or 'page'}.html"), "w", encoding="utf-8") as handle:
+            handle.write(response.text)
+        print(f"Saved {url}")
+
+
+def time_runs(func: Callable[[str], object], pages: List[Tuple[str, str]], repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        for _, html in pages:
+            started = time.perf_counter()
+            func(html)
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def report(name: str, timings: List[float]) -> Dict[str, float]:
+    ordered = sorted(timings)
+    stats = {
+        "mean": statistics.fmean(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+    }
+    print(
+        f"{name:<28} mean {stats['mean']:8.2f} ms"
+        f"  p50 {stats['p50']:8.2f} ms  p95 {stats['p95']:8.2f} ms"
+    )
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare the streaming HTML extractor with the BeautifulSoup baseline"
+    )
+    parser.add_argument("--corpus", default="", help="Directory of saved *.html pages")
+    parser.add_argument(
+        "--save", action="append", default=[], help="Fetch URL into --corpus first"
+    )
+    parser.add_argument("--synthetic", type=int, default=20, help="Pages to generate without a corpus")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the corpus")
+    parser.add_argument("--max-chars", type=int, default=DEFAULT_MAX_CHARS, help="Text budget")
+    args = parser.parse_args()
+
+    if args.save:
+        if not args.corpus:
+            raise SystemExit("--save requires --corpus")
+        save_pages(args.corpus, args.save)
+
+    check_cases()
+    pages = load_corpus(args.corpus, args.synthetic)
+    print(f"{len(pages)} pages x {args.repeat} passes")
+
+    legacy_text = report("text: bs4 html.parser", time_runs(legacy_html_to_text, pages, args.repeat))
+    full_text = report("text: streaming", time_runs(html_to_text, pages, args.repeat))
+    budget_text = report(
+        f"text: streaming ({args.max_chars})",
+        time_runs(lambda html: html_to_text(html, args.max_chars), pages, args.repeat),
+    )
+    legacy_links = report(
+        "links: bs4 html.parser",
+        time_runs(lambda html: legacy_extract_links(html, "https://example.com"), pages, args.repeat),
+    )
+    fast_links = report(
+        "links: streaming",
+        time_runs(lambda html: extract_links(html, "https://example.com"), pages, args.repeat),
+    )
+
+    print(
+        f"speedup text {legacy_text['mean'] / full_text['mean']:.1f}x"
+        f" (budgeted {legacy_text['mean'] / budget_text['mean']:.1f}x),"
+        f" links {legacy_links['mean'] / fast_links['mean']:.1f}x"
+    )
+    legacy_chars = sum(len(legacy_html_to_text(html)) for _, html in pages)
+    fast_chars = sum(len(html_to_text(html)) for _, html in pages)
+    print(f"text kept: {fast_chars} chars vs {legacy_chars} (boilerplate removed)")
+
+
+if __name__ == "__main__":
+    main()
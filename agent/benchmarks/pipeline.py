@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import replace
+from typing import Any, Callable, Dict, List, Optional
+
+from agent.batch import BatchOptions, BatchRow, BatchRunner
+from agent.benchmarks.stubs import (
+    ModelProfile,
+    SanityStore,
+    StubServer,
+    build_site,
+    load_recorded_site,
+    make_openai_handler,
+    make_sanity_handler,
+    make_site_handler,
+)
+from agent.config import Settings, get_settings
+from agent.openai_client import OpenAIClient
+from agent.pipeline import (
+    AgentInput,
+    EditInput,
+    build_client,
+    generate_sector_patch,
+    generate_sector_payload,
+    generate_updated_payload,
+    publish_sector_patch,
+    publish_sector_payload,
+)
+from agent.tracing import Tracer, span, tracing
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore[assignment]
+
+WORKLOADS = ("single", "batch", "edit")
+DEFAULT_INCLUDE = ["about", "blog", "press", "careers"]
+# Caches that would turn repeat runs into lookups; --warm-cache keeps them.
+CACHES = ("http", "llm", "extract")
+
+
+def configure_environment(openai_url: str, sanity_url: str, cache_root: str, warm_cache: bool) -> None:
+    # Must run before get_settings() and before any cache or session is built.
+    os.environ.update(
+        {
+            "OPENAI_API_KEY": "benchmark",
+            "OPENAI_BASE_URL": f"{openai_url}/v1",
+            "SANITY_API_HOST": sanity_url,
+            "SANITY_PROJECT_ID": "benchmark",
+            "SANITY_DATASET": "benchmark",
+            "SANITY_API_WRITE_TOKEN": "benchmark",
+            "AGENT_CACHE_DIR": cache_root,
+        }
+    )
+    for name in CACHES:
+        os.environ[f"AGENT_{name.upper()}_CACHE"] = "1" if warm_cache else "0"
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(values),
+        "mean": round(statistics.fmean(values), 2),
+        "p50": round(percentile(values, 0.5), 2),
+        "p95": round(percentile(values, 0.95), 2),
+    }
+
+
+def max_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure(name: str, runs: List[Callable[[], Any]], units: int, memory: bool) -> Dict[str, Any]:
+    # Times each run, and groups the spans it emits by name.
+    events: List[Dict[str, Any]] = []
+    latencies = []
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with tracing(Tracer(events.append)):
+        for run in runs:
+            run_started = time.perf_counter()
+            with span("run", workload=name):
+                run()
+            latencies.append((time.perf_counter() - run_started) * 1000)
+    elapsed = time.perf_counter() - started
+    peak = None
+    if memory:
+        peak = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+        tracemalloc.stop()
+
+    stages: Dict[str, List[float]] = {}
+    cost = 0.0
+    for record in events:
+        if record.get("event") != "span":
+            continue
+        if record["name"] != "run":
+            stages.setdefault(record["name"], []).append(record["ms"])
+        if record["name"] in ("openai.generate", "openai.stream"):
+            cost += record.get("costUsd") or 0.0
+    result = {
+        "runs": len(runs),
+        "units": units,
+        "seconds": round(elapsed, 3),
+        "throughput": round(units / elapsed, 3) if elapsed else None,
+        "latency": summarize(latencies),
+        "stages": {stage: summarize(values) for stage, values in sorted(stages.items())},
+        "costUsd": round(cost, 6),
+        "tracemallocPeakMb": peak,
+        "maxRssMb": max_rss_mb(),
+    }
+    print_result(name, result)
+    return result
+
+
+def print_result(name: str, result: Dict[str, Any]) -> None:
+    latency = result["latency"]
+    print(
+        f"\n{name}: {result['units']} pages in {result['seconds']:.2f}s"
+        f" ({result['throughput']:.2f}/s)  run p50 {latency['p50']:.0f} ms"
+        f"  p95 {latency['p95']:.0f} ms  cost ${result['costUsd']:.4f}"
+        f"  rss {result['maxRssMb']} MB"
+        + (f"  peak {result['tracemallocPeakMb']} MB" if result["tracemallocPeakMb"] is not None else "")
+    )
+    for stage, stats in result["stages"].items():
+        print(
+            f"  {stage:<20} n {stats['count']:>5}  p50 {stats['p50']:9.2f} ms"
+            f"  p95 {stats['p95']:9.2f} ms"
+        )
+
+
+def agent_input(index: int, website: str) -> AgentInput:
+    return AgentInput(
+        company_name=f"Benchmark Company {index}",
+        sector_label="Retail analytics",
+        slug=f"benchmark-{index}-{time.time_ns()}",
+        context="Benchmark run",
+        files=[],
+        links=[f"{website}/about"],
+        website=website,
+        include_categories=list(DEFAULT_INCLUDE),
+        exclude_patterns=[],
+    )
+
+
+def single_workload(
+    settings: Settings, client: OpenAIClient, website: str, runs: int, memory: bool, label: str
+) -> Dict[str, Any]:
+    def run(index: int) -> Callable[[], Any]:
+        def call() -> None:
+            payload = generate_sector_payload(agent_input(index, website), settings, client)
+            publish_sector_payload(payload, settings)
+
+        return call
+
+    return measure(label, [run(index) for index in range(runs)], runs, memory)
+
+
+def batch_workload(
+    settings: Settings, client: OpenAIClient, website: str, rows: int, concurrency: int, memory: bool
+) -> Dict[str, Any]:
+    batch_rows = [
+        BatchRow(row_id=f"row-{index}", agent_input=agent_input(index, website)) for index in range(rows)
+    ]
+    results_path = os.path.join(tempfile.mkdtemp(prefix="agent-bench-batch-"), "results.jsonl")
+    options = BatchOptions(concurrency=concurrency, openai_rpm=100_000, sanity_rps=1_000)
+
+    def call() -> None:
+        BatchRunner(settings, results_path, options, client=client).run(batch_rows)
+
+    result = measure("batch", [call], rows, memory)
+    with open(results_path, "r", encoding="utf-8") as handle:
+        statuses = [json.loads(line)["status"] for line in handle if line.strip()]
+    failed = len([status for status in statuses if status != "published"])
+    if failed:
+        print(f"  {failed} of {len(statuses)} rows failed; see {results_path}")
+    return result
+
+
+def edit_workload(
+    settings: Settings, client: OpenAIClient, website: str, runs: int, mode: str, memory: bool
+) -> Dict[str, Any]:
+    seed = generate_sector_payload(agent_input(0, website), settings, client)
+    publish_sector_payload(seed, settings)
+    edit_input = EditInput(
+        slug=seed["slug"],
+        sector_label="Retail analytics",
+        instructions="Tighten the hero copy and refresh the FAQ.",
+        context="",
+        files=[],
+        links=[f"{website}/press"],
+        website="",
+        include_categories=[],
+        exclude_patterns=[],
+    )
+
+    def call() -> None:
+        if mode == "patch":
+            publish_sector_patch(generate_sector_patch(edit_input, settings, client), settings)
+        else:
+            publish_sector_payload(generate_updated_payload(edit_input, settings, client), settings)
+
+    return measure(f"edit ({mode})", [call] * runs, runs, memory)
+
+
+def regressions(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    # p95 run latency and per-stage p95 that grew by more than `tolerance`.
+    found = []
+    for name, result in results.get("workloads", {}).items():
+        previous = baseline.get("workloads", {}).get(name)
+        if not previous:
+            continue
+        pairs = [("run", result["latency"], previous["latency"])]
+        pairs += [
+            (stage, stats, previous["stages"][stage])
+            for stage, stats in result["stages"].items()
+            if stage in previous["stages"]
+        ]
+        for stage, current, before in pairs:
+            if before["p95"] and current["p95"] > before["p95"] * (1 + tolerance):
+                found.append(f"{name} {stage}: p95 {before['p95']:.1f} -> {current['p95']:.1f} ms")
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Time the agent pipeline against local website, OpenAI and Sanity stand-ins"
+    )
+    parser.add_argument(
+        "--workload", action="append", choices=WORKLOADS, default=[], help="Workload to run (default: all)"
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Runs per single/edit workload")
+    parser.add_argument("--batch-rows", type=int, default=20, help="Rows in the batch workload")
+    parser.add_argument("--concurrency", type=int, default=4, help="Batch rows generated at once")
+    parser.add_argument(
+        "--site-pages",
+        type=int,
+        action="append",
+        default=[],
+        help="Synthetic site size; repeat to time the single workload per size (default: 200)",
+    )
+    parser.add_argument("--site-corpus", default="", help="Serve a saved site directory instead")
+    parser.add_argument("--site-latency-ms", type=float, default=20.0, help="Delay per site request")
+    parser.add_argument("--llm-first-token-ms", type=float, default=300.0, help="Model latency before output")
+    parser.add_argument("--llm-tokens-per-sec", type=float, default=2000.0, help="Model output rate")
+    parser.add_argument("--sanity-latency-ms", type=float, default=30.0, help="Delay per Sanity request")
+    parser.add_argument("--generation-mode", choices=["single", "sections"], help="Override AGENT_GENERATION_MODE")
+    parser.add_argument("--stream", action="store_true", help="Stream model output")
+    parser.add_argument("--edit-mode", choices=["full", "patch"], default="patch", help="Edit workload mode")
+    parser.add_argument("--warm-cache", action="store_true", help="Keep the HTTP, LLM and extract caches on")
+    parser.add_argument("--memory", action="store_true", help="Record tracemalloc peaks (slower)")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--compare", help="Baseline results JSON; exit 1 on p95 regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95 growth for --compare")
+    args = parser.parse_args()
+
+    workloads = args.workload or list(WORKLOADS)
+    site_sizes = args.site_pages or [200]
+    profile = ModelProfile(args.llm_first_token_ms, args.llm_tokens_per_sec)
+    site_pages: List[Dict[str, Any]] = [{} for _ in site_sizes]
+
+    with StubServer(make_openai_handler(profile)) as openai_stub, StubServer(
+        make_sanity_handler(SanityStore(), args.sanity_latency_ms / 1000)
+    ) as sanity_stub:
+        sites = [
+            StubServer(make_site_handler(pages, args.site_latency_ms / 1000)).__enter__()
+            for pages in site_pages
+        ]
+        try:
+            for site, pages, size in zip(sites, site_pages, site_sizes):
+                if args.site_corpus:
+                    pages.update(load_recorded_site(args.site_corpus, site.url))
+                else:
+                    pages.update(build_site(site.url, size))
+            configure_environment(
+                openai_stub.url, sanity_stub.url, tempfile.mkdtemp(prefix="agent-bench-"), args.warm_cache
+            )
+
+            settings = get_settings()
+            if args.generation_mode:
+                settings = replace(settings, generation_mode=args.generation_mode)
+            if args.stream:
+                settings = replace(settings, stream_output=True)
+            client = build_client(settings)
+            print(
+                f"model {settings.openai_model}, mode {settings.generation_mode},"
+                f" structured {settings.structured_output}, stream {settings.stream_output},"
+                f" caches {'warm' if args.warm_cache else 'off'}"
+            )
+
+            results: Dict[str, Any] = {"settings": vars(args), "workloads": {}}
+            website = sites[0].url
+            if "single" in workloads:
+                for site, size in zip(sites, site_sizes):
+                    label = "single" if len(sites) == 1 else f"single ({size} pages)"
+                    results["workloads"][label] = single_workload(
+                        settings, client, site.url, args.runs, args.memory, label
+                    )
+            if "batch" in workloads:
+                results["workloads"]["batch"] = batch_workload(
+                    settings, client, website, args.batch_rows, args.concurrency, args.memory
+                )
+            if "edit" in workloads:
+                result = edit_workload(settings, client, website, args.runs, args.edit_mode, args.memory)
+                results["workloads"][f"edit ({args.edit_mode})"] = result
+        finally:
+            for site in sites:
+                site.__exit__(None, None, None)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+        print(f"\nResults: {args.json}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        found = regressions(results, baseline, args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,439 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import mimetypes
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from uuid import uuid4
+
+from agent.packing import CHARS_PER_TOKEN
+from agent.schema import SECTOR_SCHEMA
+
+# Local stand-ins for a company website, the OpenAI Responses API and the
+# Sanity HTTP API, so the pipeline can be timed without network access.
+
+WORDS = (
+    "platform customers teams data models pipeline governance evaluation retail "
+    "logistics finance health energy partners growth launch product service market "
+    "research engineers analytics security compliance automation workflow insight "
+    "strategy operations supply demand forecast pricing inventory quality support "
+    "mission values culture hiring remote office award funding quarter release "
+    "announce conference keynote case study results revenue efficiency latency"
+).split()
+CATEGORY_SECTIONS = {"blog": "post", "press": "release", "careers": "role"}
+ABOUT_PATHS = ["/about", "/about/team", "/about/mission"]
+SITEMAP_CHUNK = 1000
+PREFIX_CACHE_BLOCK = 128
+PREFIX_CACHE_MIN = 1024
+
+
+class StubServer:
+    # Serves a handler on 127.0.0.1 with an OS-assigned port from a daemon
+    # thread; use as a context manager.
+    def __init__(self, handler: type):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def send(handler: BaseHTTPRequestHandler, status: int, body: bytes, content_type: str) -> None:
+    handler.send_response(status)
+    handler.send_header("Content-Type", content_type)
+    handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+def send_json(handler: BaseHTTPRequestHandler, status: int, data: Any) -> None:
+    send(handler, status, json.dumps(data).encode("utf-8"), "application/json")
+
+
+# Website ------------------------------------------------------------------
+
+Page = Tuple[str, bytes]
+
+
+def paragraph(rng: random.Random, words: int = 60) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def page_html(title: str, rng: random.Random, paragraphs: int = 12) -> str:
+    body = "".join(f"<p>{paragraph(rng)}</p>" for _ in range(paragraphs))
+    return (
+        f"<html><head><title>{title}</title><script>var t = 1;</script></head><body>"
+        '<nav><a href="/">Home</a> <a href="/about">About</a> <a href="/blog">Blog</a></nav>'
+        f"<main><h1>{title}</h1>{body}</main>"
+        "<footer>Copyright Example Co. All rights reserved.</footer></body></html>"
+    )
+
+
+def urlset(base_url: str, entries: List[Tuple[str, str]]) -> bytes:
+    urls = "".join(
+        f"<url><loc>{base_url}{path}</loc><lastmod>{lastmod}</lastmod></url>"
+        for path, lastmod in entries
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+    ).encode("utf-8")
+
+
+def add_sitemaps(pages: Dict[str, Page], base_url: str, entries: List[Tuple[str, str]]) -> None:
+    # One urlset, or an index of SITEMAP_CHUNK-sized child sitemaps.
+    chunks = [entries[index : index + SITEMAP_CHUNK] for index in range(0, len(entries), SITEMAP_CHUNK)]
+    if len(chunks) <= 1:
+        pages["/sitemap.xml"] = ("application/xml", urlset(base_url, entries))
+    else:
+        children = ""
+        for number, chunk in enumerate(chunks, start=1):
+            pages[f"/sitemap-{number}.xml"] = ("application/xml", urlset(base_url, chunk))
+            children += f"<sitemap><loc>{base_url}/sitemap-{number}.xml</loc></sitemap>"
+        pages["/sitemap.xml"] = (
+            "application/xml",
+            (
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                f'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{children}'
+                "</sitemapindex>"
+            ).encode("utf-8"),
+        )
+    pages["/robots.txt"] = ("text/plain", f"User-agent: *\nSitemap: {base_url}/sitemap.xml\n".encode())
+
+
+def build_site(base_url: str, page_count: int = 200, seed: int = 1) -> Dict[str, Page]:
+    # A synthetic company site: about pages plus blog posts, press releases
+    # and job listings, with /en/ locale copies and /news/ near-duplicates
+    # of a few releases so the URL-variant and MinHash filters have work.
+    rng = random.Random(seed)
+    pages: Dict[str, Page] = {}
+    today = datetime.now(timezone.utc)
+    entries: List[Tuple[str, str]] = []
+
+    def add(path: str, title: str, html: Optional[str] = None) -> None:
+        pages[path] = ("text/html; charset=utf-8", (html or page_html(title, rng)).encode("utf-8"))
+        lastmod = (today - timedelta(days=rng.randint(0, 720))).strftime("%Y-%m-%d")
+        entries.append((path, lastmod))
+
+    for path in ABOUT_PATHS:
+        add(path, path.rsplit("/", 1)[-1].title())
+    per_category = max(1, (page_count - len(ABOUT_PATHS)) // len(CATEGORY_SECTIONS))
+    for category, item in CATEGORY_SECTIONS.items():
+        add(f"/{category}", category.title())
+        for index in range(per_category):
+            add(f"/{category}/{item}-{index}", f"{category.title()} {item} {index}")
+    for index in range(min(5, per_category)):
+        release = pages[f"/press/release-{index}"][1].decode("utf-8")
+        add(f"/news/release-{index}", "", release.replace("</main>", "<p>Shared via newsroom.</p></main>"))
+        add(f"/en/blog/post-{index}", "", pages[f"/blog/post-{index}"][1].decode("utf-8"))
+
+    links = "".join(f'<a href="{path}">{path}</a> ' for path, _ in entries[:40])
+    pages["/"] = ("text/html; charset=utf-8", page_html("Example Co", rng).replace("</main>", f"{links}</main>").encode())
+    add_sitemaps(pages, base_url, entries)
+    return pages
+
+
+def load_recorded_site(directory: str, base_url: str) -> Dict[str, Page]:
+    # Serves a saved corpus as-is; a sitemap listing its HTML files is added
+    # when the corpus has none.
+    pages: Dict[str, Page] = {}
+    for root, _, names in os.walk(directory):
+        for name in names:
+            full = os.path.join(root, name)
+            path = "/" + os.path.relpath(full, directory).replace(os.sep, "/")
+            if path.endswith("/index.html"):
+                path = path[: -len("/index.html")] or "/"
+            content_type = mimetypes.guess_type(full)[0] or "application/octet-stream"
+            with open(full, "rb") as handle:
+                pages[path] = (content_type, handle.read())
+    if "/sitemap.xml" not in pages:
+        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        entries = [(path, today) for path, (kind, _) in sorted(pages.items()) if kind == "text/html"]
+        add_sitemaps(pages, base_url, entries)
+    return pages
+
+
+def make_site_handler(pages: Dict[str, Page], latency: float = 0.0) -> type:
+    # `pages` is read per request, so it can be filled in once the port is known.
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            path = urlsplit(self.path).path
+            page = pages.get(path) or pages.get(path.rstrip("/") or "/")
+            if latency:
+                time.sleep(latency)
+            if page is None:
+                send(self, 404, b"Not found", "text/plain")
+                return
+            content_type, body = page
+            etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", formatdate(usegmt=True))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            return
+
+    return Handler
+
+
+# OpenAI Responses API -----------------------------------------------------
+
+
+@dataclass
+class ModelProfile:
+    first_token_ms: float = 300.0
+    tokens_per_second: float = 2000.0
+
+
+def sample_value(schema: Dict[str, Any], label: str) -> Any:
+    # Smallest valid instance of a strict JSON schema (exact array sizes,
+    # non-empty strings).
+    kind = schema.get("type")
+    if kind == "object":
+        return {key: sample_value(value, key) for key, value in schema["properties"].items()}
+    if kind == "array":
+        return [sample_value(schema["items"], label) for _ in range(schema.get("minItems", 3))]
+    return f"Sample {label} copy for the benchmark page."
+
+
+def prompt_text(body: Dict[str, Any]) -> str:
+    parts = []
+    for message in body.get("input") or []:
+        for content in message.get("content") or []:
+            parts.append(content.get("text", ""))
+    return "\n".join(parts)
+
+
+def fake_output(body: Dict[str, Any], prompt: str) -> Any:
+    text_format = (body.get("text") or {}).get("format") or {}
+    if text_format.get("type") == "json_schema":
+        return sample_value(text_format["schema"], "")
+    if '"operations"' in prompt:
+        return {"operations": [{"op": "replace", "path": "/hero/title", "value": "Edited title"}]}
+    return sample_value(SECTOR_SCHEMA, "")
+
+
+class PrefixCache:
+    # Approximates provider prompt caching: the longest shared prefix with a
+    # recent prompt counts as cached, in 128-token blocks from 1024 tokens.
+    def __init__(self, size: int = 32):
+        self.size = size
+        self.recent: List[str] = []
+        self.lock = threading.Lock()
+
+    def cached_tokens(self, prompt: str) -> int:
+        with self.lock:
+            shared = max((len(os.path.commonprefix([prompt, seen])) for seen in self.recent), default=0)
+            self.recent = [prompt, *self.recent[: self.size - 1]]
+        tokens = shared // CHARS_PER_TOKEN // PREFIX_CACHE_BLOCK * PREFIX_CACHE_BLOCK
+        return tokens if tokens >= PREFIX_CACHE_MIN else 0
+
+
+def response_object(model: str, text: str, usage: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": f"resp_{uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "status": "completed",
+        "model": model,
+        "output": [
+            {
+                "type": "message",
+                "id": f"msg_{uuid4().hex}",
+                "status": "completed",
+                "role": "assistant",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }
+        ],
+        "parallel_tool_calls": False,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": usage,
+    }
+
+
+def make_openai_handler(profile: ModelProfile) -> type:
+    prefix_cache = PrefixCache()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.rstrip("/").endswith("/responses"):
+                send_json(self, 404, {"error": {"message": "Not found"}})
+                return
+            prompt = prompt_text(body)
+            text = json.dumps(fake_output(body, prompt))
+            input_tokens = len(prompt) // CHARS_PER_TOKEN
+            output_tokens = max(1, len(text) // CHARS_PER_TOKEN)
+            usage = {
+                "input_tokens": input_tokens,
+                "input_tokens_details": {"cached_tokens": prefix_cache.cached_tokens(prompt)},
+                "output_tokens": output_tokens,
+                "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": input_tokens + output_tokens,
+            }
+            response = response_object(body.get("model", ""), text, usage)
+            time.sleep(profile.first_token_ms / 1000)
+            if body.get("stream"):
+                self.stream(response, text)
+                return
+            time.sleep(output_tokens / profile.tokens_per_second)
+            send_json(self, 200, response)
+
+        def stream(self, response: Dict[str, Any], text: str) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            self.event({"type": "response.created", "response": {**response, "status": "in_progress", "output": []}})
+            step = 8 * CHARS_PER_TOKEN
+            for index in range(0, len(text), step):
+                time.sleep(8 / profile.tokens_per_second)
+                self.event(
+                    {
+                        "type": "response.output_text.delta",
+                        "item_id": response["output"][0]["id"],
+                        "output_index": 0,
+                        "content_index": 0,
+                        "delta": text[index : index + step],
+                    }
+                )
+            self.event({"type": "response.completed", "response": response})
+
+        def event(self, data: Dict[str, Any]) -> None:
+            try:
+                self.wfile.write(f"event: {data['type']}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                # The client closed the stream early (aborted section).
+                pass
+
+        def log_message(self, format: str, *args: Any) -> None:
+            return
+
+    return Handler
+
+
+# Sanity HTTP API ----------------------------------------------------------
+
+
+class SanityStore:
+    # Enough of the query/mutate API for the queries the agent sends. Patch
+    # mutations only touch the timestamps; content is not needed for timing.
+    def __init__(self) -> None:
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+
+    def query(self, query: str, params: Dict[str, Any]) -> Any:
+        with self.lock:
+            documents = sorted(self.documents.values(), key=lambda item: item["_createdAt"])
+        rows = [
+            {
+                "_id": item["_id"],
+                "slug": item.get("slug", {}).get("current"),
+                "_createdAt": item["_createdAt"],
+                "_updatedAt": item["_updatedAt"],
+            }
+            for item in documents
+        ]
+        if query.startswith('{"count"'):
+            since = params.get("since", "")
+            return {
+                "count": sum(1 for row in rows if row["slug"]),
+                "changed": [row for row in rows if row["_updatedAt"] > since],
+            }
+        if "slug" in params:
+            for item in documents:
+                if item.get("slug", {}).get("current") == params["slug"]:
+                    return {**item, "slug": params["slug"]}
+            return None
+        if "_updatedAt" in query:
+            return rows
+        return [{"slug": row["slug"]} for row in rows if row["slug"]]
+
+    def mutate(self, mutations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        results = []
+        now = datetime.now(timezone.utc).isoformat()
+        with self.lock:
+            for mutation in mutations:
+                if "createOrReplace" in mutation:
+                    document = dict(mutation["createOrReplace"])
+                    existing = self.documents.get(document["_id"])
+                    document["_createdAt"] = existing["_createdAt"] if existing else now
+                    document["_updatedAt"] = now
+                    self.documents[document["_id"]] = document
+                    results.append({"id": document["_id"], "operation": "update" if existing else "create"})
+                elif "patch" in mutation:
+                    document_id = mutation["patch"]["id"]
+                    if document_id in self.documents:
+                        self.documents[document_id]["_updatedAt"] = now
+                    results.append({"id": document_id, "operation": "update"})
+        return {"transactionId": uuid4().hex, "results": results}
+
+
+def make_sanity_handler(store: SanityStore, latency: float = 0.0) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            parts = urlsplit(self.path)
+            if "/data/query/" not in parts.path:
+                send_json(self, 404, {"error": "Not found"})
+                return
+            values = {key: items[0] for key, items in parse_qs(parts.query).items()}
+            params = {key[1:]: json.loads(value) for key, value in values.items() if key.startswith("$")}
+            if latency:
+                time.sleep(latency)
+            send_json(self, 200, {"result": store.query(values.get("query", ""), params), "ms": 1})
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if "/data/mutate/" not in self.path:
+                send_json(self, 404, {"error": "Not found"})
+                return
+            if latency:
+                time.sleep(latency)
+            send_json(self, 200, store.mutate(body.get("mutations", [])))
+
+        def log_message(self, format: str, *args: Any) -> None:
+            return
+
+    return Handler
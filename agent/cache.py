@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "agent")
+
+
+def cache_dir() -> str:
+    return os.getenv("AGENT_CACHE_DIR", DEFAULT_CACHE_DIR)
+
+
+def cache_enabled(name: str) -> bool:
+    flag = os.getenv(f"AGENT_{name.upper()}_CACHE", "1").strip().lower()
+    return flag not in {"0", "false", "no", "off"}
+
+
+@dataclass
+class CacheEntry:
+    value: bytes
+    meta: Dict[str, Any]
+    stored_at: float
+    expires_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stale: int = 0
+    evictions: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "evictions": self.evictions,
+        }
+
+
+@dataclass
+class DiskCache:
+    # SQLite-backed key/value store with per-entry TTL and LRU eviction once
+    # the stored bodies exceed `max_bytes`. Safe to share across threads and
+    # across processes pointing at the same file.
+    path: str
+    max_bytes: int = 200 * 1024 * 1024
+    stats: CacheStats = field(default_factory=CacheStats)
+
+    def __post_init__(self) -> None:
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " value BLOB NOT NULL,"
+                " meta TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " stored_at REAL NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[CacheEntry]:
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT value, meta, stored_at, expires_at FROM entries WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            self.stats.misses += 1
+            return None
+        entry = CacheEntry(
+            value=row[0], meta=json.loads(row[1]), stored_at=row[2], expires_at=row[3]
+        )
+        if not entry.fresh and not allow_stale:
+            self.stats.misses += 1
+            return None
+        if entry.fresh:
+            self.stats.hits += 1
+        else:
+            self.stats.stale += 1
+        conn.execute(
+            "UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key)
+        )
+        return entry
+
+    def reject(self, entry: CacheEntry) -> None:
+        # The caller could not use an entry `get` returned (corrupt, or it
+        # failed validation), so that read counts as a miss instead.
+        if entry.fresh:
+            self.stats.hits -= 1
+        else:
+            self.stats.stale -= 1
+        self.stats.misses += 1
+
+    def set(
+        self,
+        key: str,
+        value: bytes,
+        ttl: float,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        if len(value) > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries"
+            " (key, value, meta, size, stored_at, expires_at, accessed_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, value, json.dumps(meta or {}), len(value), now, now + ttl, now),
+        )
+        self.evict()
+
+    def touch(self, key: str, ttl: float) -> None:
+        now = time.time()
+        self._connect().execute(
+            "UPDATE entries SET expires_at = ?, accessed_at = ? WHERE key = ?",
+            (now + ttl, now, key),
+        )
+
+    def delete(self, key: str) -> None:
+        self._connect().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def evict(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            rows = conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed_at ASC"
+            ).fetchall()
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
+                self.stats.evictions += 1
+
+
+_caches: Dict[str, DiskCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name: str, max_mb: int = 200) -> DiskCache:
+    limit = int(os.getenv(f"AGENT_{name.upper()}_CACHE_MB", max_mb))
+    path = os.path.join(cache_dir(), f"{name}.sqlite3")
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = DiskCache(path=path, max_bytes=limit * 1024 * 1024)
+            _caches[path] = cache
+        return cache
@@ -1,13 +1,27 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
+import cProfile
+import json
+import sys
+from dataclasses import replace
+from typing import Optional
 
-from agent.config import get_settings
+from agent.cache import get_cache
+from agent.config import Settings, get_settings
+from agent.openai_client import OpenAIClient
+from agent.report import RunReport
+from agent.streaming import SectionCallback
+from agent.tracing import event_log, span, token_attrs
+from agent.usage import TokenUsage, track_usage
 from agent.pipeline import (
     AgentInput,
     EditInput,
+    generate_sector_patch,
     generate_sector_payload,
     generate_updated_payload,
+    publish_sector_patch,
     publish_sector_payload,
 )
 
@@ -33,18 +47,95 @@ def build_parser() -> argparse.ArgumentParser:
         default=[],
         help="Exclude patterns/URLs from auto-pull",
     )
+    parser.add_argument(
+        "--discovery",
+        help="Discovery manifest id from agent.discover_cli (skips re-crawling --website)",
+    )
     parser.add_argument("--edit-slug", help="Edit existing sector by slug")
     parser.add_argument(
         "--instructions", default="", help="Editing instructions for existing sector"
     )
+    parser.add_argument(
+        "--edit-mode",
+        choices=["full", "patch"],
+        default="full",
+        help="Regenerate the whole sector or apply a minimal patch",
+    )
+    parser.add_argument(
+        "--generation-mode",
+        choices=["single", "sections"],
+        help="One model call per page, or one per section in parallel",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream model output and report each finished section on stderr",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Call the model even if an identical generation is cached",
+    )
+    parser.add_argument("--report", help="Write a JSON run report (per-source token use) here")
+    parser.add_argument(
+        "--events",
+        help="Append NDJSON timing/token events to this file ('-' for stderr)",
+    )
+    parser.add_argument("--profile", help="Write cProfile stats for the run to this file")
     parser.add_argument("--no-publish", action="store_true", help="Skip publishing")
     return parser
 
 
-def main() -> None:
-    args = build_parser().parse_args()
-    settings = get_settings()
+def print_section(name: str, value: object) -> None:
+    # One JSON line per completed section, for callers rendering progress.
+    print(json.dumps({"event": "section", "name": name, "value": value}), file=sys.stderr, flush=True)
+
+
+def run(
+    args: argparse.Namespace,
+    settings: Settings,
+    client: Optional[OpenAIClient] = None,
+) -> str:
+    if args.generation_mode:
+        settings = replace(settings, generation_mode=args.generation_mode)
+
+    if args.no_cache:
+        settings = replace(settings, llm_cache=False)
+        client = client.uncached() if client else None
 
+    on_section = print_section if args.stream else None
+    report = RunReport() if args.report else None
+    usage = report.usage if report is not None else TokenUsage()
+    events = event_log(args.events) if args.events else contextlib.nullcontext()
+    try:
+        with events, track_usage(usage), span(
+            "run", command="edit" if args.edit_slug else "create"
+        ) as current:
+            try:
+                return execute(args, settings, client, on_section, report)
+            finally:
+                current.set(
+                    calls=usage.calls,
+                    **token_attrs(
+                        settings.openai_model,
+                        usage.input_tokens,
+                        usage.cached_tokens,
+                        usage.output_tokens,
+                    ),
+                )
+    finally:
+        if report is not None:
+            with open(args.report, "w", encoding="utf-8") as handle:
+                json.dump(report.as_dict(), handle, indent=2)
+
+
+def execute(
+    args: argparse.Namespace,
+    settings: Settings,
+    client: Optional[OpenAIClient],
+    on_section: Optional[SectionCallback],
+    report: Optional[RunReport],
+) -> str:
     include_categories = args.include
     if args.website and not include_categories:
         include_categories = ["about", "blog", "press", "careers"]
@@ -60,8 +151,24 @@ def main() -> None:
             website=args.website,
             include_categories=include_categories,
             exclude_patterns=args.exclude,
+            discovery=args.discovery,
+        )
+        if args.edit_mode == "patch":
+            patch = generate_sector_patch(edit_input, settings, client, report)
+            if args.no_publish:
+                return json.dumps(
+                    {
+                        "operations": patch.operations,
+                        "set": patch.set_fields,
+                        "unset": patch.unset_fields,
+                    },
+                    indent=2,
+                )
+            url = publish_sector_patch(patch, settings)
+            return f"Published: {url}"
+        payload = generate_updated_payload(
+            edit_input, settings, client, on_section, report
         )
-        payload = generate_updated_payload(edit_input, settings)
     else:
         if not args.company or not args.sector:
             raise SystemExit("--company and --sector are required for new pages")
@@ -75,15 +182,35 @@ def main() -> None:
             website=args.website,
             include_categories=include_categories,
             exclude_patterns=args.exclude,
+            discovery=args.discovery,
+        )
+        payload = generate_sector_payload(
+            agent_input, settings, client, on_section, report
         )
-        payload = generate_sector_payload(agent_input, settings)
 
     if args.no_publish:
-        print(payload)
-        return
+        return str(payload)
 
     url = publish_sector_payload(payload, settings)
-    print(f"Published: {url}")
+    return f"Published: {url}"
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    settings = get_settings()
+    if args.profile:
+        profiler = cProfile.Profile()
+        try:
+            output = profiler.runcall(run, args, settings)
+        finally:
+            profiler.dump_stats(args.profile)
+        print(output)
+    else:
+        print(run(args, settings))
+    if settings.llm_cache and not args.no_cache:
+        stats = get_cache("llm").stats
+        if stats.hits or stats.misses:
+            print(json.dumps({"event": "cache", "name": "llm", **stats.as_dict()}), file=sys.stderr)
 
 
 if __name__ == "__main__":
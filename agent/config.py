@@ -6,6 +6,8 @@ from typing import Optional
 
 from dotenv import load_dotenv
 
+from agent.cache import cache_enabled
+
 
 def load_env() -> None:
     load_dotenv(".env.local")
@@ -23,6 +25,19 @@ class Settings:
     sanity_api_version: str
     sanity_api_token: str
     site_url: str
+    fetch_workers: int = 8
+    fetch_per_host: int = 2
+    ingest_deadline: float = 60.0
+    extract_timeout: float = 30.0
+    extract_memory_mb: int = 1024
+    extract_processes: int = 0
+    generation_mode: str = "single"
+    section_workers: int = 6
+    stream_output: bool = False
+    llm_cache: bool = True
+    source_token_budget: int = 6000
+    retrieval_chunks: int = 24
+    structured_output: bool = True
 
 
 DEFAULT_MODEL = "gpt-4o-mini"
@@ -30,6 +45,15 @@ DEFAULT_TEMP = 0.4
 DEFAULT_MAX_TOKENS = 1800
 DEFAULT_SANITY_VERSION = "2023-08-01"
 DEFAULT_SITE_URL = "http://localhost:3000"
+DEFAULT_FETCH_WORKERS = 8
+DEFAULT_FETCH_PER_HOST = 2
+DEFAULT_INGEST_DEADLINE = 60.0
+DEFAULT_EXTRACT_TIMEOUT = 30.0
+DEFAULT_EXTRACT_MEMORY_MB = 1024
+DEFAULT_GENERATION_MODE = "single"
+DEFAULT_SECTION_WORKERS = 6
+DEFAULT_SOURCE_TOKENS = 6000
+DEFAULT_RETRIEVAL_CHUNKS = 24
 
 
 def get_settings() -> Settings:
@@ -54,6 +78,23 @@ def get_settings() -> Settings:
     model = os.getenv("OPENAI_MODEL", DEFAULT_MODEL)
     temperature = float(os.getenv("OPENAI_TEMPERATURE", DEFAULT_TEMP))
     max_output_tokens = int(os.getenv("OPENAI_MAX_OUTPUT_TOKENS", DEFAULT_MAX_TOKENS))
+    fetch_workers = int(os.getenv("AGENT_FETCH_WORKERS", DEFAULT_FETCH_WORKERS))
+    fetch_per_host = int(os.getenv("AGENT_FETCH_PER_HOST", DEFAULT_FETCH_PER_HOST))
+    ingest_deadline = float(os.getenv("AGENT_INGEST_DEADLINE", DEFAULT_INGEST_DEADLINE))
+    extract_timeout = float(os.getenv("AGENT_EXTRACT_TIMEOUT", DEFAULT_EXTRACT_TIMEOUT))
+    extract_memory_mb = int(os.getenv("AGENT_EXTRACT_MEMORY_MB", DEFAULT_EXTRACT_MEMORY_MB))
+    extract_processes = int(os.getenv("AGENT_EXTRACT_PROCESSES", os.cpu_count() or 2))
+    generation_mode = os.getenv("AGENT_GENERATION_MODE", DEFAULT_GENERATION_MODE).strip().lower()
+    if generation_mode not in {"single", "sections"}:
+        raise ValueError("AGENT_GENERATION_MODE must be 'single' or 'sections'")
+    section_workers = int(os.getenv("AGENT_SECTION_WORKERS", DEFAULT_SECTION_WORKERS))
+    llm_cache = cache_enabled("llm")
+    source_token_budget = int(os.getenv("AGENT_SOURCE_TOKENS", DEFAULT_SOURCE_TOKENS))
+    retrieval_chunks = int(os.getenv("AGENT_RETRIEVAL_CHUNKS", DEFAULT_RETRIEVAL_CHUNKS))
+    stream_output = os.getenv("AGENT_STREAM", "").strip().lower() in {"1", "true", "yes"}
+    # Strict JSON-schema output; turn off for models without structured outputs.
+    structured_flag = os.getenv("AGENT_STRUCTURED_OUTPUT", "1").strip().lower()
+    structured_output = structured_flag not in {"0", "false", "no", "off"}
 
     return Settings(
         openai_api_key=openai_api_key,
@@ -65,4 +106,17 @@ def get_settings() -> Settings:
         sanity_api_version=sanity_api_version,
         sanity_api_token=sanity_api_token,
         site_url=site_url,
+        fetch_workers=fetch_workers,
+        fetch_per_host=fetch_per_host,
+        ingest_deadline=ingest_deadline,
+        extract_timeout=extract_timeout,
+        extract_memory_mb=extract_memory_mb,
+        extract_processes=extract_processes,
+        generation_mode=generation_mode,
+        section_workers=section_workers,
+        stream_output=stream_output,
+        llm_cache=llm_cache,
+        source_token_budget=source_token_budget,
+        retrieval_chunks=retrieval_chunks,
+        structured_output=structured_output,
     )
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import hashlib
+import random
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+SHINGLE_WORDS = 5
+NUM_PERM = 64
+DUPLICATE_THRESHOLD = 0.8
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+WORD = re.compile(r"\w+")
+# /en/, /en-us/, /pt_BR/ … as the first path segment. Limited to common
+# language codes so sections like /hr/ or /ai/ are left alone.
+LANGUAGES = (
+    "ar|cs|da|de|el|en|es|fi|fr|he|hu|id|it|ja|ko|nb|nl|no|pl|pt|ro|ru|sv|th|tr|uk|vi|zh"
+)
+LOCALE_SEGMENT = re.compile(rf"^/(?:{LANGUAGES})(?:[-_][a-z]{{2}})?(?=/|$)", re.IGNORECASE)
+# Only unambiguous pagination: ?p= is a WordPress post id and /p/123 a
+# product or post, and start/offset often select different content.
+PAGINATION_SEGMENT = re.compile(r"/page/\d+/?$", re.IGNORECASE)
+PAGINATION_PARAMS = {"page", "paged", "pg"}
+TRACKING_PARAMS = re.compile(r"^(?:utm_\w+|gclid|fbclid|ref|lang|locale|hl)$", re.IGNORECASE)
+CLICK_PARAMS = re.compile(r"^(?:utm_\w+|gclid|fbclid)$", re.IGNORECASE)
+INDEX_FILE = re.compile(r"/index\.(?:html?|php|aspx?)$", re.IGNORECASE)
+
+_rng = random.Random(20240601)
+PERMUTATIONS: List[Tuple[int, int]] = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERM)
+]
+
+
+def url_variant_key(url: str) -> str:
+    # Collapses URLs that usually serve the same content: locale prefixes,
+    # pagination, index files and tracking/locale query parameters. Path case
+    # is kept since servers may treat /Foo and /foo as different pages.
+    parts = urlsplit(url)
+    path = LOCALE_SEGMENT.sub("", parts.path)
+    path = PAGINATION_SEGMENT.sub("", path)
+    path = INDEX_FILE.sub("", path).rstrip("/")
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query)
+            if key.lower() not in PAGINATION_PARAMS and not TRACKING_PARAMS.match(key)
+        )
+    )
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return urlunsplit(("", host, path, query, ""))
+
+
+def url_identity_key(url: str) -> str:
+    # Narrow key for links someone listed on purpose: only the fragment, a
+    # trailing slash and click-tracking parameters are ignored.
+    parts = urlsplit(url)
+    query = urlencode(
+        [
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not CLICK_PARAMS.match(key)
+        ]
+    )
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), query, "")
+    )
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> set:
+    words = WORD.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[index : index + size]) for index in range(len(words) - size + 1)}
+
+
+def minhash(text: str) -> Optional[List[int]]:
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "big")
+        for shingle in shingles(text)
+    ]
+    if not hashes:
+        return None
+    return [
+        min(((a * value + b) % MERSENNE_PRIME) & MAX_HASH for value in hashes)
+        for a, b in PERMUTATIONS
+    ]
+
+
+def similarity(left: List[int], right: List[int]) -> float:
+    # Estimated Jaccard similarity of the underlying shingle sets.
+    return sum(1 for a, b in zip(left, right) if a == b) / len(left)
+
+
+@dataclass
+class Duplicate:
+    url: str
+    duplicate_of: str
+    reason: str
+    similarity: float = 1.0
+
+
+class NearDuplicateFilter:
+    # Keeps the signature of every accepted page; a page whose estimated
+    # similarity to an accepted one reaches `threshold` is rejected.
+    def __init__(self, threshold: float = DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self.accepted: List[Tuple[str, List[int]]] = []
+
+    def check(self, url: str, signature: Optional[List[int]]) -> Optional[Duplicate]:
+        if signature is None:
+            return None
+        for accepted_url, accepted in self.accepted:
+            score = similarity(signature, accepted)
+            if score >= self.threshold:
+                return Duplicate(url, accepted_url, "near-duplicate", round(score, 3))
+        self.accepted.append((url, signature))
+        return None
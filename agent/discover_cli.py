@@ -3,16 +3,24 @@ from __future__ import annotations
 import argparse
 import json
 
-from agent.discovery import discover_category_urls
+from agent.discovery import DEFAULT_DISCOVERY_LIMIT, discover_category_urls
+from agent.discovery_manifest import save_manifest
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Discover site paths for auto-pull")
     parser.add_argument("--website", required=True, help="Company website base URL")
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=DEFAULT_DISCOVERY_LIMIT,
+        help="Top-ranked URLs to return per category (0 for all)",
+    )
     args = parser.parse_args()
 
-    result = discover_category_urls(args.website)
-    print(json.dumps(result))
+    categories = discover_category_urls(args.website, limit=args.limit or None)
+    manifest = save_manifest(args.website, categories)
+    print(json.dumps({"manifestId": manifest.manifest_id, "categories": categories}))
 
 
 if __name__ == "__main__":
@@ -1,13 +1,24 @@
 from __future__ import annotations
 
+import heapq
 import re
+import time
 import xml.etree.ElementTree as ET
+import zlib
 from collections import defaultdict
-from typing import Dict, Iterable, List
-from urllib.parse import urljoin, urlparse
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Pattern, Set, Tuple, TypeVar
+from urllib.parse import urljoin, urlparse, urlsplit
 
 import requests
-from bs4 import BeautifulSoup
+
+from agent import transport
+from agent.fetch_pool import DEFAULT_MAX_WORKERS, DEFAULT_PER_HOST, host_key, run_ordered
+from agent.html_text import extract_links
+from agent.tracing import span
+
+T = TypeVar("T")
 
 CATEGORIES: Dict[str, List[str]] = {
     "about": ["about", "company", "who-we-are", "our-story", "mission", "team"],
@@ -16,6 +27,21 @@ CATEGORIES: Dict[str, List[str]] = {
     "careers": ["careers", "jobs", "join", "work-with", "people"],
 }
 
+MAX_SITEMAP_URLS = 5000
+MAX_SITEMAP_DEPTH = 2
+MAX_CHILD_SITEMAPS = 5
+SITEMAP_MAX_BYTES = 10_000_000
+SITEMAP_FEED_CHUNK = 64 * 1024
+GZIP_MAGIC = b"\x1f\x8b"
+# The sitemaps.org schema, its Google predecessor, and unnamespaced files.
+SITEMAP_NAMESPACES = {
+    "",
+    "http://www.sitemaps.org/schemas/sitemap/0.9",
+    "http://www.google.com/schemas/sitemap/0.84",
+}
+RECENCY_HALF_LIFE_DAYS = 180
+DEFAULT_DISCOVERY_LIMIT = 25
+
 COMMON_PATHS: Dict[str, List[str]] = {
     "about": ["/about", "/company", "/about-us"],
     "blog": ["/blog", "/insights", "/news"],
@@ -33,82 +59,358 @@ def is_same_domain(base_url: str, url: str) -> bool:
 
 
 def normalize_url(url: str) -> str:
-    parsed = urlparse(url)
-    cleaned = parsed._replace(fragment="").geturl()
-    return cleaned.rstrip("/")
+    return url.split("#", 1)[0].rstrip("/")
+
+
+@dataclass
+class SitemapEntry:
+    url: str
+    lastmod: str = ""
+
 
+@dataclass
+class SitemapLimits:
+    max_urls: int = MAX_SITEMAP_URLS
+    max_depth: int = MAX_SITEMAP_DEPTH
+    max_children: int = MAX_CHILD_SITEMAPS
+    max_workers: int = DEFAULT_MAX_WORKERS
+    per_host: int = DEFAULT_PER_HOST
 
-def fetch_sitemap_urls(base_url: str) -> List[str]:
-    sitemap_url = urljoin(base_url, "/sitemap.xml")
+
+def time_left(stop_at: Optional[float]) -> Optional[float]:
+    if stop_at is None:
+        return None
+    return max(0.0, stop_at - time.monotonic())
+
+
+def run_until(call: Callable[[], T], url: str, stop_at: Optional[float]) -> Optional[T]:
+    # Runs one fetch on the pool so the caller stops waiting at `stop_at`;
+    # None when it did not finish (or raised) in time.
+    if time_left(stop_at) == 0:
+        return None
+    result = run_ordered([call], [host_key(url)], deadline=time_left(stop_at))[0]
+    return result.value if result.done and result.error is None else None
+
+
+def robots_sitemaps(base_url: str) -> List[str]:
     try:
-        response = requests.get(sitemap_url, timeout=10)
-        if not response.ok:
-            return []
-        content = response.text
+        response = transport.cached_fetch(urljoin(base_url, "/robots.txt"), timeout=10)
     except requests.RequestException:
         return []
+    if not response.ok:
+        return []
+    sitemaps = []
+    for line in response.text.splitlines():
+        key, _, value = line.partition(":")
+        if key.strip().lower() == "sitemap" and value.strip():
+            sitemaps.append(value.strip())
+    return sitemaps
+
 
-    urls: List[str] = []
+def fetch_sitemap_body(url: str) -> bytes:
+    try:
+        response = transport.cached_fetch(url, timeout=10, max_bytes=SITEMAP_MAX_BYTES)
+    except requests.RequestException:
+        return b""
+    if not response.ok:
+        return b""
+    content = response.content
+    if content[:2] == GZIP_MAGIC:
+        # sitemap.xml.gz is served as a gzip file, not with Content-Encoding.
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            content = inflater.decompress(content, SITEMAP_MAX_BYTES)
+        except zlib.error:
+            return b""
+    return content
+
+
+def split_tag(tag: str) -> Tuple[str, str]:
+    # "{namespace}local" -> (namespace, local)
+    if tag.startswith("{"):
+        namespace, _, local = tag[1:].partition("}")
+        return namespace, local
+    return "", tag
 
+
+def iter_sitemap(content: bytes) -> Iterator[Tuple[str, SitemapEntry]]:
+    # Yields ("url" | "sitemap", entry) pairs as elements close, clearing each
+    # one so large sitemaps never build a full tree in memory. Only <loc> and
+    # <lastmod> directly under <url>/<sitemap> count, so image:, video: and
+    # news: children never replace the page's own values.
+    parser = ET.XMLPullParser(events=("start", "end"))
+    depth = 0
+    loc = ""
+    lastmod = ""
     try:
-        root = ET.fromstring(content)
+        for start in range(0, len(content), SITEMAP_FEED_CHUNK):
+            parser.feed(content[start : start + SITEMAP_FEED_CHUNK])
+            for event, elem in parser.read_events():
+                if event == "start":
+                    depth += 1
+                    continue
+                namespace, tag = split_tag(elem.tag)
+                if namespace in SITEMAP_NAMESPACES:
+                    if depth == 3 and tag == "loc":
+                        loc = (elem.text or "").strip()
+                    elif depth == 3 and tag == "lastmod":
+                        lastmod = (elem.text or "").strip()
+                    elif depth == 2 and tag in {"url", "sitemap"}:
+                        if loc:
+                            yield tag, SitemapEntry(url=loc, lastmod=lastmod)
+                        loc = ""
+                        lastmod = ""
+                        elem.clear()
+                depth -= 1
     except ET.ParseError:
-        return []
+        # Truncated or malformed sitemaps keep whatever parsed cleanly.
+        return
+
 
-    namespace = re.match(r"\{.*\}", root.tag)
-    ns = namespace.group(0) if namespace else ""
+def fetch_sitemap_entries(
+    base_url: str,
+    limits: Optional[SitemapLimits] = None,
+    should_stop: Optional[Callable[[SitemapEntry], bool]] = None,
+    deadline: Optional[float] = None,
+) -> List[SitemapEntry]:
+    # `deadline` is seconds from now; sitemaps still loading when it passes
+    # are dropped and no further wave starts.
+    limits = limits or SitemapLimits()
+    stop_at = time.monotonic() + deadline if deadline is not None else None
+    entries: List[SitemapEntry] = []
+    seen: Set[str] = set()
+    visited: Set[str] = set()
 
-    if root.tag.endswith("sitemapindex"):
-        sitemap_nodes = root.findall(f"{ns}sitemap/{ns}loc")
-        for node in sitemap_nodes[:5]:
-            loc = node.text or ""
-            urls.extend(fetch_sitemap_urls(loc))
-        return urls
+    def collect(content: bytes) -> Tuple[List[str], bool]:
+        children: List[str] = []
+        for kind, entry in iter_sitemap(content):
+            if kind == "sitemap":
+                children.append(entry.url)
+                continue
+            if entry.url in seen:
+                continue
+            seen.add(entry.url)
+            entries.append(entry)
+            if len(entries) >= limits.max_urls:
+                return children, True
+            if should_stop is not None and should_stop(entry):
+                return children, True
+        return children, False
 
-    for loc in root.findall(f"{ns}url/{ns}loc"):
-        if loc.text:
-            urls.append(loc.text.strip())
-    return urls
+    robots = run_until(lambda: robots_sitemaps(base_url), base_url, stop_at)
+    if robots is None:
+        return entries
+    level = robots or [urljoin(base_url, "/sitemap.xml")]
+    level = level[: limits.max_children]
+    for _ in range(limits.max_depth + 1):
+        level = [url for url in level if url not in visited]
+        if not level or time_left(stop_at) == 0:
+            break
+        visited.update(level)
+        next_level: List[str] = []
+        # Fetch one wave of sitemaps concurrently, then parse in listed order
+        # so the collected URLs (and any early stop) are deterministic.
+        bodies = run_ordered(
+            [lambda url=url: fetch_sitemap_body(url) for url in level],
+            [host_key(url) for url in level],
+            max_workers=limits.max_workers,
+            per_key=limits.per_host,
+            deadline=time_left(stop_at),
+        )
+        for body in bodies:
+            if not body.ok or not body.value:
+                continue
+            children, stop = collect(body.value)
+            if stop:
+                return entries
+            next_level.extend(children)
+        level = next_level[: limits.max_children]
+    return entries
+
+
+def fetch_sitemap_urls(base_url: str, limits: Optional[SitemapLimits] = None) -> List[str]:
+    return [entry.url for entry in fetch_sitemap_entries(base_url, limits)]
 
 
 def fetch_homepage_links(base_url: str) -> List[str]:
     try:
-        response = requests.get(base_url, timeout=10)
+        response = transport.cached_fetch(base_url, timeout=10)
         response.raise_for_status()
     except requests.RequestException:
         return []
 
-    soup = BeautifulSoup(response.text, "html.parser")
-    links = []
-    for anchor in soup.find_all("a", href=True):
-        href = anchor.get("href")
-        if not href:
-            continue
-        full = urljoin(base_url, href)
-        links.append(full)
-    return links
+    return extract_links(response.text, base_url)
 
 
-def categorize_urls(base_url: str, urls: Iterable[str]) -> Dict[str, List[str]]:
-    buckets: Dict[str, List[str]] = defaultdict(list)
-    for url in urls:
-        if not is_same_domain(base_url, url):
-            continue
+def keyword_forms(keyword: str) -> List[str]:
+    # Spellings a keyword shows up as inside one path segment: plurals
+    # ("companies"), unhyphenated ("ourstory") and "-us" compounds written
+    # as one word ("aboutus", "joinus").
+    forms: List[str] = []
+    for base in dict.fromkeys([keyword, keyword.replace("-", "")]):
+        forms.extend([base, base + "s", base + "us"])
+        if base.endswith("y"):
+            forms.append(base[:-1] + "ies")
+    return forms
+
+
+def compile_category_matcher(
+    categories: Dict[str, List[str]],
+) -> Tuple[Pattern[str], Dict[str, List[str]]]:
+    form_categories: Dict[str, List[str]] = defaultdict(list)
+    for category, keywords in categories.items():
+        for keyword in keywords:
+            for form in keyword_forms(keyword):
+                if category not in form_categories[form]:
+                    form_categories[form].append(category)
+    # One alternation over every form, longest first, anchored to path
+    # segment/word boundaries ("/about-us" and "/aboutus.html" match,
+    # "/roundabout" does not).
+    alternation = "|".join(
+        re.escape(form) for form in sorted(form_categories, key=len, reverse=True)
+    )
+    pattern = re.compile(rf"(?<![a-z0-9])({alternation})(?![a-z0-9])")
+    return pattern, dict(form_categories)
+
+
+CATEGORY_PATTERN, KEYWORD_CATEGORIES = compile_category_matcher(CATEGORIES)
+
+
+def path_categories(path: str) -> List[str]:
+    matched: Dict[str, None] = {}
+    for match in CATEGORY_PATTERN.finditer(path.lower()):
+        for category in KEYWORD_CATEGORIES[match.group(1)]:
+            matched[category] = None
+    return list(matched)
+
+
+def url_categories(base_url: str, url: str) -> List[str]:
+    if not is_same_domain(base_url, url):
+        return []
+    return path_categories(urlsplit(normalize_url(url)).path)
+
+
+def lastmod_age_days(lastmod: str) -> Optional[float]:
+    if not lastmod:
+        return None
+    try:
+        modified = datetime.fromisoformat(lastmod[:10])
+    except ValueError:
+        return None
+    return max(0.0, (datetime.now() - modified).total_seconds() / 86400)
+
+
+def score_url(path: str, lastmod: str = "") -> float:
+    # Shallow pages rank first; recency (half-life RECENCY_HALF_LIFE_DAYS)
+    # breaks ties within a depth.
+    depth = len([segment for segment in path.split("/") if segment])
+    age = lastmod_age_days(lastmod)
+    recency = 0.0 if age is None else 0.5 ** (age / RECENCY_HALF_LIFE_DAYS)
+    return recency - depth
+
+
+def categorize_urls(
+    base_url: str,
+    urls: Iterable[str],
+    lastmods: Optional[Dict[str, str]] = None,
+    limit: Optional[int] = None,
+) -> Dict[str, List[str]]:
+    lastmods = lastmods or {}
+    base_netloc = urlsplit(base_url).netloc
+    ranked: Dict[str, List[Tuple[float, int, str]]] = defaultdict(list)
+    seen: Set[str] = set()
+    for order, url in enumerate(urls):
         cleaned = normalize_url(url)
-        path = urlparse(cleaned).path.lower()
-        for category, keywords in CATEGORIES.items():
-            if any(keyword in path for keyword in keywords):
-                if cleaned not in buckets[category]:
-                    buckets[category].append(cleaned)
+        if cleaned in seen:
+            continue
+        seen.add(cleaned)
+        parts = urlsplit(cleaned)
+        if parts.netloc and not parts.netloc.endswith(base_netloc):
+            continue
+        categories = path_categories(parts.path)
+        if not categories:
+            continue
+        item = (score_url(parts.path, lastmods.get(url, "")), -order, cleaned)
+        for category in categories:
+            heap = ranked[category]
+            if limit is None:
+                heap.append(item)
+            elif len(heap) < limit:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+    buckets: Dict[str, List[str]] = defaultdict(list)
+    for category, items in ranked.items():
+        buckets[category] = [url for _, _, url in sorted(items, reverse=True)]
     return buckets
 
 
-def discover_category_urls(base_url: str) -> Dict[str, List[str]]:
-    urls: List[str] = []
-    urls.extend(fetch_sitemap_urls(base_url))
-    urls.extend(fetch_homepage_links(base_url))
+class BucketTracker:
+    # Counts usable URLs per requested category while sitemaps stream in, so
+    # discovery can stop as soon as every bucket has enough candidates.
+    def __init__(
+        self,
+        base_url: str,
+        categories: Iterable[str],
+        per_category: int,
+        exclude_patterns: Iterable[str] = (),
+    ):
+        self.base_url = base_url
+        self.per_category = per_category
+        self.excludes = list(exclude_patterns)
+        self.found: Dict[str, Set[str]] = {category: set() for category in categories}
+
+    def add(self, url: str) -> None:
+        if not filter_urls([url], self.excludes):
+            return
+        cleaned = normalize_url(url)
+        for category in url_categories(self.base_url, url):
+            if category in self.found:
+                self.found[category].add(cleaned)
+
+    @property
+    def full(self) -> bool:
+        return all(len(urls) >= self.per_category for urls in self.found.values())
+
+    def should_stop(self, entry: SitemapEntry) -> bool:
+        self.add(entry.url)
+        return self.full
+
+
+def discover_category_urls(
+    base_url: str,
+    categories: Optional[Iterable[str]] = None,
+    per_category: Optional[int] = None,
+    exclude_patterns: Iterable[str] = (),
+    limit: Optional[int] = None,
+    deadline: Optional[float] = None,
+) -> Dict[str, List[str]]:
+    # `deadline` (seconds from now) bounds the sitemap crawl; the homepage is
+    # skipped once it has passed.
+    stop_at = time.monotonic() + deadline if deadline is not None else None
+    tracker = None
+    if categories and per_category:
+        tracker = BucketTracker(base_url, categories, per_category, exclude_patterns)
+
+    with span("discovery", website=base_url) as current:
+        entries = fetch_sitemap_entries(
+            base_url,
+            should_stop=tracker.should_stop if tracker else None,
+            deadline=time_left(stop_at),
+        )
+        urls = [entry.url for entry in entries]
+        lastmods = {entry.url: entry.lastmod for entry in entries if entry.lastmod}
+        homepage = (tracker is None or not tracker.full) and time_left(stop_at) != 0
+        if homepage:
+            urls.extend(run_until(lambda: fetch_homepage_links(base_url), base_url, stop_at) or [])
 
-    buckets = categorize_urls(base_url, urls)
+        buckets = categorize_urls(base_url, urls, lastmods=lastmods, limit=limit)
+        current.set(
+            sitemapUrls=len(entries),
+            homepage=homepage,
+            categorized=sum(len(bucket) for bucket in buckets.values()),
+        )
 
     # # add common paths if missing [bad idea]
     # for category, paths in COMMON_PATHS.items():
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+from agent.cache import get_cache
+
+DISCOVERY_TTL = 24 * 3600.0
+MANIFEST_ID = re.compile(r"^[0-9a-f]{20}$")
+
+
+@dataclass
+class DiscoveryManifest:
+    # Output of one site discovery, shared by the discover route and the
+    # page-creation run so the site is crawled once per page.
+    website: str
+    categories: Dict[str, List[str]]
+    created_at: float
+
+    @property
+    def manifest_id(self) -> str:
+        material = json.dumps(
+            {"website": site_root(self.website), "categories": self.categories},
+            sort_keys=True,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()[:20]
+
+    def matches(self, website: str) -> bool:
+        return site_root(self.website) == site_root(website)
+
+
+def site_root(url: str) -> str:
+    url = url.strip().lower().rstrip("/")
+    url = re.sub(r"^https?://", "", url)
+    return url[4:] if url.startswith("www.") else url
+
+
+def discovery_ttl() -> float:
+    return float(os.getenv("AGENT_DISCOVERY_TTL", DISCOVERY_TTL))
+
+
+def save_manifest(website: str, categories: Dict[str, List[str]]) -> DiscoveryManifest:
+    manifest = DiscoveryManifest(website=website, categories=categories, created_at=time.time())
+    get_cache("discovery", max_mb=20).set(
+        manifest.manifest_id,
+        json.dumps(asdict(manifest)).encode("utf-8"),
+        ttl=discovery_ttl(),
+    )
+    return manifest
+
+
+def load_manifest(manifest_id: str) -> Optional[DiscoveryManifest]:
+    if not MANIFEST_ID.match(manifest_id or ""):
+        return None
+    entry = get_cache("discovery", max_mb=20).get(manifest_id)
+    if entry is None:
+        return None
+    try:
+        return DiscoveryManifest(**json.loads(entry.value))
+    except (TypeError, ValueError):
+        return None
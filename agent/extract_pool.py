@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import time
+from dataclasses import dataclass
+from multiprocessing.connection import wait
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from agent.ingest import (
+    extract_text_from_path,
+    extraction_key,
+    is_heavy_document,
+    iter_document_chunks,
+    lookup_extracted,
+    store_extracted,
+)
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MEMORY_MB = 1024
+POLL_INTERVAL = 0.05
+
+
+@dataclass
+class ExtractLimits:
+    # Seconds a single document may spend extracting before it is stopped.
+    timeout: float = DEFAULT_TIMEOUT
+    # Address-space cap for each extraction process (POSIX only).
+    memory_mb: int = DEFAULT_MEMORY_MB
+    processes: int = os.cpu_count() or 2
+
+
+@dataclass
+class ExtractResult:
+    path: str
+    text: str = ""
+    complete: bool = False
+    error: Optional[str] = None
+    # Stopped by the per-file timeout or the ingest deadline; `text` holds
+    # whatever was extracted first (possibly nothing).
+    timed_out: bool = False
+
+
+def limit_memory(memory_mb: int) -> None:
+    try:
+        import resource
+    except ImportError:
+        return
+    limit = memory_mb * 1024 * 1024
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ValueError, OSError):
+        pass
+
+
+def extract_worker(
+    path: str,
+    max_chars: Optional[int],
+    memory_mb: int,
+    conn: Any,
+) -> None:
+    # Runs in a child process and streams chunks back so the parent keeps
+    # whatever was extracted if this process has to be killed.
+    limit_memory(memory_mb)
+    total = 0
+    try:
+        for chunk in iter_document_chunks(path, max_chars):
+            conn.send(("chunk", chunk))
+            total += len(chunk) + 1
+            if max_chars is not None and total >= max_chars:
+                break
+        conn.send(("done", None))
+    except MemoryError:
+        conn.send(("partial", "memory limit exceeded"))
+    except Exception as exc:
+        conn.send(("error", f"{type(exc).__name__}: {exc}"))
+    finally:
+        conn.close()
+
+
+def get_context() -> Any:
+    # Forking a process that already runs fetch threads is unsafe; forkserver
+    # keeps child start-up cheap without inheriting those threads.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(["agent.extract_pool"])
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+@dataclass
+class Running:
+    index: int
+    process: Any
+    conn: Any
+    started: float
+
+
+def run_in_processes(
+    jobs: Sequence[Tuple[int, str]],
+    max_chars: Optional[int],
+    limits: ExtractLimits,
+    stop_at: Optional[float] = None,
+) -> Dict[int, ExtractResult]:
+    # `stop_at` (time.monotonic()) ends the whole run: running jobs keep
+    # their partial text and jobs not yet started come back empty.
+    ctx = get_context()
+    results = {index: ExtractResult(path=path) for index, path in jobs}
+    chunks: Dict[int, List[str]] = {index: [] for index, _ in jobs}
+    waiting = list(jobs)
+    running: Dict[Any, Running] = {}
+
+    def stop(job: Running) -> None:
+        if job.process.is_alive():
+            job.process.terminate()
+        job.process.join(timeout=1)
+        job.conn.close()
+        del running[job.conn]
+
+    try:
+        while waiting or running:
+            if stop_at is not None and time.monotonic() >= stop_at:
+                for job in list(running.values()):
+                    results[job.index].timed_out = True
+                    stop(job)
+                for index, _ in waiting:
+                    results[index].timed_out = True
+                break
+            while waiting and len(running) < max(1, limits.processes):
+                index, path = waiting.pop(0)
+                reader, writer = ctx.Pipe(duplex=False)
+                process = ctx.Process(
+                    target=extract_worker,
+                    args=(path, max_chars, limits.memory_mb, writer),
+                    daemon=True,
+                )
+                process.start()
+                writer.close()
+                running[reader] = Running(index, process, reader, time.monotonic())
+
+            for conn in wait(list(running), timeout=POLL_INTERVAL):
+                job = running[conn]
+                try:
+                    kind, data = conn.recv()
+                except (EOFError, OSError):
+                    # Exited without a final message (e.g. killed by the OS);
+                    # keep whatever text arrived.
+                    stop(job)
+                    continue
+                if kind == "chunk":
+                    chunks[job.index].append(data)
+                    continue
+                results[job.index].complete = kind == "done"
+                if kind == "error":
+                    results[job.index].error = data
+                stop(job)
+
+            now = time.monotonic()
+            for job in list(running.values()):
+                if now - job.started > limits.timeout:
+                    results[job.index].timed_out = True
+                    stop(job)
+    finally:
+        for job in list(running.values()):
+            stop(job)
+
+    for index, result in results.items():
+        result.text = "\n".join(chunks[index])
+    return results
+
+
+def extract_documents(
+    paths: Sequence[str],
+    max_chars: Optional[int] = None,
+    limits: Optional[ExtractLimits] = None,
+    deadline: Optional[float] = None,
+) -> List[ExtractResult]:
+    # `deadline` is seconds from now for all documents together.
+    limits = limits or ExtractLimits()
+    stop_at = time.monotonic() + deadline if deadline is not None else None
+    results: List[Optional[ExtractResult]] = [None] * len(paths)
+    keys: Dict[int, Optional[str]] = {}
+    jobs: List[Tuple[int, str]] = []
+
+    for index, path in enumerate(paths):
+        if not is_heavy_document(path):
+            text = extract_text_from_path(path, max_chars)
+            results[index] = ExtractResult(path=path, text=text, complete=True)
+            continue
+        keys[index] = extraction_key(path)
+        cached = lookup_extracted(keys[index], max_chars)
+        if cached is not None:
+            results[index] = ExtractResult(path=path, text=cached, complete=True)
+            continue
+        jobs.append((index, path))
+
+    if jobs:
+        for index, result in run_in_processes(jobs, max_chars, limits, stop_at).items():
+            if result.complete:
+                store_extracted(keys[index], result.text, max_chars)
+            results[index] = result
+
+    return [result for result in results if result is not None]
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generic, List, Optional, Sequence, TypeVar
+from urllib.parse import urlparse
+
+T = TypeVar("T")
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_PER_HOST = 2
+
+
+@dataclass
+class TaskResult(Generic[T]):
+    value: Optional[T] = None
+    error: Optional[BaseException] = None
+    done: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.done and self.error is None
+
+
+def host_key(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+def run_ordered(
+    calls: Sequence[Callable[[], T]],
+    keys: Optional[Sequence[str]] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    per_key: int = DEFAULT_PER_HOST,
+    deadline: Optional[float] = None,
+) -> List[TaskResult[T]]:
+    # Results come back in input order. At most `per_key` calls sharing a key
+    # (usually a host) run at once; calls still pending when `deadline`
+    # seconds have elapsed are left with done=False.
+    results: List[TaskResult[T]] = [TaskResult() for _ in calls]
+    if not calls:
+        return results
+
+    keys = list(keys) if keys is not None else [""] * len(calls)
+    limits: Dict[str, threading.Semaphore] = {
+        key: threading.Semaphore(max(1, per_key)) for key in set(keys)
+    }
+    stop_at = time.monotonic() + deadline if deadline is not None else None
+
+    def invoke(index: int) -> None:
+        with limits[keys[index]]:
+            if stop_at is not None and time.monotonic() >= stop_at:
+                return
+            try:
+                results[index].value = calls[index]()
+            except Exception as exc:
+                results[index].error = exc
+            results[index].done = True
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(calls))))
+    try:
+        # Each call runs in a copy of the caller's context so per-run tracing
+        # and token usage follow it into the pool threads.
+        pending: Any = {
+            executor.submit(contextvars.copy_context().run, invoke, index)
+            for index in range(len(calls))
+        }
+        while pending:
+            timeout = None
+            if stop_at is not None:
+                timeout = stop_at - time.monotonic()
+                if timeout <= 0:
+                    break
+            _, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+    finally:
+        # Do not block on stragglers past the deadline; their results are dropped.
+        executor.shutdown(wait=False, cancel_futures=True)
+    return [TaskResult(r.value, r.error, r.done) for r in results]
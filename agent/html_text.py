@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin
+
+# Elements whose contents never carry page copy.
+SKIP_TAGS = {
+    "script",
+    "style",
+    "noscript",
+    "template",
+    "svg",
+    "canvas",
+    "iframe",
+    "nav",
+    "footer",
+    "button",
+    "select",
+}
+SKIP_ROLES = {"navigation", "banner", "contentinfo", "dialog", "alertdialog"}
+# Whole id/class tokens that mark overlays and chrome. Substrings are not
+# enough: state classes like "has-cookie-banner" or "modal-open" sit on
+# <body> or page wrappers and would hide the whole page.
+BOILERPLATE_TOKENS = {
+    "cookie",
+    "cookies",
+    "cookie-banner",
+    "cookie-bar",
+    "cookie-consent",
+    "cookie-notice",
+    "consent",
+    "consent-banner",
+    "gdpr",
+    "newsletter",
+    "newsletter-signup",
+    "popup",
+    "modal",
+    "skip-link",
+    "breadcrumb",
+    "breadcrumbs",
+}
+MAIN_TAGS = {"main", "article"}
+# Never skipped by id/class markers, whatever their tokens.
+STRUCTURAL_TAGS = {"html", "body", *MAIN_TAGS}
+VOID_TAGS = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "link",
+    "meta",
+    "source",
+    "track",
+    "wbr",
+}
+# Main-content text shorter than this is treated as a layout wrapper and
+# the whole-page text is used instead.
+MIN_MAIN_CHARS = 200
+FEED_CHUNK = 32 * 1024
+
+
+@dataclass
+class ExtractedPage:
+    text: str
+    links: List[str] = field(default_factory=list)
+
+
+class PageTextParser(HTMLParser):
+    def __init__(self, max_chars: Optional[int], collect_links: bool, base_url: str):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.collect_links = collect_links
+        self.base_url = base_url
+        self.links: List[str] = []
+        self.page_parts: List[str] = []
+        self.page_len = 0
+        self.main_parts: List[str] = []
+        self.main_len = 0
+        self.main_seen = False
+        self.main_depth = 0
+        self.skip_tag: Optional[str] = None
+        self.skip_depth = 0
+        self.done = False
+
+    def should_skip(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> bool:
+        if tag in SKIP_TAGS:
+            return True
+        values = dict(attrs)
+        if (values.get("role") or "").lower() in SKIP_ROLES:
+            return True
+        if (values.get("aria-hidden") or "").lower() == "true":
+            return True
+        if "hidden" in values:
+            return True
+        if tag in STRUCTURAL_TAGS:
+            return False
+        tokens = f"{values.get('id') or ''} {values.get('class') or ''}".lower().split()
+        return not BOILERPLATE_TOKENS.isdisjoint(tokens)
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if self.collect_links and tag == "a":
+            for name, value in attrs:
+                if name == "href" and value:
+                    self.links.append(urljoin(self.base_url, value.strip()))
+        if tag in VOID_TAGS:
+            return
+        if self.skip_tag is not None:
+            if tag == self.skip_tag:
+                self.skip_depth += 1
+            return
+        if self.should_skip(tag, attrs):
+            self.skip_tag = tag
+            self.skip_depth = 1
+            return
+        if tag in MAIN_TAGS:
+            self.main_depth += 1
+            self.main_seen = True
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if self.collect_links and tag == "a":
+            self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag: str) -> None:
+        if self.skip_tag is not None:
+            if tag == self.skip_tag:
+                self.skip_depth -= 1
+                if self.skip_depth <= 0:
+                    self.skip_tag = None
+            return
+        if tag in MAIN_TAGS and self.main_depth > 0:
+            self.main_depth -= 1
+
+    def handle_data(self, data: str) -> None:
+        if self.skip_tag is not None or self.budget_reached():
+            return
+        words = data.split()
+        if not words:
+            return
+        chunk = " ".join(words)
+        self.page_parts.append(chunk)
+        self.page_len += len(chunk) + 1
+        if self.main_depth > 0:
+            self.main_parts.append(chunk)
+            self.main_len += len(chunk) + 1
+        if self.budget_reached() and not self.collect_links:
+            self.done = True
+
+    def budget_reached(self) -> bool:
+        if self.max_chars is None:
+            return False
+        if self.main_seen:
+            return self.main_len >= self.max_chars
+        return self.page_len >= self.max_chars
+
+    def result(self) -> ExtractedPage:
+        if self.main_seen and self.main_len >= MIN_MAIN_CHARS:
+            parts = self.main_parts
+        else:
+            parts = self.page_parts
+        text = " ".join(parts)
+        if self.max_chars is not None:
+            text = text[: self.max_chars]
+        return ExtractedPage(text=text, links=self.links)
+
+
+def extract_page(
+    html: str,
+    max_chars: Optional[int] = None,
+    collect_links: bool = False,
+    base_url: str = "",
+) -> ExtractedPage:
+    # Single streaming pass: no tree is built, boilerplate subtrees are
+    # skipped as they open, and text collection stops once the budget is met.
+    parser = PageTextParser(max_chars, collect_links, base_url)
+    for start in range(0, len(html), FEED_CHUNK):
+        parser.feed(html[start : start + FEED_CHUNK])
+        if parser.done:
+            break
+    else:
+        parser.close()
+    return parser.result()
+
+
+def html_to_text(html: str, max_chars: Optional[int] = None) -> str:
+    return extract_page(html, max_chars=max_chars).text
+
+
+def extract_links(html: str, base_url: str) -> List[str]:
+    return extract_page(html, max_chars=0, collect_links=True, base_url=base_url).links
@@ -1,59 +1,152 @@
 from __future__ import annotations
 
+import contextvars
+import hashlib
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Iterable, List, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 import requests
-from bs4 import BeautifulSoup
 
-from agent.discovery import discover_category_urls, filter_urls
+from agent import transport
+from agent.cache import cache_enabled, get_cache
+from agent.dedup import (
+    Duplicate,
+    NearDuplicateFilter,
+    minhash,
+    url_identity_key,
+    url_variant_key,
+)
+from agent.discovery import discover_category_urls, filter_urls, normalize_url
+from agent.fetch_pool import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_PER_HOST,
+    host_key,
+    run_ordered,
+)
+from agent.html_text import html_to_text
+from agent.report import RunReport
+from agent.tracing import span
 
+if TYPE_CHECKING:
+    from agent.extract_pool import ExtractLimits
 
-def read_text_file(path: str) -> str:
+
+# Bump when extraction output changes so cached text is not reused.
+EXTRACTOR_VERSION = "1"
+EXTRACT_CACHE_TTL = 30 * 24 * 3600
+CACHED_EXTENSIONS = {".pdf", ".docx"}
+
+
+def read_text_file(path: str, max_chars: Optional[int] = None) -> str:
     with open(path, "r", encoding="utf-8", errors="ignore") as handle:
-        return handle.read()
+        return handle.read() if max_chars is None else handle.read(max_chars)
 
 
-def read_pdf(path: str) -> str:
+def iter_pdf_pages(path: str) -> Iterator[str]:
     from pypdf import PdfReader
 
     reader = PdfReader(path)
-    pages = []
     for page in reader.pages:
-        text = page.extract_text() or ""
-        pages.append(text)
-    return "\n".join(pages)
+        yield page.extract_text() or ""
 
 
-def read_docx(path: str) -> str:
+def iter_docx_paragraphs(path: str) -> Iterator[str]:
     import docx
 
     doc = docx.Document(path)
-    return "\n".join(p.text for p in doc.paragraphs if p.text)
+    for paragraph in doc.paragraphs:
+        if paragraph.text:
+            yield paragraph.text
 
 
-def extract_text_from_path(path: str) -> str:
+def iter_document_chunks(path: str, max_chars: Optional[int] = None) -> Iterator[str]:
     ext = os.path.splitext(path)[1].lower()
-    if ext in {".txt", ".md"}:
-        return read_text_file(path)
     if ext == ".pdf":
-        return read_pdf(path)
+        return iter_pdf_pages(path)
     if ext == ".docx":
-        return read_docx(path)
-    return read_text_file(path)
+        return iter_docx_paragraphs(path)
+    return iter([read_text_file(path, max_chars)])
 
 
-def fetch_url_text(url: str, timeout: int = 15) -> str:
-    response = requests.get(url, timeout=timeout)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.text, "html.parser")
-    for tag in soup(["script", "style", "noscript"]):
-        tag.decompose()
-    text = " ".join(soup.get_text(separator=" ").split())
+def join_chunks(chunks: Iterable[str], max_chars: Optional[int] = None) -> str:
+    collected = []
+    total = 0
+    for chunk in chunks:
+        collected.append(chunk)
+        total += len(chunk) + 1
+        if max_chars is not None and total >= max_chars:
+            break
+    return "\n".join(collected)
+
+
+def read_pdf(path: str, max_chars: Optional[int] = None) -> str:
+    return join_chunks(iter_pdf_pages(path), max_chars)
+
+
+def read_docx(path: str, max_chars: Optional[int] = None) -> str:
+    return join_chunks(iter_docx_paragraphs(path), max_chars)
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def is_heavy_document(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in CACHED_EXTENSIONS
+
+
+def extraction_key(path: str) -> Optional[str]:
+    if not is_heavy_document(path) or not cache_enabled("extract"):
+        return None
+    # Keyed by file bytes, so re-uploads under a new temp path still hit.
+    ext = os.path.splitext(path)[1].lower()
+    return f"{file_digest(path)}:{ext}:{EXTRACTOR_VERSION}"
+
+
+def lookup_extracted(key: Optional[str], max_chars: Optional[int] = None) -> Optional[str]:
+    if key is None:
+        return None
+    entry = get_cache("extract").get(key)
+    if entry is None:
+        return None
+    text = entry.value.decode("utf-8")
+    if entry.meta.get("complete") or (max_chars is not None and len(text) >= max_chars):
+        return text
+    return None
+
+
+def store_extracted(key: Optional[str], text: str, max_chars: Optional[int] = None) -> None:
+    if key is None:
+        return
+    complete = max_chars is None or len(text) < max_chars
+    get_cache("extract").set(
+        key, text.encode("utf-8"), ttl=EXTRACT_CACHE_TTL, meta={"complete": complete}
+    )
+
+
+def extract_text_from_path(path: str, max_chars: Optional[int] = None) -> str:
+    key = extraction_key(path)
+    cached = lookup_extracted(key, max_chars)
+    if cached is not None:
+        return cached
+    text = join_chunks(iter_document_chunks(path, max_chars), max_chars)
+    store_extracted(key, text, max_chars)
     return text
 
 
+def fetch_url_text(url: str, timeout: int = 15, max_chars: Optional[int] = None) -> str:
+    response = transport.cached_fetch(url, timeout=timeout)
+    response.raise_for_status()
+    return html_to_text(response.text, max_chars=max_chars)
+
+
 @dataclass
 class Source:
     source_id: str
@@ -61,42 +154,176 @@ class Source:
     content: str
 
 
-def gather_sources(files: Iterable[str], links: Iterable[str]) -> List[Source]:
-    sources: List[Source] = []
-    for file_path in files:
-        content = extract_text_from_path(file_path)
-        sources.append(Source(source_id=file_path, source_type="file", content=content))
+@dataclass
+class FetchLimits:
+    max_workers: int = DEFAULT_MAX_WORKERS
+    per_host: int = DEFAULT_PER_HOST
+    # Wall-clock budget in seconds for the whole ingestion stage.
+    deadline: Optional[float] = None
+
+    def remaining(self, started: float) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - (time.monotonic() - started))
+
+
+def unique_links(links: Iterable[str]) -> List[str]:
+    # Drops repeats that differ only by fragment, trailing slash or click
+    # tracking parameters, keeping the first spelling. Explicit links are
+    # never collapsed by locale or pagination like auto-pulled pages are.
+    seen: Set[str] = set()
+    unique: List[str] = []
+    for link in links:
+        key = url_identity_key(link)
+        if key not in seen:
+            seen.add(key)
+            unique.append(link)
+    return unique
+
+
+def gather_sources(
+    files: Iterable[str],
+    links: Iterable[str],
+    limits: Optional[FetchLimits] = None,
+    max_chars: Optional[int] = None,
+    extract_limits: Optional[ExtractLimits] = None,
+    report: Optional[RunReport] = None,
+) -> List[Source]:
+    from agent.extract_pool import extract_documents
+
+    limits = limits or FetchLimits()
+    files = list(files)
+    links = unique_links(links)
+
+    calls: List[Callable[[], Any]] = []
+    keys: List[str] = []
     for link in links:
-        content = fetch_url_text(link)
-        sources.append(Source(source_id=link, source_type="link", content=content))
+        calls.append(lambda url=link: fetch_url_text(url, max_chars=max_chars))
+        keys.append(host_key(link))
+
+    # Link fetches run on a helper thread while documents are parsed here in
+    # their own process pool, so parsing overlaps network waits. Extraction
+    # honours the deadline itself and keeps partial text from files it stops.
+    with ThreadPoolExecutor(max_workers=1) as helper:
+        fetches = helper.submit(
+            contextvars.copy_context().run,
+            run_ordered,
+            calls,
+            keys,
+            max_workers=limits.max_workers,
+            per_key=limits.per_host,
+            deadline=limits.deadline,
+        )
+        with span("extract", files=len(files)) as current:
+            documents = extract_documents(files, max_chars, extract_limits, deadline=limits.deadline)
+            timed_out = [item.path for item in documents if item.timed_out]
+            current.set(chars=sum(len(item.text or "") for item in documents))
+            if timed_out:
+                current.set(timedOut=timed_out)
+        link_results = fetches.result()
+
+    if report is not None:
+        report.incomplete_documents.extend(timed_out)
+    sources: List[Source] = []
+    for extracted in documents:
+        if extracted.error is not None:
+            raise ValueError(f"Failed to extract {extracted.path}: {extracted.error}")
+        if extracted.timed_out and not extracted.text:
+            continue
+        sources.append(Source(source_id=extracted.path, source_type="file", content=extracted.text))
+    for link, result in zip(links, link_results):
+        if result.error is not None:
+            raise result.error
+        if not result.done:
+            continue
+        sources.append(Source(source_id=link, source_type="link", content=result.value or ""))
     return sources
 
 
+def fetch_page_signature(url: str, max_chars: Optional[int]) -> Tuple[str, Optional[List[int]]]:
+    # Signatures are computed in the fetch workers, overlapping network waits.
+    text = fetch_url_text(url, max_chars=max_chars)
+    return text, minhash(text)
+
+
 def auto_pull_sources(
     base_url: str,
     include_categories: List[str],
     exclude_patterns: List[str],
     max_per_category: int = 3,
+    limits: Optional[FetchLimits] = None,
+    max_chars: Optional[int] = None,
+    report: Optional[RunReport] = None,
+    buckets: Optional[Dict[str, List[str]]] = None,
+    skip_urls: Iterable[str] = (),
 ) -> List[Source]:
+    # `buckets` comes from a saved discovery manifest and skips the crawl;
+    # `skip_urls` are fetched elsewhere (explicit links) and not pulled again.
     if not base_url:
         return []
-    buckets = discover_category_urls(base_url)
-    sources: List[Source] = []
+    limits = limits or FetchLimits()
+    started = time.monotonic()
+    if buckets is None:
+        buckets = discover_category_urls(
+            base_url,
+            categories=include_categories,
+            per_category=max_per_category,
+            exclude_patterns=exclude_patterns,
+            deadline=limits.deadline,
+        )
+
+    # Locale variants, paginated indexes and tracking-parameter copies of a
+    # URL already queued are never fetched.
+    duplicates: List[Duplicate] = []
+    variants: Dict[str, str] = {
+        url_variant_key(normalize_url(url)): url for url in skip_urls
+    }
+    targets: List[tuple[str, str]] = []
     for category in include_categories:
         urls = buckets.get(category, [])
         urls = filter_urls(urls, exclude_patterns)[:max_per_category]
         for url in urls:
-            try:
-                content = fetch_url_text(url)
-            except requests.RequestException:
+            key = url_variant_key(normalize_url(url))
+            if key in variants:
+                duplicates.append(Duplicate(url, variants[key], "url-variant"))
                 continue
-            sources.append(
-                Source(
-                    source_id=url,
-                    source_type=f"auto:{category}",
-                    content=content,
-                )
+            variants[key] = url
+            targets.append((category, url))
+
+    with span("auto_pull", targets=len(targets)):
+        results = run_ordered(
+            [lambda url=url: fetch_page_signature(url, max_chars) for _, url in targets],
+            [host_key(url) for _, url in targets],
+            max_workers=limits.max_workers,
+            per_key=limits.per_host,
+            deadline=limits.remaining(started),
+        )
+
+    # Near-duplicate pages (/news vs /press copies, syndicated posts) are
+    # dropped in input order so the kept page does not depend on timing.
+    near_duplicates = NearDuplicateFilter()
+    sources: List[Source] = []
+    for (category, url), result in zip(targets, results):
+        if result.error is not None and not isinstance(
+            result.error, requests.RequestException
+        ):
+            raise result.error
+        if not result.ok:
+            continue
+        text, signature = result.value
+        duplicate = near_duplicates.check(url, signature)
+        if duplicate is not None:
+            duplicates.append(duplicate)
+            continue
+        sources.append(
+            Source(
+                source_id=url,
+                source_type=f"auto:{category}",
+                content=text or "",
             )
+        )
+    if report is not None:
+        report.duplicates.extend(duplicates)
     return sources
 
 
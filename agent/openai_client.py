@@ -1,10 +1,27 @@
 from __future__ import annotations
 
+import copy
+import hashlib
 import json
-from typing import Any
+import os
+import re
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
 
 from openai import OpenAI
 
+from agent.tracing import span, usage_attrs
+from agent.usage import TokenUsage, record_usage
+
+if TYPE_CHECKING:
+    from agent.cache import DiskCache
+    from agent.ratelimit import RateLimiter
+
+DEFAULT_LLM_CACHE_TTL = 7 * 24 * 3600.0
+# Bump when prompt rendering or output handling changes in a way that makes
+# old cached generations unsuitable.
+LLM_CACHE_VERSION = "1"
+
 
 def extract_text(response: Any) -> str:
     text_chunks = []
@@ -40,34 +57,193 @@ def parse_json(text: str) -> dict:
         raise
 
 
+def llm_cache_ttl() -> float:
+    return float(os.getenv("AGENT_LLM_CACHE_TTL", DEFAULT_LLM_CACHE_TTL))
+
+
+def normalize_prompt(text: str) -> str:
+    # Whitespace-only differences (CRLF, trailing spaces, blank-line runs,
+    # template indentation) must not change the cache key.
+    lines = [line.rstrip() for line in text.replace("\r\n", "\n").strip().split("\n")]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+
 class OpenAIClient:
-    def __init__(self, api_key: str, model: str, temperature: float, max_output_tokens: int):
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        temperature: float,
+        max_output_tokens: int,
+        cache: Optional["DiskCache"] = None,
+        limiter: Optional["RateLimiter"] = None,
+    ):
         self.client = OpenAI(api_key=api_key)
         self.model = model
         self.temperature = temperature
         self.max_output_tokens = max_output_tokens
+        self.cache = cache
+        # Acquired once per API request (cache hits are free), so a limit in
+        # requests per minute holds however many calls a page takes.
+        self.limiter = limiter
+        # Lifetime totals for this client; per-run totals go through
+        # agent.usage.track_usage.
+        self.usage = TokenUsage()
+
+    def uncached(self) -> "OpenAIClient":
+        clone = copy.copy(self)
+        clone.cache = None
+        return clone
+
+    def limited(self, limiter: Optional["RateLimiter"]) -> "OpenAIClient":
+        clone = copy.copy(self)
+        clone.limiter = limiter
+        return clone
 
-    def generate_json(self, system_prompt: str, user_prompt: str) -> dict:
-        response = self.client.responses.create(
-            model=self.model,
-            input=[
-                {
-                    "role": "system",
-                    "content": [
-                        {"type": "input_text", "text": system_prompt.strip()}
-                    ],
-                },
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "input_text", "text": user_prompt.strip()}
-                    ],
-                },
-            ],
-            temperature=self.temperature,
-            max_output_tokens=self.max_output_tokens,
+    def acquire(self) -> None:
+        if self.limiter is not None:
+            self.limiter.acquire()
+
+    def cache_key(
+        self, system_prompt: str, user_prompt: str, text_format: Optional[Dict[str, Any]] = None
+    ) -> str:
+        material = json.dumps(
+            {
+                "version": LLM_CACHE_VERSION,
+                "model": self.model,
+                "temperature": self.temperature,
+                "max_output_tokens": self.max_output_tokens,
+                "system": normalize_prompt(system_prompt),
+                "user": normalize_prompt(user_prompt),
+                "format": text_format,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def lookup(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        text_format: Optional[Dict[str, Any]] = None,
+        validate: Optional[Callable[[Any], List[str]]] = None,
+    ) -> Optional[dict]:
+        if self.cache is None:
+            return None
+        entry = self.cache.get(self.cache_key(system_prompt, user_prompt, text_format))
+        if entry is None:
+            return None
+        try:
+            payload = json.loads(entry.value)
+        except ValueError:
+            self.cache.reject(entry)
+            return None
+        if validate and validate(payload):
+            self.cache.reject(entry)
+            return None
+        return payload
+
+    def remember(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        payload: dict,
+        text_format: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        if self.cache is None:
+            return
+        self.cache.set(
+            self.cache_key(system_prompt, user_prompt, text_format),
+            json.dumps(payload).encode("utf-8"),
+            ttl=llm_cache_ttl(),
+            meta={"model": self.model},
         )
+
+    def build_input(self, system_prompt: str, user_prompt: str) -> list:
+        return [
+            {
+                "role": "system",
+                "content": [
+                    {"type": "input_text", "text": system_prompt.strip()}
+                ],
+            },
+            {
+                "role": "user",
+                "content": [
+                    {"type": "input_text", "text": user_prompt.strip()}
+                ],
+            },
+        ]
+
+    def request_options(self, text_format: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        # With a `json_schema` format the API constrains decoding to the
+        # schema, so the output is always parseable and correctly shaped.
+        return {"text": {"format": text_format}} if text_format else {}
+
+    def generate_json(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        text_format: Optional[Dict[str, Any]] = None,
+        validate: Optional[Callable[[Any], List[str]]] = None,
+    ) -> Any:
+        # Output is cached only when `validate` (if given) reports no
+        # problems, so a rejected generation is requested again on the next
+        # run instead of being replayed from disk. Callers still check the
+        # returned value themselves.
+        with span("openai.generate", model=self.model) as current:
+            cached = self.lookup(system_prompt, user_prompt, text_format, validate)
+            if cached is not None:
+                current.set(cache="hit")
+                return cached
+            self.acquire()
+            response = self.client.responses.create(
+                model=self.model,
+                input=self.build_input(system_prompt, user_prompt),
+                temperature=self.temperature,
+                max_output_tokens=self.max_output_tokens,
+                **self.request_options(text_format),
+            )
+            usage = getattr(response, "usage", None)
+            record_usage(usage, self.usage)
+            current.set(cache="miss", **usage_attrs(self.model, usage))
         text = extract_text(response)
         if not text:
             raise ValueError("OpenAI response had no text content")
-        return parse_json(text)
+        payload = parse_json(text)
+        if not (validate and validate(payload)):
+            self.remember(system_prompt, user_prompt, payload, text_format)
+        return payload
+
+    def stream_text(
+        self, system_prompt: str, user_prompt: str, text_format: Optional[Dict[str, Any]] = None
+    ) -> Iterator[str]:
+        # Yields output text deltas as they arrive. Closing the generator
+        # early closes the HTTP stream, which stops generation server-side.
+        with span("openai.stream", model=self.model) as current:
+            self.acquire()
+            started = time.perf_counter()
+            stream = self.client.responses.create(
+                model=self.model,
+                input=self.build_input(system_prompt, user_prompt),
+                temperature=self.temperature,
+                max_output_tokens=self.max_output_tokens,
+                stream=True,
+                **self.request_options(text_format),
+            )
+            try:
+                for event in stream:
+                    event_type = getattr(event, "type", "")
+                    if event_type == "response.output_text.delta":
+                        if "firstTokenMs" not in current.attrs:
+                            elapsed = time.perf_counter() - started
+                            current.set(firstTokenMs=round(elapsed * 1000, 2))
+                        yield getattr(event, "delta", "")
+                    elif event_type == "response.completed":
+                        usage = getattr(getattr(event, "response", None), "usage", None)
+                        record_usage(usage, self.usage)
+                        current.set(**usage_attrs(self.model, usage))
+                    elif event_type in {"error", "response.failed"}:
+                        raise ValueError(f"OpenAI stream failed: {event}")
+            finally:
+                stream.close()
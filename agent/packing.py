@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import math
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import urlparse
+
+from agent.ingest import Source
+from agent.report import RunReport, SourceUsage
+
+try:
+    import tiktoken
+except ImportError:  # fall back to a characters-per-token estimate
+    tiktoken = None
+
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = 6000
+# Sources that would get fewer tokens than this are left out entirely.
+MIN_SOURCE_TOKENS = 40
+# Uploaded documents outrank explicit links, which outrank auto-pulled pages.
+SOURCE_WEIGHTS = {"file": 3.0, "link": 2.0, "auto": 1.0}
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+QUERY_TERM = re.compile(r"[a-z0-9]{4,}")
+# Sentences shorter than this are too generic to call boilerplate.
+MIN_BOILERPLATE_CHARS = 20
+
+
+@lru_cache(maxsize=4)
+def get_encoding(model: str) -> Any:
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+class TokenCounter:
+    def __init__(self, model: str = ""):
+        self.encoding = get_encoding(model)
+
+    @property
+    def name(self) -> str:
+        return self.encoding.name if self.encoding is not None else f"chars/{CHARS_PER_TOKEN}"
+
+    def count(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+    def truncate(self, text: str, tokens: int) -> str:
+        if tokens <= 0:
+            return ""
+        if self.encoding is not None:
+            encoded = self.encoding.encode(text, disallowed_special=())
+            if len(encoded) <= tokens:
+                return text
+            text = self.encoding.decode(encoded[:tokens])
+        elif len(text) > tokens * CHARS_PER_TOKEN:
+            text = text[: tokens * CHARS_PER_TOKEN]
+        else:
+            return text
+        # Do not end on half a word.
+        cut = text.rfind(" ")
+        return text[:cut] if cut > len(text) // 2 else text
+
+
+def source_weight(source_type: str) -> float:
+    return SOURCE_WEIGHTS.get(source_type.split(":", 1)[0], 1.0)
+
+
+def query_terms(query: str) -> Set[str]:
+    return set(QUERY_TERM.findall(query.lower()))
+
+
+def relevance(content: str, terms: Set[str]) -> float:
+    if not terms:
+        return 1.0
+    words = set(QUERY_TERM.findall(content.lower()))
+    return 1.0 + len(terms & words) / len(terms)
+
+
+def site_key(source: Source) -> Optional[str]:
+    if source.source_type == "file":
+        return None
+    return urlparse(source.source_id).netloc.lower() or None
+
+
+def strip_boilerplate(sources: List[Source]) -> List[str]:
+    # Sentences repeated across pages of the same site (taglines, cookie and
+    # newsletter blurbs, contact blocks) are kept only in the first page.
+    by_site: Dict[str, List[int]] = defaultdict(list)
+    for index, source in enumerate(sources):
+        key = site_key(source)
+        if key:
+            by_site[key].append(index)
+    contents = [source.content for source in sources]
+    for indexes in by_site.values():
+        if len(indexes) < 2:
+            continue
+        counts: Dict[str, int] = defaultdict(int)
+        split = {index: SENTENCE_SPLIT.split(contents[index]) for index in indexes}
+        for index in indexes:
+            for sentence in {" ".join(s.lower().split()) for s in split[index]}:
+                counts[sentence] += 1
+        seen: Set[str] = set()
+        for index in indexes:
+            kept = []
+            for sentence in split[index]:
+                normalized = " ".join(sentence.lower().split())
+                if counts[normalized] > 1 and len(normalized) >= MIN_BOILERPLATE_CHARS:
+                    if normalized in seen:
+                        continue
+                    seen.add(normalized)
+                kept.append(sentence)
+            contents[index] = " ".join(kept)
+    return contents
+
+
+def allocate(needs: List[int], weights: List[float], budget: int) -> List[int]:
+    # Split `budget` in proportion to `weights`; sources needing less than
+    # their share keep only what they need and the rest is shared again.
+    allocation = [0] * len(needs)
+    active = {index for index, need in enumerate(needs) if need > 0}
+    remaining = budget
+    while active and remaining > 0:
+        total_weight = sum(weights[index] for index in active)
+        shares = {index: remaining * weights[index] / total_weight for index in active}
+        satisfied = [index for index in active if needs[index] <= shares[index]]
+        if not satisfied:
+            for index in active:
+                allocation[index] = int(shares[index])
+            break
+        for index in satisfied:
+            allocation[index] = needs[index]
+            remaining -= needs[index]
+            active.discard(index)
+    return allocation
+
+
+def source_header(source: Source) -> str:
+    return f"[{source.source_type}] {source.source_id}\n"
+
+
+def pack_sources(
+    sources: List[Source],
+    budget: int = DEFAULT_TOKEN_BUDGET,
+    query: str = "",
+    model: str = "",
+    report: Optional[RunReport] = None,
+) -> List[Source]:
+    counter = TokenCounter(model)
+    terms = query_terms(query)
+    contents = strip_boilerplate(sources)
+    original = [counter.count(source.content) for source in sources]
+    needs = [counter.count(content) for content in contents]
+    weights = [
+        source_weight(source.source_type) * relevance(content, terms)
+        for source, content in zip(sources, contents)
+    ]
+    overhead = sum(counter.count(source_header(source)) + 1 for source in sources)
+    allocation = allocate(needs, weights, max(0, budget - overhead))
+
+    packed: List[Source] = []
+    usages: List[SourceUsage] = []
+    for source, content, tokens_in, need, tokens in zip(
+        sources, contents, original, needs, allocation
+    ):
+        usage = SourceUsage(
+            source_id=source.source_id,
+            source_type=source.source_type,
+            tokens_in=tokens_in,
+            boilerplate_tokens=tokens_in - need,
+        )
+        if tokens < min(MIN_SOURCE_TOKENS, need) or not content.strip():
+            usage.dropped = True
+        else:
+            text = content if tokens >= need else counter.truncate(content, tokens)
+            usage.tokens_out = counter.count(text)
+            packed.append(Source(source_id=source.source_id, source_type=source.source_type, content=text))
+        usages.append(usage)
+
+    if report is not None:
+        report.token_budget = budget
+        report.tokenizer = counter.name
+        report.sources.extend(usages)
+    return packed
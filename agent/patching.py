@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import copy
+from typing import Any, Dict, List, Tuple
+
+from agent import schema
+
+EDITABLE_FIELDS = {
+    "title",
+    "pageTag",
+    "hero",
+    "consulting",
+    "whyUs",
+    "services",
+    "methodology",
+    "engagement",
+    "faq",
+    "cta",
+}
+SECTION_LISTS: Dict[str, str] = {
+    name: field for name, (field, _, _) in schema.SECTION_LISTS.items()
+}
+PATCH_OPS = {"add", "remove", "replace"}
+
+
+class PatchError(ValueError):
+    pass
+
+
+def parse_pointer(path: str) -> List[str]:
+    if not isinstance(path, str) or not path.startswith("/"):
+        raise PatchError(f"Invalid JSON Pointer: {path!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in path[1:].split("/")]
+
+
+def validate_operations(operations: Any) -> List[Dict[str, Any]]:
+    if not isinstance(operations, list) or not operations:
+        raise PatchError("Patch must contain a non-empty 'operations' list")
+    for operation in operations:
+        if not isinstance(operation, dict) or operation.get("op") not in PATCH_OPS:
+            raise PatchError(f"Unsupported operation: {operation!r}")
+        tokens = parse_pointer(operation.get("path"))
+        if tokens[0] not in EDITABLE_FIELDS:
+            raise PatchError(f"Path is not editable: {operation['path']}")
+        if "_key" in tokens:
+            raise PatchError(f"Path may not touch _key: {operation['path']}")
+        if operation["op"] != "remove" and "value" not in operation:
+            raise PatchError(f"Operation is missing a value: {operation['path']}")
+    return operations
+
+
+def resolve_parent(document: Any, tokens: List[str]) -> Tuple[Any, str]:
+    target = document
+    for token in tokens[:-1]:
+        if isinstance(target, list):
+            target = target[list_index(target, token)]
+        elif isinstance(target, dict) and token in target:
+            target = target[token]
+        else:
+            raise PatchError(f"Path does not exist: /{'/'.join(tokens)}")
+    return target, tokens[-1]
+
+
+def list_index(items: List[Any], token: str, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return len(items)
+    if not token.isdigit():
+        raise PatchError(f"Invalid list index: {token}")
+    index = int(token)
+    if index > len(items) or (index == len(items) and not allow_end):
+        raise PatchError(f"List index out of range: {token}")
+    return index
+
+
+def apply_operations(document: Dict[str, Any], operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    patched = copy.deepcopy(document)
+    for operation in validate_operations(operations):
+        tokens = parse_pointer(operation["path"])
+        parent, last = resolve_parent(patched, tokens)
+        op = operation["op"]
+        value = copy.deepcopy(operation.get("value"))
+        if isinstance(parent, list):
+            index = list_index(parent, last, allow_end=op == "add")
+            if op == "add":
+                parent.insert(index, value)
+            elif op == "remove":
+                parent.pop(index)
+            else:
+                # Keep the existing _key so Sanity sees an in-place edit.
+                if isinstance(parent[index], dict) and isinstance(value, dict):
+                    if "_key" in parent[index]:
+                        value = {"_key": parent[index]["_key"], **value}
+                parent[index] = value
+        elif isinstance(parent, dict):
+            if op == "remove":
+                if last not in parent:
+                    raise PatchError(f"Path does not exist: {operation['path']}")
+                del parent[last]
+            elif op == "replace" and last not in parent:
+                raise PatchError(f"Path does not exist: {operation['path']}")
+            else:
+                parent[last] = value
+        else:
+            raise PatchError(f"Path does not exist: {operation['path']}")
+    return patched
+
+
+def check_cardinality(before: Dict[str, Any], after: Dict[str, Any]) -> None:
+    for section, field in SECTION_LISTS.items():
+        old_items = (before.get(section) or {}).get(field) or []
+        new_items = (after.get(section) or {}).get(field) or []
+        if len(old_items) != len(new_items):
+            raise PatchError(
+                f"{section}.{field} must keep {len(old_items)} items, got {len(new_items)}"
+            )
+
+
+def join_path(path: str, key: str) -> str:
+    return f"{path}.{key}" if path else key
+
+
+def keyed(items: List[Any]) -> bool:
+    return all(isinstance(item, dict) and item.get("_key") for item in items)
+
+
+def diff_value(
+    path: str,
+    before: Any,
+    after: Any,
+    set_fields: Dict[str, Any],
+    unset_fields: List[str],
+) -> None:
+    if before == after:
+        return
+    if isinstance(before, dict) and isinstance(after, dict):
+        for key, value in after.items():
+            if key not in before:
+                set_fields[join_path(path, key)] = value
+            else:
+                diff_value(join_path(path, key), before[key], value, set_fields, unset_fields)
+        for key in before:
+            if key not in after:
+                unset_fields.append(join_path(path, key))
+        return
+    if (
+        isinstance(before, list)
+        and isinstance(after, list)
+        and len(before) == len(after)
+        and keyed(before)
+        and keyed(after)
+        and [item["_key"] for item in before] == [item["_key"] for item in after]
+    ):
+        for old_item, new_item in zip(before, after):
+            item_path = f'{path}[_key=="{old_item["_key"]}"]'
+            diff_value(item_path, old_item, new_item, set_fields, unset_fields)
+        return
+    set_fields[path] = after
+
+
+def diff_documents(
+    before: Dict[str, Any], after: Dict[str, Any]
+) -> Tuple[Dict[str, Any], List[str]]:
+    # Minimal Sanity `set`/`unset` paths turning `before` into `after`,
+    # addressing keyed array items by `_key` so untouched items keep theirs.
+    set_fields: Dict[str, Any] = {}
+    unset_fields: List[str] = []
+    for field in EDITABLE_FIELDS:
+        if field in before or field in after:
+            if field not in after:
+                unset_fields.append(field)
+            elif field not in before:
+                set_fields[field] = after[field]
+            else:
+                diff_value(field, before[field], after[field], set_fields, unset_fields)
+    return set_fields, unset_fields
@@ -1,18 +1,75 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import contextvars
+import copy
 import re
-from dataclasses import dataclass
-from typing import List, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from functools import partial
+from typing import Any, Coroutine, Dict, List, Optional, TypeVar
 from uuid import uuid4
 
+from agent.cache import get_cache
 from agent.config import Settings
-from agent.ingest import Source, auto_pull_sources, gather_sources, truncate_sources
+from agent.discovery_manifest import load_manifest
+from agent.extract_pool import ExtractLimits
+from agent.ingest import (
+    FetchLimits,
+    Source,
+    auto_pull_sources,
+    gather_sources,
+)
 from agent.openai_client import OpenAIClient
+from agent.packing import CHARS_PER_TOKEN, pack_sources
+from agent.patching import (
+    SECTION_LISTS,
+    PatchError,
+    apply_operations,
+    check_cardinality,
+    diff_documents,
+    parse_pointer,
+)
 from agent.pricing import apply_price_guardrails
 import json
 
-from agent.prompts import EDIT_PROMPT_TEMPLATE, SYSTEM_PROMPT, USER_PROMPT_TEMPLATE
-from agent.sanity_client import fetch_sector_by_slug, fetch_sector_slugs, publish_sector
+from agent.prompts import (
+    EDIT_PATCH_PROMPT_TEMPLATE,
+    EDIT_PROMPT_TEMPLATE,
+    REPAIR_PROMPT_TEMPLATE,
+    SECTION_CONTEXT_TEMPLATE,
+    SYSTEM_PROMPT,
+    USER_PROMPT_TEMPLATE,
+)
+from agent.ratelimit import RateLimiter
+from agent.report import RunReport
+from agent.retrieval import select_relevant
+from agent.sanity_client import (
+    MAX_MUTATIONS_PER_TRANSACTION,
+    fetch_sector_by_slug,
+    patch_sector,
+    publish_sector,
+    publish_sectors,
+)
+from agent.schema import (
+    Counts,
+    item_counts,
+    json_format,
+    part_errors,
+    payload_errors,
+    payload_schema,
+    sector_format,
+    validate_payload,
+)
+from agent.sections import generate_sections
+from agent.streaming import SectionCallback, stream_json
+from agent.slug_index import SlugIndex, get_slug_index
+from agent.tracing import span
+from agent.usage import track_usage
+
+T = TypeVar("T")
 
 
 def slugify(value: str) -> str:
@@ -27,12 +84,10 @@ def with_key(item: dict) -> dict:
 
 
 def add_keys(payload: dict) -> dict:
-    payload["consulting"]["cards"] = [with_key(card) for card in payload["consulting"]["cards"]]
-    payload["whyUs"]["items"] = [with_key(item) for item in payload["whyUs"]["items"]]
-    payload["services"]["cards"] = [with_key(card) for card in payload["services"]["cards"]]
-    payload["methodology"]["steps"] = [with_key(step) for step in payload["methodology"]["steps"]]
-    payload["engagement"]["cards"] = [with_key(card) for card in payload["engagement"]["cards"]]
-    payload["faq"]["items"] = [with_key(item) for item in payload["faq"]["items"]]
+    for section, field in SECTION_LISTS.items():
+        items = (payload.get(section) or {}).get(field)
+        if isinstance(items, list):
+            payload[section][field] = [with_key(item) for item in items]
     return payload
 
 
@@ -47,6 +102,7 @@ class AgentInput:
     website: str
     include_categories: List[str]
     exclude_patterns: List[str]
+    discovery: Optional[str] = None
 
 
 def build_sources_summary(sources: List[Source]) -> str:
@@ -54,42 +110,294 @@ def build_sources_summary(sources: List[Source]) -> str:
         return "(no additional sources)"
     blocks = []
     for source in sources:
-        snippet = source.content[:1200]
-        blocks.append(f"[{source.source_type}] {source.source_id}\n{snippet}")
+        # Content is already sized by `pack_sources`.
+        blocks.append(f"[{source.source_type}] {source.source_id}\n{source.content}")
     return "\n\n".join(blocks)
 
 
-def generate_sector_payload(agent_input: AgentInput, settings: Settings) -> dict:
-    sources = gather_sources(agent_input.files, agent_input.links)
-    if agent_input.website and agent_input.include_categories:
-        sources.extend(
-            auto_pull_sources(
-                agent_input.website,
-                agent_input.include_categories,
-                agent_input.exclude_patterns,
+def source_max_chars(settings: Settings) -> int:
+    # No single source can use more than the whole prompt budget.
+    return settings.source_token_budget * CHARS_PER_TOKEN
+
+
+def manifest_buckets(discovery: Optional[str], website: str) -> Optional[Dict[str, List[str]]]:
+    if not discovery:
+        return None
+    manifest = load_manifest(discovery)
+    if manifest is None or not manifest.matches(website):
+        return None
+    return manifest.categories
+
+
+async def acollect_sources(
+    files: List[str],
+    links: List[str],
+    website: str,
+    include_categories: List[str],
+    exclude_patterns: List[str],
+    settings: Settings,
+    report: Optional[RunReport] = None,
+    discovery: Optional[str] = None,
+) -> List[Source]:
+    # Uploads/explicit links and site discovery + auto-pull are independent,
+    # so they run side by side under the same deadline.
+    limits = FetchLimits(
+        max_workers=settings.fetch_workers,
+        per_host=settings.fetch_per_host,
+        deadline=settings.ingest_deadline,
+    )
+    started = time.monotonic()
+    extract_limits = ExtractLimits(
+        timeout=settings.extract_timeout,
+        memory_mb=settings.extract_memory_mb,
+        processes=settings.extract_processes or ExtractLimits().processes,
+    )
+    stages = [
+        asyncio.to_thread(
+            gather_sources,
+            files,
+            links,
+            limits,
+            max_chars=source_max_chars(settings),
+            extract_limits=extract_limits,
+            report=report,
+        )
+    ]
+    if website and include_categories:
+        stages.append(
+            asyncio.to_thread(
+                auto_pull_sources,
+                website,
+                include_categories,
+                exclude_patterns,
+                limits=replace(limits, deadline=limits.remaining(started)),
+                max_chars=source_max_chars(settings),
+                report=report,
+                buckets=manifest_buckets(discovery, website),
+                skip_urls=links,
             )
         )
-    sources = truncate_sources(sources, max_chars=5000)
-    sources_summary = build_sources_summary(sources)
+    with span("sources", files=len(files), links=len(links)) as current:
+        results = await asyncio.gather(*stages)
+        collected = [source for sources in results for source in sources]
+        current.set(sources=len(collected), chars=sum(len(source.content) for source in collected))
+    return collected
+
+
+def run_sync(coroutine: Coroutine[Any, Any, T]) -> T:
+    # The sync entry points block like the pre-async versions and work from
+    # any caller. Inside a running event loop (where asyncio.run raises) the
+    # coroutine gets its own loop on a helper thread; the caller's loop is
+    # blocked until it finishes, so async code should await the a* variants.
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as helper:
+        return helper.submit(contextvars.copy_context().run, asyncio.run, coroutine).result()
+
+
+def collect_sources(
+    files: List[str],
+    links: List[str],
+    website: str,
+    include_categories: List[str],
+    exclude_patterns: List[str],
+    settings: Settings,
+    report: Optional[RunReport] = None,
+    discovery: Optional[str] = None,
+) -> List[Source]:
+    return run_sync(
+        acollect_sources(
+            files,
+            links,
+            website,
+            include_categories,
+            exclude_patterns,
+            settings,
+            report,
+            discovery,
+        )
+    )
 
-    slug = agent_input.slug or slugify(agent_input.company_name)
 
-    prompt = USER_PROMPT_TEMPLATE.format(
-        company_name=agent_input.company_name,
-        sector_label=agent_input.sector_label,
-        slug=slug,
-        company_context=agent_input.context or "(no additional context)",
-        sources_summary=sources_summary,
+async def asummarize_sources(
+    files: List[str],
+    links: List[str],
+    website: str,
+    include_categories: List[str],
+    exclude_patterns: List[str],
+    query: str,
+    settings: Settings,
+    report: Optional[RunReport] = None,
+    discovery: Optional[str] = None,
+) -> str:
+    sources = await acollect_sources(
+        files,
+        links,
+        website,
+        include_categories,
+        exclude_patterns,
+        settings,
+        report,
+        discovery,
     )
+    with span("retrieval", sources=len(sources)):
+        sources = select_relevant(
+            sources, query, top_k=settings.retrieval_chunks, report=report
+        )
+    with span("packing", budget=settings.source_token_budget):
+        sources = pack_sources(
+            sources,
+            budget=settings.source_token_budget,
+            query=query,
+            model=settings.openai_model,
+            report=report,
+        )
+    return build_sources_summary(sources)
+
 
-    client = OpenAIClient(
+def build_client(settings: Settings) -> OpenAIClient:
+    return OpenAIClient(
         api_key=settings.openai_api_key,
         model=settings.openai_model,
         temperature=settings.openai_temperature,
         max_output_tokens=settings.max_output_tokens,
+        cache=get_cache("llm") if settings.llm_cache else None,
     )
 
-    payload = client.generate_json(SYSTEM_PROMPT, prompt)
+
+def request_payload(
+    client: OpenAIClient,
+    prompt: str,
+    settings: Settings,
+    on_section: Optional[SectionCallback] = None,
+    counts: Optional[Counts] = None,
+) -> dict:
+    # `counts` overrides the default list sizes in the schema and validators;
+    # edits pass the existing document's sizes.
+    text_format = sector_format(counts) if settings.structured_output else None
+    if settings.stream_output or on_section is not None:
+        return stream_json(
+            client,
+            SYSTEM_PROMPT,
+            prompt,
+            on_section=on_section,
+            text_format=text_format,
+            counts=counts,
+        )
+    validate = partial(validate_payload, counts=counts)
+    payload = client.generate_json(SYSTEM_PROMPT, prompt, text_format, validate=validate)
+    if validate(payload):
+        payload = repair_payload(client, prompt, payload, settings, counts)
+        # The first answer was not cached; store the repaired page under the
+        # original prompt so a re-run skips the repair calls.
+        client.remember(SYSTEM_PROMPT, prompt, payload, text_format)
+    return payload
+
+
+REPAIR_ATTEMPTS = 2
+
+
+def repair_payload(
+    client: OpenAIClient,
+    prompt: str,
+    payload: Any,
+    settings: Settings,
+    counts: Optional[Counts] = None,
+) -> dict:
+    # Checks the payload against the local validators and asks again for the
+    # failing top-level fields and sections only, instead of the whole page.
+    if not isinstance(payload, dict):
+        payload = {}
+    for _ in range(REPAIR_ATTEMPTS):
+        problems = payload_errors(payload, counts)
+        if not problems:
+            return payload
+        parts = list(problems)
+        repair_prompt = REPAIR_PROMPT_TEMPLATE.format(
+            prompt=prompt.strip(),
+            problems="\n".join(f"- {error}" for errors in problems.values() for error in errors),
+            parts=", ".join(parts),
+        )
+        text_format = (
+            json_format("sector_repair", payload_schema(parts, counts)) if settings.structured_output else None
+        )
+        fixed = client.generate_json(
+            SYSTEM_PROMPT,
+            repair_prompt,
+            text_format,
+            validate=lambda answer: part_errors(answer, parts, counts),
+        )
+        if isinstance(fixed, dict):
+            payload.update({part: fixed[part] for part in parts if part in fixed})
+    problems = payload_errors(payload, counts)
+    if problems:
+        details = "; ".join(error for errors in problems.values() for error in errors)
+        raise ValueError(f"Model output failed validation: {details}")
+    return payload
+
+
+def report_usage(report: Optional[RunReport]):
+    # Model calls made inside the block add their token usage to the report;
+    # without one, an outer tracker (if any) keeps collecting.
+    if report is None:
+        return contextlib.nullcontext()
+    return track_usage(report.usage)
+
+
+async def agenerate_sector_payload(
+    agent_input: AgentInput,
+    settings: Settings,
+    client: Optional[OpenAIClient] = None,
+    on_section: Optional[SectionCallback] = None,
+    report: Optional[RunReport] = None,
+) -> dict:
+    sources_summary = await asummarize_sources(
+        agent_input.files,
+        agent_input.links,
+        agent_input.website,
+        agent_input.include_categories,
+        agent_input.exclude_patterns,
+        " ".join([agent_input.company_name, agent_input.sector_label, agent_input.context]),
+        settings,
+        report,
+        agent_input.discovery,
+    )
+
+    slug = agent_input.slug or slugify(agent_input.company_name)
+
+    client = client or build_client(settings)
+
+    if settings.generation_mode == "sections":
+        context = SECTION_CONTEXT_TEMPLATE.format(
+            company_name=agent_input.company_name,
+            sector_label=agent_input.sector_label,
+            slug=slug,
+            company_context=agent_input.context or "(no additional context)",
+            sources_summary=sources_summary,
+        )
+        with report_usage(report), span("generate", mode="sections"):
+            payload = await asyncio.to_thread(
+                generate_sections,
+                client,
+                context,
+                max_workers=settings.section_workers,
+                on_section=on_section,
+                structured=settings.structured_output,
+            )
+    else:
+        prompt = USER_PROMPT_TEMPLATE.format(
+            company_name=agent_input.company_name,
+            sector_label=agent_input.sector_label,
+            slug=slug,
+            company_context=agent_input.context or "(no additional context)",
+            sources_summary=sources_summary,
+        )
+        with report_usage(report), span("generate", mode="single"):
+            payload = await asyncio.to_thread(
+                request_payload, client, prompt, settings, on_section
+            )
     payload["slug"] = slug
     payload = apply_price_guardrails(payload)
     payload = add_keys(payload)
@@ -97,6 +405,18 @@ def generate_sector_payload(agent_input: AgentInput, settings: Settings) -> dict
     return payload
 
 
+def generate_sector_payload(
+    agent_input: AgentInput,
+    settings: Settings,
+    client: Optional[OpenAIClient] = None,
+    on_section: Optional[SectionCallback] = None,
+    report: Optional[RunReport] = None,
+) -> dict:
+    return run_sync(
+        agenerate_sector_payload(agent_input, settings, client, on_section, report)
+    )
+
+
 @dataclass
 class EditInput:
     slug: str
@@ -108,6 +428,7 @@ class EditInput:
     website: str
     include_categories: List[str]
     exclude_patterns: List[str]
+    discovery: Optional[str] = None
 
 
 def strip_keys(items: list[dict]) -> list[dict]:
@@ -121,7 +442,8 @@ def strip_keys(items: list[dict]) -> list[dict]:
 
 
 def normalize_existing(payload: dict, slug: str) -> dict:
-    payload = dict(payload)
+    payload = copy.deepcopy(payload)
+    payload.pop("_id", None)
     payload["slug"] = payload.get("slug") or slug
     for section in ("consulting", "services", "engagement"):
         if isinstance(payload.get(section), dict):
@@ -138,72 +460,241 @@ def normalize_existing(payload: dict, slug: str) -> dict:
     return payload
 
 
-def generate_updated_payload(edit_input: EditInput, settings: Settings) -> dict:
-    sources = gather_sources(edit_input.files, edit_input.links)
-    if edit_input.website and edit_input.include_categories:
-        sources.extend(
-            auto_pull_sources(
-                edit_input.website,
-                edit_input.include_categories,
-                edit_input.exclude_patterns,
-            )
-        )
-    sources = truncate_sources(sources, max_chars=5000)
-    sources_summary = build_sources_summary(sources)
-
-    existing = fetch_sector_by_slug(
-        project_id=settings.sanity_project_id,
-        dataset=settings.sanity_dataset,
-        api_version=settings.sanity_api_version,
-        token=settings.sanity_api_token,
-        slug=edit_input.slug,
+@dataclass
+class EditContext:
+    existing: dict
+    normalized: dict
+    sector_label: str
+    sources_summary: str
+
+
+async def aload_edit_context(
+    edit_input: EditInput,
+    settings: Settings,
+    report: Optional[RunReport] = None,
+) -> EditContext:
+    # The Sanity read overlaps source collection.
+    sources_summary, existing = await asyncio.gather(
+        asummarize_sources(
+            edit_input.files,
+            edit_input.links,
+            edit_input.website,
+            edit_input.include_categories,
+            edit_input.exclude_patterns,
+            " ".join(
+                [edit_input.sector_label, edit_input.instructions, edit_input.context]
+            ),
+            settings,
+            report,
+            edit_input.discovery,
+        ),
+        asyncio.to_thread(
+            fetch_sector_by_slug,
+            project_id=settings.sanity_project_id,
+            dataset=settings.sanity_dataset,
+            api_version=settings.sanity_api_version,
+            token=settings.sanity_api_token,
+            slug=edit_input.slug,
+        ),
     )
     if not existing:
         raise ValueError(f"Sector not found for slug: {edit_input.slug}")
 
     normalized = normalize_existing(existing, edit_input.slug)
-    sector_label = edit_input.sector_label or normalized.get("title") or "Sector"
-    existing_json = json.dumps(normalized, indent=2)
+    return EditContext(
+        existing=existing,
+        normalized=normalized,
+        sector_label=edit_input.sector_label or normalized.get("title") or "Sector",
+        sources_summary=sources_summary,
+    )
+
+
+def load_edit_context(
+    edit_input: EditInput,
+    settings: Settings,
+    report: Optional[RunReport] = None,
+) -> EditContext:
+    return run_sync(aload_edit_context(edit_input, settings, report))
+
+
+async def agenerate_updated_payload(
+    edit_input: EditInput,
+    settings: Settings,
+    client: Optional[OpenAIClient] = None,
+    on_section: Optional[SectionCallback] = None,
+    report: Optional[RunReport] = None,
+) -> dict:
+    context = await aload_edit_context(edit_input, settings, report)
+    existing_json = json.dumps(context.normalized, indent=2)
 
     prompt = EDIT_PROMPT_TEMPLATE.format(
         slug=edit_input.slug,
-        sector_label=sector_label,
+        sector_label=context.sector_label,
         instructions=edit_input.instructions,
         company_context=edit_input.context or "(no additional context)",
-        sources_summary=sources_summary,
+        sources_summary=context.sources_summary,
         existing_json=existing_json,
     )
 
-    client = OpenAIClient(
-        api_key=settings.openai_api_key,
-        model=settings.openai_model,
-        temperature=settings.openai_temperature,
-        max_output_tokens=settings.max_output_tokens,
-    )
+    client = client or build_client(settings)
 
-    payload = client.generate_json(SYSTEM_PROMPT, prompt)
+    with report_usage(report), span("generate", mode="edit"):
+        payload = await asyncio.to_thread(
+            request_payload,
+            client,
+            prompt,
+            settings,
+            on_section,
+            item_counts(context.normalized),
+        )
     payload["slug"] = edit_input.slug
     payload = apply_price_guardrails(payload)
     payload = add_keys(payload)
     return payload
 
 
-def publish_sector_payload(payload: dict, settings: Settings) -> str:
-    slug = payload["slug"]
-    slugs = fetch_sector_slugs(
-        project_id=settings.sanity_project_id,
-        dataset=settings.sanity_dataset,
-        api_version=settings.sanity_api_version,
-        token=settings.sanity_api_token,
+def generate_updated_payload(
+    edit_input: EditInput,
+    settings: Settings,
+    client: Optional[OpenAIClient] = None,
+    on_section: Optional[SectionCallback] = None,
+    report: Optional[RunReport] = None,
+) -> dict:
+    return run_sync(
+        agenerate_updated_payload(edit_input, settings, client, on_section, report)
     )
-    if slug in slugs:
-        page_index = slugs.index(slug) + 1
-    else:
-        slugs.append(slug)
-        page_index = len(slugs)
 
-    payload["pageIndex"] = f"{page_index:03d}"
-    doc = {
+
+@dataclass
+class SectorPatch:
+    slug: str
+    document_id: str
+    payload: dict
+    operations: List[dict]
+    set_fields: Dict[str, Any]
+    unset_fields: List[str]
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.set_fields or self.unset_fields)
+
+
+def ensure_keys(payload: dict) -> dict:
+    # Items added by a patch need a _key; existing items keep theirs.
+    for section, field in SECTION_LISTS.items():
+        items = (payload.get(section) or {}).get(field)
+        if isinstance(items, list):
+            payload[section][field] = [
+                with_key(item) if isinstance(item, dict) and not item.get("_key") else item
+                for item in items
+            ]
+    return payload
+
+
+PATCH_ATTEMPTS = 2
+
+
+def patched_document(existing: dict, operations: Any) -> dict:
+    patched = apply_operations(existing, operations)
+    check_cardinality(existing, patched)
+    # Sections and top-level fields the operations touched must still pass
+    # the payload validators. Problems the stored document already had are
+    # not held against the patch.
+    touched = {parse_pointer(operation["path"])[0] for operation in operations}
+    counts = item_counts(existing)
+    before = payload_errors(existing, counts)
+    after = payload_errors(patched, counts)
+    errors = [
+        error
+        for part in sorted(touched)
+        for error in after.get(part, [])
+        if error not in before.get(part, [])
+    ]
+    if errors:
+        raise PatchError("; ".join(errors))
+    return patched
+
+
+def patch_errors(existing: dict, response: Any) -> List[str]:
+    operations = response.get("operations") if isinstance(response, dict) else None
+    try:
+        patched_document(existing, operations)
+    except PatchError as exc:
+        return [str(exc)]
+    return []
+
+
+async def agenerate_sector_patch(
+    edit_input: EditInput,
+    settings: Settings,
+    client: Optional[OpenAIClient] = None,
+    report: Optional[RunReport] = None,
+) -> SectorPatch:
+    # The model returns JSON Patch operations against the key-stripped
+    # document; they are applied to the stored document (list order is the
+    # same) so untouched items keep their _key and only changed paths are
+    # sent back to Sanity.
+    context = await aload_edit_context(edit_input, settings, report)
+    existing = context.existing
+    prompt = EDIT_PATCH_PROMPT_TEMPLATE.format(
+        slug=edit_input.slug,
+        sector_label=context.sector_label,
+        instructions=edit_input.instructions,
+        company_context=edit_input.context or "(no additional context)",
+        sources_summary=context.sources_summary,
+        existing_json=json.dumps(context.normalized, indent=2),
+    )
+
+    client = client or build_client(settings)
+
+    error: Optional[PatchError] = None
+    for _ in range(PATCH_ATTEMPTS):
+        attempt_prompt = prompt
+        if error is not None:
+            attempt_prompt += (
+                f"\nYour previous operations were rejected: {error}\n"
+                "Return corrected operations.\n"
+            )
+        with report_usage(report), span("generate", mode="patch"):
+            response = await asyncio.to_thread(
+                client.generate_json,
+                SYSTEM_PROMPT,
+                attempt_prompt,
+                validate=partial(patch_errors, existing),
+            )
+        operations = response.get("operations") if isinstance(response, dict) else None
+        try:
+            patched = patched_document(existing, operations)
+        except PatchError as exc:
+            error = exc
+            continue
+        patched = ensure_keys(apply_price_guardrails(patched))
+        set_fields, unset_fields = diff_documents(existing, patched)
+        patched.pop("_id", None)
+        patched["slug"] = edit_input.slug
+        return SectorPatch(
+            slug=edit_input.slug,
+            document_id=existing.get("_id") or f"sector-{edit_input.slug}",
+            payload=patched,
+            operations=operations,
+            set_fields=set_fields,
+            unset_fields=unset_fields,
+        )
+    raise ValueError(f"Model returned an invalid patch: {error}")
+
+
+def generate_sector_patch(
+    edit_input: EditInput,
+    settings: Settings,
+    client: Optional[OpenAIClient] = None,
+    report: Optional[RunReport] = None,
+) -> SectorPatch:
+    return run_sync(agenerate_sector_patch(edit_input, settings, client, report))
+
+
+def build_sector_document(payload: dict) -> dict:
+    slug = payload["slug"]
+    return {
         "_id": f"sector-{slug}",
         "_type": "sector",
         "title": payload["title"],
@@ -220,12 +711,107 @@ def publish_sector_payload(payload: dict, settings: Settings) -> str:
         "cta": payload["cta"],
     }
 
+
+def slug_index_for(settings: Settings) -> SlugIndex:
+    return get_slug_index(
+        project_id=settings.sanity_project_id,
+        dataset=settings.sanity_dataset,
+        api_version=settings.sanity_api_version,
+        token=settings.sanity_api_token,
+    )
+
+
+async def apublish_sector_payload(payload: dict, settings: Settings) -> str:
+    return await asyncio.to_thread(publish_sector_payload, payload, settings)
+
+
+def publish_sector_payload(payload: dict, settings: Settings) -> str:
+    page_index = slug_index_for(settings).page_index(payload["slug"])
+    payload["pageIndex"] = f"{page_index:03d}"
+
     publish_sector(
         project_id=settings.sanity_project_id,
         dataset=settings.sanity_dataset,
         api_version=settings.sanity_api_version,
         token=settings.sanity_api_token,
-        document=doc,
+        document=build_sector_document(payload),
+    )
+
+    return f"{settings.site_url}/sectors/{payload['slug']}"
+
+
+@dataclass
+class PublishOutcome:
+    slug: str
+    ok: bool
+    url: Optional[str] = None
+    page_index: Optional[str] = None
+    error: Optional[str] = None
+
+
+def publish_sector_payloads(
+    payloads: List[dict],
+    settings: Settings,
+    max_mutations: int = MAX_MUTATIONS_PER_TRANSACTION,
+    visibility: str = "sync",
+    limiter: Optional[RateLimiter] = None,
+) -> List[PublishOutcome]:
+    # Page indexes are computed once for the whole batch, then documents go
+    # out in chunked multi-mutation transactions. `limiter` is acquired for
+    # every Sanity request made along the way.
+    page_indexes = slug_index_for(settings).assign(
+        [payload["slug"] for payload in payloads if payload.get("slug")],
+        limiter=limiter,
+    )
+    # Outcomes line up with `payloads`, one per input.
+    outcomes: List[Optional[PublishOutcome]] = [None] * len(payloads)
+    documents = []
+    positions = []
+    for position, payload in enumerate(payloads):
+        try:
+            payload["pageIndex"] = f"{page_indexes[payload['slug']]:03d}"
+            documents.append(build_sector_document(payload))
+            positions.append(position)
+        except KeyError as exc:
+            outcomes[position] = PublishOutcome(
+                slug=payload.get("slug", ""), ok=False, error=f"Missing field {exc}"
+            )
+
+    results = publish_sectors(
+        project_id=settings.sanity_project_id,
+        dataset=settings.sanity_dataset,
+        api_version=settings.sanity_api_version,
+        token=settings.sanity_api_token,
+        documents=documents,
+        max_mutations=max_mutations,
+        visibility=visibility,
+        limiter=limiter,
     )
+    for position, document, result in zip(positions, documents, results):
+        slug = document["slug"]["current"]
+        outcomes[position] = PublishOutcome(
+            slug=slug,
+            ok=result.ok,
+            url=f"{settings.site_url}/sectors/{slug}" if result.ok else None,
+            page_index=document["pageIndex"],
+            error=result.error,
+        )
+    return [outcome for outcome in outcomes if outcome is not None]
+
+
+def publish_sector_patch(patch: SectorPatch, settings: Settings) -> str:
+    if patch.changed:
+        patch_sector(
+            project_id=settings.sanity_project_id,
+            dataset=settings.sanity_dataset,
+            api_version=settings.sanity_api_version,
+            token=settings.sanity_api_token,
+            document_id=patch.document_id,
+            set_fields=patch.set_fields,
+            unset_fields=patch.unset_fields,
+        )
+    return f"{settings.site_url}/sectors/{patch.slug}"
+
 
-    return f"{settings.site_url}/sectors/{slug}"
+async def apublish_sector_patch(patch: SectorPatch, settings: Settings) -> str:
+    return await asyncio.to_thread(publish_sector_patch, patch, settings)
@@ -4,17 +4,11 @@ Your tone is confident, pragmatic, and anti-hype. You avoid fluff, keep language
 Return ONLY valid JSON that matches the schema exactly.
 """
 
-USER_PROMPT_TEMPLATE = """
-Company: {company_name}
-Target sector: {sector_label}
-Custom slug: {slug}
-
-Company context (from chat):
-{company_context}
-
-Sources summary:
-{sources_summary}
+# Every template starts with its fixed instructions (positioning, schema,
+# rules) and ends with the per-request values, so consecutive calls share a
+# byte-identical prefix that the provider can serve from its prompt cache.
 
+USER_PROMPT_TEMPLATE = """
 Eduba positioning summary:
 - We build working AI pipelines, not decks.
 - We teach orchestration patterns and transfer capability/IP to the client.
@@ -81,11 +75,39 @@ Rules:
 - IDs must be formatted like /001, /002 or 01, 02 etc.
 - Use the provided slug and target sector in labels/titles.
 - Return only JSON. No markdown.
+
+Company: {company_name}
+Target sector: {sector_label}
+Custom slug: {slug}
+
+Company context (from chat):
+{company_context}
+
+Sources summary:
+{sources_summary}
+"""
+
+# Appended after the original prompt so a repair call reuses its cached prefix.
+REPAIR_PROMPT_TEMPLATE = """
+{prompt}
+
+Your previous response failed validation:
+{problems}
+
+Return a JSON object with only these keys, corrected: {parts}.
+Follow the same schema and rules. Return only JSON. No markdown.
 """
 
 EDIT_PROMPT_TEMPLATE = """
 You are editing an existing sector page for Eduba.
 
+Requirements:
+- Return the FULL JSON document in the same schema (include all fields).
+- Keep the slug unchanged and use the same label structure.
+- Preserve the number of items per section.
+- Apply edits to improve fit for the company context.
+- Return only JSON. No markdown.
+
 Target slug: {slug}
 Sector label: {sector_label}
 
@@ -100,11 +122,143 @@ Sources summary:
 
 Current sector JSON:
 {existing_json}
+"""
+
+EDIT_PATCH_PROMPT_TEMPLATE = """
+You are editing an existing sector page for Eduba.
+
+Return ONLY the changes as JSON Patch operations:
+{{
+  "operations": [
+    {{"op": "replace", "path": "/faq/items/2/answer", "value": "string"}}
+  ]
+}}
 
 Requirements:
-- Return the FULL JSON document in the same schema (include all fields).
-- Keep the slug unchanged and use the same label structure.
+- Paths are JSON Pointers into the current sector JSON (array indexes are 0-based).
+- Use "replace" for changed values; "add"/"remove" only when swapping list items.
+- Touch only the fields the instructions require. Do not restate unchanged content.
+- Never change slug or pageIndex.
 - Preserve the number of items per section.
-- Apply edits to improve fit for the company context.
 - Return only JSON. No markdown.
+
+Target slug: {slug}
+Sector label: {sector_label}
+
+Edit instructions:
+{instructions}
+
+Company context (from chat):
+{company_context}
+
+Sources summary:
+{sources_summary}
+
+Current sector JSON:
+{existing_json}
+"""
+
+# Shared by the outline call and every section call of one run, so the
+# request context is part of the common prefix too.
+SECTION_CONTEXT_TEMPLATE = """
+Eduba positioning summary:
+- We build working AI pipelines, not decks.
+- We teach orchestration patterns and transfer capability/IP to the client.
+- We add governance, evaluation harnesses, and human-in-the-loop safety by default.
+- We focus on reliable multi-model systems with fallbacks and explainability.
+
+Company: {company_name}
+Target sector: {sector_label}
+Custom slug: {slug}
+
+Company context (from chat):
+{company_context}
+
+Sources summary:
+{sources_summary}
+"""
+
+OUTLINE_PROMPT_TEMPLATE = """
+{context}
+Write the page outline that every other section will follow.
+
+Required JSON schema:
+{{
+  "title": "string",
+  "pageTag": "string",
+  "positioning": "string (2-3 sentences: the angle and promise for this sector)",
+  "hero": {{
+    "title": "string",
+    "subtitle": "string",
+    "ctaLabel": "string",
+    "ctaHref": "string",
+    "exploreLabel": "string"
+  }},
+  "cta": {{
+    "label": "string",
+    "title": "string",
+    "buttonLabel": "string",
+    "buttonHref": "string"
+  }}
+}}
+
+Rules:
+- Keep the copy concise
+- Use the provided slug and target sector in labels/titles.
+- Return only JSON. No markdown.
+"""
+
+SECTION_SCHEMAS = {
+    "consulting": """{
+  "label": "string",
+  "title": "string",
+  "description": ["string"],
+  "cards": [{"id":"/001","title":"string","body":"string"}]
+}""",
+    "whyUs": """{
+  "label": "string",
+  "title": "string",
+  "items": [{"id":"01","title":"string","description":"string"}]
+}""",
+    "services": """{
+  "label": "string",
+  "title": "string",
+  "intro": "string",
+  "cards": [{"id":"/001","title":"string","price":"string","body":"string"}]
+}""",
+    "methodology": """{
+  "label": "string",
+  "title": "string",
+  "steps": [{"id":"01","title":"string","description":"string"}]
+}""",
+    "engagement": """{
+  "label": "string",
+  "title": "string",
+  "intro": "string",
+  "cards": [{"id":"/001","title":"string","body":"string"}]
+}""",
+    "faq": """{
+  "label": "string",
+  "title": "string",
+  "items": [{"question":"string","answer":"string"}]
+}""",
+}
+
+SECTION_PROMPT_TEMPLATE = """
+{context}
+Page outline (already written, stay consistent with it):
+Title: {title}
+Hero: {hero_title} - {hero_subtitle}
+Positioning: {positioning}
+
+Write only the "{section}" section of the page.
+
+Required JSON schema:
+{schema}
+
+Rules:
+- Include exactly {count} {field}.
+- Keep the copy concise
+- IDs must be formatted like /001, /002 or 01, 02 etc.
+- Return only JSON for this section. No markdown.
 """
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Optional
+
+
+class RateLimiter:
+    # Token bucket shared across threads. `rate` is calls per `per` seconds;
+    # a rate of 0 or less disables limiting.
+    def __init__(self, rate: float, per: float = 60.0, burst: Optional[float] = None):
+        self.rate = rate
+        self.per = per
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                refill = (now - self.updated) * self.rate / self.per
+                self.tokens = min(self.capacity, self.tokens + refill)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) * self.per / self.rate
+            time.sleep(wait)
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List
+
+from agent.dedup import Duplicate
+from agent.usage import TokenUsage
+
+
+@dataclass
+class SourceUsage:
+    source_id: str
+    source_type: str
+    tokens_in: int
+    tokens_out: int = 0
+    boilerplate_tokens: int = 0
+    dropped: bool = False
+
+
+@dataclass
+class RunReport:
+    # Filled in by the pipeline as a run progresses; `--report` writes it out.
+    token_budget: int = 0
+    tokenizer: str = ""
+    sources: List[SourceUsage] = field(default_factory=list)
+    chunks_total: int = 0
+    chunks_kept: int = 0
+    irrelevant_sources: List[str] = field(default_factory=list)
+    duplicates: List[Duplicate] = field(default_factory=list)
+    # Uploads stopped by the extract timeout or ingest deadline (partial or no text).
+    incomplete_documents: List[str] = field(default_factory=list)
+    usage: TokenUsage = field(default_factory=TokenUsage)
+
+    @property
+    def tokens_used(self) -> int:
+        return sum(source.tokens_out for source in self.sources)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "tokenBudget": self.token_budget,
+            "tokensUsed": self.tokens_used,
+            "tokenizer": self.tokenizer,
+            "sources": [asdict(source) for source in self.sources],
+            "duplicatesDropped": len(self.duplicates),
+            "duplicates": [asdict(duplicate) for duplicate in self.duplicates],
+            "retrieval": {
+                "chunksTotal": self.chunks_total,
+                "chunksKept": self.chunks_kept,
+                "irrelevantSources": self.irrelevant_sources,
+            },
+            "incompleteDocuments": self.incomplete_documents,
+            "usage": self.usage.as_dict(),
+        }
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from agent.ingest import Source
+from agent.report import RunReport
+
+DEFAULT_TOP_K = 24
+CHUNK_WORDS = 150
+BM25_K1 = 1.5
+BM25_B = 0.75
+CHUNK_JOINER = " … "
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+WORD = re.compile(r"[a-z0-9]+(?:['’][a-z]+)?")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or our that the their "
+    "this to was we were will with you your they them us".split()
+)
+
+
+@dataclass
+class Chunk:
+    source_index: int
+    text: str
+
+
+def tokenize(text: str) -> List[str]:
+    return [word for word in WORD.findall(text.lower()) if word not in STOPWORDS and len(word) > 1]
+
+
+def chunk_text(text: str, words_per_chunk: int = CHUNK_WORDS) -> List[str]:
+    # Sentence-aligned chunks of roughly `words_per_chunk` words.
+    chunks: List[str] = []
+    current: List[str] = []
+    count = 0
+    for sentence in SENTENCE_SPLIT.split(text):
+        words = len(sentence.split())
+        if current and count + words > words_per_chunk:
+            chunks.append(" ".join(current))
+            current, count = [], 0
+        current.append(sentence)
+        count += words
+    if current:
+        chunks.append(" ".join(current))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+class BM25Index:
+    def __init__(self, documents: List[List[str]], k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.frequencies = [Counter(document) for document in documents]
+        self.lengths = [len(document) for document in documents]
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        document_counts: Counter = Counter()
+        for frequency in self.frequencies:
+            document_counts.update(frequency.keys())
+        total = len(documents)
+        self.idf: Dict[str, float] = {
+            term: math.log(1 + (total - count + 0.5) / (count + 0.5))
+            for term, count in document_counts.items()
+        }
+
+    def scores(self, query: List[str]) -> List[float]:
+        terms = [term for term in set(query) if term in self.idf]
+        results = []
+        for frequency, length in zip(self.frequencies, self.lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / (self.average_length or 1.0))
+            score = 0.0
+            for term in terms:
+                tf = frequency.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            results.append(score)
+        return results
+
+
+def select_relevant(
+    sources: List[Source],
+    query: str,
+    top_k: int = DEFAULT_TOP_K,
+    report: Optional[RunReport] = None,
+) -> List[Source]:
+    # Chunks every source, ranks the chunks against the query with BM25 and
+    # keeps the top `top_k`, reassembled per source in original order.
+    # Uploaded files and explicit links always keep their best chunk;
+    # auto-pulled pages with nothing relevant are dropped.
+    query_terms = tokenize(query)
+    if top_k <= 0 or not query_terms or not sources:
+        return sources
+
+    chunks = [
+        Chunk(source_index=index, text=text)
+        for index, source in enumerate(sources)
+        for text in chunk_text(source.content)
+    ]
+    if len(chunks) <= top_k:
+        return sources
+    scores = BM25Index([tokenize(chunk.text) for chunk in chunks]).scores(query_terms)
+    ranked = heapq.nlargest(top_k, range(len(chunks)), key=scores.__getitem__)
+    keep = {index for index in ranked if scores[index] > 0}
+    if not keep:
+        # Nothing matches the query at all; ranking would be arbitrary.
+        return sources
+    best: Dict[int, int] = {}
+    for index, chunk in enumerate(chunks):
+        if sources[chunk.source_index].source_type.startswith("auto:"):
+            continue
+        current = best.get(chunk.source_index)
+        if current is None or scores[index] > scores[current]:
+            best[chunk.source_index] = index
+    keep.update(best.values())
+
+    selected: Dict[int, List[str]] = {}
+    for index, chunk in enumerate(chunks):
+        if index in keep:
+            selected.setdefault(chunk.source_index, []).append(chunk.text)
+    if report is not None:
+        report.chunks_total += len(chunks)
+        report.chunks_kept += len(keep)
+        report.irrelevant_sources.extend(
+            source.source_id for index, source in enumerate(sources) if index not in selected
+        )
+    return [
+        Source(
+            source_id=source.source_id,
+            source_type=source.source_type,
+            content=CHUNK_JOINER.join(selected[index]),
+        )
+        for index, source in enumerate(sources)
+        if index in selected
+    ]
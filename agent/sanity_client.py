@@ -1,10 +1,43 @@
 from __future__ import annotations
 
 import json
-from typing import Any, Dict
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
 
 import requests
 
+from agent import transport
+from agent.ratelimit import RateLimiter
+from agent.tracing import span
+
+
+def api_url(project_id: str, api_version: str, action: str, dataset: str) -> str:
+    # SANITY_API_HOST points the client at another host, e.g. a local stand-in.
+    host = os.getenv("SANITY_API_HOST", "").rstrip("/") or f"https://{project_id}.api.sanity.io"
+    return f"{host}/v{api_version}/data/{action}/{dataset}"
+
+
+def sanity_request(
+    operation: str,
+    method: str,
+    url: str,
+    limiter: Optional[RateLimiter] = None,
+    **kwargs: Any,
+) -> requests.Response:
+    # One `sanity.<operation>` span per API call with payload sizes. A shared
+    # `limiter` is acquired once per HTTP request.
+    if limiter is not None:
+        limiter.acquire()
+    with span(f"sanity.{operation}") as current:
+        response = transport.request(method, url, **kwargs)
+        current.set(
+            status=response.status_code,
+            bytesOut=len(kwargs.get("data") or ""),
+            bytesIn=len(response.content),
+        )
+        return response
+
 
 def fetch_sector_slugs(
     project_id: str,
@@ -13,9 +46,11 @@ def fetch_sector_slugs(
     token: str,
 ) -> list[str]:
     query = '*[_type == "sector"]|order(_createdAt asc){ "slug": slug.current }'
-    url = f"https://{project_id}.api.sanity.io/v{api_version}/data/query/{dataset}"
+    url = api_url(project_id, api_version, "query", dataset)
     headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(url, headers=headers, params={"query": query}, timeout=30)
+    response = sanity_request(
+        "query", "GET", url, headers=headers, params={"query": query}, timeout=30
+    )
     if not response.ok:
         raise RuntimeError(
             f"Sanity query failed: {response.status_code} {response.text}"
@@ -35,6 +70,7 @@ def fetch_sector_by_slug(
     query = (
         '*[_type == "sector" && slug.current == $slug][0]'
         '{'
+        '_id,'
         '"slug": slug.current,'
         'title,'
         'pageIndex,'
@@ -49,9 +85,11 @@ def fetch_sector_by_slug(
         'cta'
         '}'
     )
-    url = f"https://{project_id}.api.sanity.io/v{api_version}/data/query/{dataset}"
+    url = api_url(project_id, api_version, "query", dataset)
     headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(
+    response = sanity_request(
+        "query",
+        "GET",
         url,
         headers=headers,
         params={"query": query, "$slug": f"\"{slug}\""},
@@ -72,13 +110,167 @@ def publish_sector(
     token: str,
     document: Dict[str, Any],
 ) -> Dict[str, Any]:
-    url = f"https://{project_id}.api.sanity.io/v{api_version}/data/mutate/{dataset}"
+    url = api_url(project_id, api_version, "mutate", dataset)
     headers = {
         "Authorization": f"Bearer {token}",
         "Content-Type": "application/json",
     }
     payload = {"mutations": [{"createOrReplace": document}]}
-    response = requests.post(url, headers=headers, data=json.dumps(payload), timeout=30)
+    response = sanity_request(
+        "mutate", "POST", url, headers=headers, data=json.dumps(payload), timeout=30
+    )
     if not response.ok:
         raise RuntimeError(f"Sanity publish failed: {response.status_code} {response.text}")
     return response.json()
+
+
+MAX_MUTATIONS_PER_TRANSACTION = 50
+MAX_TRANSACTION_BYTES = 2_000_000
+
+
+@dataclass
+class MutationOutcome:
+    document_id: str
+    ok: bool
+    operation: Optional[str] = None
+    transaction_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+def chunk_documents(
+    documents: List[Dict[str, Any]],
+    max_mutations: int,
+    max_bytes: int,
+) -> List[List[Dict[str, Any]]]:
+    chunks: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    size = 0
+    for document in documents:
+        doc_size = len(json.dumps(document))
+        if current and (len(current) >= max_mutations or size + doc_size > max_bytes):
+            chunks.append(current)
+            current = []
+            size = 0
+        current.append(document)
+        size += doc_size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def mutate(
+    project_id: str,
+    dataset: str,
+    api_version: str,
+    token: str,
+    mutations: List[Dict[str, Any]],
+    return_ids: bool = True,
+    visibility: str = "sync",
+    limiter: Optional[RateLimiter] = None,
+) -> Dict[str, Any]:
+    url = api_url(project_id, api_version, "mutate", dataset)
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/json",
+    }
+    params = {"returnIds": str(return_ids).lower(), "visibility": visibility}
+    response = sanity_request(
+        "mutate",
+        "POST",
+        url,
+        limiter=limiter,
+        headers=headers,
+        params=params,
+        data=json.dumps({"mutations": mutations}),
+        timeout=60,
+    )
+    if not response.ok:
+        raise RuntimeError(f"Sanity mutate failed: {response.status_code} {response.text}")
+    return response.json()
+
+
+def publish_sectors(
+    project_id: str,
+    dataset: str,
+    api_version: str,
+    token: str,
+    documents: List[Dict[str, Any]],
+    max_mutations: int = MAX_MUTATIONS_PER_TRANSACTION,
+    max_bytes: int = MAX_TRANSACTION_BYTES,
+    return_ids: bool = True,
+    visibility: str = "sync",
+    limiter: Optional[RateLimiter] = None,
+) -> List[MutationOutcome]:
+    outcomes: List[MutationOutcome] = []
+    for chunk in chunk_documents(documents, max_mutations, max_bytes):
+        try:
+            data = mutate(
+                project_id,
+                dataset,
+                api_version,
+                token,
+                [{"createOrReplace": document} for document in chunk],
+                return_ids=return_ids,
+                visibility=visibility,
+                limiter=limiter,
+            )
+        except RuntimeError as exc:
+            # Transactions are all-or-nothing; retry one by one so a single
+            # bad document does not fail the rest of its chunk.
+            if len(chunk) == 1:
+                outcomes.append(
+                    MutationOutcome(document_id=chunk[0]["_id"], ok=False, error=str(exc))
+                )
+                continue
+            outcomes.extend(
+                publish_sectors(
+                    project_id,
+                    dataset,
+                    api_version,
+                    token,
+                    chunk,
+                    max_mutations=1,
+                    return_ids=return_ids,
+                    visibility=visibility,
+                    limiter=limiter,
+                )
+            )
+            continue
+        operations = {
+            result.get("id"): result.get("operation") for result in data.get("results", [])
+        }
+        for document in chunk:
+            outcomes.append(
+                MutationOutcome(
+                    document_id=document["_id"],
+                    ok=True,
+                    operation=operations.get(document["_id"]),
+                    transaction_id=data.get("transactionId"),
+                )
+            )
+    return outcomes
+
+
+def patch_sector(
+    project_id: str,
+    dataset: str,
+    api_version: str,
+    token: str,
+    document_id: str,
+    set_fields: Dict[str, Any],
+    unset_fields: List[str],
+    visibility: str = "sync",
+) -> Dict[str, Any]:
+    patch: Dict[str, Any] = {"id": document_id}
+    if set_fields:
+        patch["set"] = set_fields
+    if unset_fields:
+        patch["unset"] = unset_fields
+    return mutate(
+        project_id,
+        dataset,
+        api_version,
+        token,
+        [{"patch": patch}],
+        visibility=visibility,
+    )
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Shape of a sector payload as described in USER_PROMPT_TEMPLATE: required
+# string fields per section, plus the list field, its item fields and the
+# exact item count for list sections. Service prices are filled in by the
+# pricing guardrails, so they are not required from the model.
+SECTION_FIELDS: Dict[str, List[str]] = {
+    "hero": ["title", "subtitle", "ctaLabel", "ctaHref", "exploreLabel"],
+    "consulting": ["label", "title"],
+    "whyUs": ["label", "title"],
+    "services": ["label", "title", "intro"],
+    "methodology": ["label", "title"],
+    "engagement": ["label", "title", "intro"],
+    "faq": ["label", "title"],
+    "cta": ["label", "title", "buttonLabel", "buttonHref"],
+}
+SECTION_LISTS: Dict[str, Tuple[str, List[str], int]] = {
+    "consulting": ("cards", ["id", "title", "body"], 3),
+    "whyUs": ("items", ["id", "title", "description"], 6),
+    "services": ("cards", ["id", "title", "body"], 5),
+    "methodology": ("steps", ["id", "title", "description"], 6),
+    "engagement": ("cards", ["id", "title", "body"], 3),
+    "faq": ("items", ["question", "answer"], 6),
+}
+OUTLINE_SECTIONS = ["hero", "cta"]
+BODY_SECTIONS = ["consulting", "whyUs", "services", "methodology", "engagement", "faq"]
+TOP_LEVEL_FIELDS = ["title", "pageTag"]
+# Fields the prompts ask for that are not required non-empty strings.
+# `slug` and `pageIndex` are overwritten by the pipeline.
+PAYLOAD_FIELDS = ["slug", "title", "pageIndex", "pageTag"]
+STRING_LIST_FIELDS: Dict[str, List[str]] = {"consulting": ["description"]}
+OPTIONAL_ITEM_FIELDS: Dict[str, List[str]] = {"services": ["price"]}
+
+Validator = Callable[[Any], List[str]]
+# Item counts per list section. Edits keep the existing document's counts,
+# which editors may have changed from the SECTION_LISTS defaults.
+Counts = Dict[str, int]
+
+
+def is_text(value: Any) -> bool:
+    return isinstance(value, str) and bool(value.strip())
+
+
+def compile_section(name: str, count: Optional[int] = None) -> Validator:
+    # Field lists are resolved once per section so validating a payload is
+    # only dict lookups and type checks.
+    required = tuple(SECTION_FIELDS.get(name, ()))
+    string_lists = tuple(STRING_LIST_FIELDS.get(name, ()))
+    listed = SECTION_LISTS.get(name)
+    if listed is not None and count is not None:
+        listed = (listed[0], listed[1], count)
+
+    def validate(value: Any) -> List[str]:
+        if not isinstance(value, dict):
+            return [f"{name} must be an object"]
+        errors = [
+            f"{name}.{field} must be a non-empty string"
+            for field in required
+            if not is_text(value.get(field))
+        ]
+        for field in string_lists:
+            items = value.get(field)
+            if not isinstance(items, list) or not all(is_text(item) for item in items):
+                errors.append(f"{name}.{field} must be a list of strings")
+        if listed is None:
+            return errors
+        field, item_fields, count = listed
+        items = value.get(field)
+        if not isinstance(items, list):
+            return errors + [f"{name}.{field} must be a list"]
+        if len(items) != count:
+            errors.append(f"{name}.{field} must have exactly {count} items, got {len(items)}")
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.append(f"{name}.{field}[{index}] must be an object")
+                continue
+            errors.extend(
+                f"{name}.{field}[{index}].{item_field} must be a non-empty string"
+                for item_field in item_fields
+                if not is_text(item.get(item_field))
+            )
+        return errors
+
+    return validate
+
+
+SECTION_VALIDATORS: Dict[str, Validator] = {name: compile_section(name) for name in SECTION_FIELDS}
+
+
+@lru_cache(maxsize=None)
+def counted_validator(name: str, count: int) -> Validator:
+    return compile_section(name, count)
+
+
+def section_validator(name: str, counts: Optional[Counts] = None) -> Optional[Validator]:
+    count = (counts or {}).get(name)
+    if count is None or name not in SECTION_LISTS or count == SECTION_LISTS[name][2]:
+        return SECTION_VALIDATORS.get(name)
+    return counted_validator(name, count)
+
+
+def item_counts(document: Any) -> Counts:
+    # List lengths of an existing document, for validating edits of it.
+    counts: Counts = {}
+    if not isinstance(document, dict):
+        return counts
+    for name, (field, _, _) in SECTION_LISTS.items():
+        items = (document.get(name) or {}).get(field)
+        if isinstance(items, list):
+            counts[name] = len(items)
+    return counts
+
+
+def validate_section(name: str, value: Any, counts: Optional[Counts] = None) -> List[str]:
+    validator = section_validator(name, counts)
+    if validator is None:
+        return [] if isinstance(value, dict) else [f"{name} must be an object"]
+    return validator(value)
+
+
+def payload_errors(payload: dict, counts: Optional[Counts] = None) -> Dict[str, List[str]]:
+    # Validation errors keyed by the top-level field or section they belong
+    # to, so only the failing parts need to be generated again.
+    errors: Dict[str, List[str]] = {}
+    for field in TOP_LEVEL_FIELDS:
+        if not is_text(payload.get(field)):
+            errors[field] = [f"{field} must be a non-empty string"]
+    for name in SECTION_VALIDATORS:
+        section_errors = validate_section(name, payload.get(name), counts)
+        if section_errors:
+            errors[name] = section_errors
+    return errors
+
+
+def validate_payload(payload: Any, counts: Optional[Counts] = None) -> List[str]:
+    if not isinstance(payload, dict):
+        return ["payload must be an object"]
+    return [error for errors in payload_errors(payload, counts).values() for error in errors]
+
+
+def part_errors(payload: Any, parts: List[str], counts: Optional[Counts] = None) -> List[str]:
+    # Problems in `parts` only, for answers that carry a subset of the page.
+    if not isinstance(payload, dict):
+        return ["payload must be an object"]
+    errors = payload_errors(payload, counts)
+    return [error for part in parts for error in errors.get(part, [])]
+
+
+# Strict JSON schemas for structured output, derived from the tables above.
+# Strict mode needs every property listed as required and no additional
+# properties; emptiness is still checked by the local validators.
+STRING: Dict[str, Any] = {"type": "string"}
+
+
+def object_schema(properties: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+def section_schema(name: str, count: Optional[int] = None) -> Dict[str, Any]:
+    properties: Dict[str, Any] = {field: STRING for field in SECTION_FIELDS[name]}
+    for field in STRING_LIST_FIELDS.get(name, []):
+        properties[field] = {"type": "array", "items": STRING}
+    if name in SECTION_LISTS:
+        field, item_fields, default_count = SECTION_LISTS[name]
+        count = default_count if count is None else count
+        item = object_schema(
+            {item_field: STRING for item_field in [*item_fields, *OPTIONAL_ITEM_FIELDS.get(name, [])]}
+        )
+        properties[field] = {"type": "array", "items": item, "minItems": count, "maxItems": count}
+    return object_schema(properties)
+
+
+def payload_schema(parts: List[str], counts: Optional[Counts] = None) -> Dict[str, Any]:
+    # `parts` are top-level string fields and/or section names.
+    counts = counts or {}
+    return object_schema(
+        {
+            part: section_schema(part, counts.get(part)) if part in SECTION_FIELDS else STRING
+            for part in parts
+        }
+    )
+
+
+SECTOR_SCHEMA = payload_schema([*PAYLOAD_FIELDS, *SECTION_FIELDS])
+OUTLINE_SCHEMA = payload_schema([*TOP_LEVEL_FIELDS, "positioning", *OUTLINE_SECTIONS])
+SECTION_JSON_SCHEMAS = {name: section_schema(name) for name in BODY_SECTIONS}
+
+
+def json_format(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    # Responses API `text.format` for strict structured output.
+    return {"type": "json_schema", "name": name, "schema": schema, "strict": True}
+
+
+SECTOR_FORMAT = json_format("sector_page", SECTOR_SCHEMA)
+OUTLINE_FORMAT = json_format("sector_outline", OUTLINE_SCHEMA)
+SECTION_FORMATS = {name: json_format(f"sector_{name}", schema) for name, schema in SECTION_JSON_SCHEMAS.items()}
+
+
+def sector_format(counts: Optional[Counts] = None) -> Dict[str, Any]:
+    # SECTOR_FORMAT unless `counts` differ from the defaults (edits).
+    if not counts or all(
+        counts.get(name, count) == count for name, (_, _, count) in SECTION_LISTS.items()
+    ):
+        return SECTOR_FORMAT
+    return json_format("sector_page", payload_schema([*PAYLOAD_FIELDS, *SECTION_FIELDS], counts))
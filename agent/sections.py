@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+from agent.fetch_pool import run_ordered
+from agent.openai_client import OpenAIClient
+from agent.prompts import (
+    OUTLINE_PROMPT_TEMPLATE,
+    SECTION_PROMPT_TEMPLATE,
+    SECTION_SCHEMAS,
+    SYSTEM_PROMPT,
+)
+from agent.schema import (
+    BODY_SECTIONS,
+    OUTLINE_FORMAT,
+    OUTLINE_SECTIONS,
+    SECTION_FORMATS,
+    SECTION_LISTS,
+    TOP_LEVEL_FIELDS,
+    is_text,
+    validate_section,
+)
+
+SECTION_ATTEMPTS = 2
+DEFAULT_SECTION_WORKERS = 6
+
+
+def with_feedback(prompt: str, problems: List[str]) -> str:
+    if not problems:
+        return prompt
+    listed = "\n".join(f"- {problem}" for problem in problems)
+    return f"{prompt}\nThe previous attempt was rejected:\n{listed}\nReturn a corrected version.\n"
+
+
+def outline_errors(outline: Any) -> List[str]:
+    if not isinstance(outline, dict):
+        return ["outline must be an object"]
+    errors = [
+        f"{field} must be a non-empty string"
+        for field in [*TOP_LEVEL_FIELDS, "positioning"]
+        if not is_text(outline.get(field))
+    ]
+    for name in OUTLINE_SECTIONS:
+        errors.extend(validate_section(name, outline.get(name)))
+    return errors
+
+
+def generate_outline(client: OpenAIClient, context: str, structured: bool = True) -> dict:
+    prompt = OUTLINE_PROMPT_TEMPLATE.format(context=context)
+    text_format = OUTLINE_FORMAT if structured else None
+    problems: List[str] = []
+    for _ in range(SECTION_ATTEMPTS):
+        outline = client.generate_json(
+            SYSTEM_PROMPT, with_feedback(prompt, problems), text_format, validate=outline_errors
+        )
+        problems = outline_errors(outline)
+        if not problems:
+            return outline
+    raise ValueError(f"Outline failed validation: {'; '.join(problems)}")
+
+
+def section_prompt(context: str, outline: dict, name: str) -> str:
+    field, _, count = SECTION_LISTS[name]
+    return SECTION_PROMPT_TEMPLATE.format(
+        context=context,
+        title=outline["title"],
+        hero_title=outline["hero"]["title"],
+        hero_subtitle=outline["hero"]["subtitle"],
+        positioning=outline["positioning"],
+        section=name,
+        schema=SECTION_SCHEMAS[name],
+        count=count,
+        field=field,
+    )
+
+
+def unwrap_section(name: str, value: Any) -> Any:
+    # Models sometimes answer {"faq": {...}} instead of the bare section.
+    if isinstance(value, dict) and list(value) == [name]:
+        return value[name]
+    return value
+
+
+def section_errors(name: str, value: Any) -> List[str]:
+    return validate_section(name, unwrap_section(name, value))
+
+
+def generate_sections(
+    client: OpenAIClient,
+    context: str,
+    max_workers: int = DEFAULT_SECTION_WORKERS,
+    on_section: Optional[Callable[[str, Any], None]] = None,
+    structured: bool = True,
+) -> dict:
+    # A small outline call fixes the headline and positioning, then every
+    # body section is generated concurrently against the same context. Only
+    # sections that fail validation (or whose call failed) are requested
+    # again, with the validation errors appended to their prompt.
+    outline = generate_outline(client, context, structured)
+    if on_section is not None:
+        for name in [*TOP_LEVEL_FIELDS, *OUTLINE_SECTIONS]:
+            on_section(name, outline[name])
+    prompts = {name: section_prompt(context, outline, name) for name in BODY_SECTIONS}
+    problems: Dict[str, List[str]] = {name: [] for name in BODY_SECTIONS}
+    call_errors: Dict[str, str] = {}
+    sections: Dict[str, Any] = {}
+    pending = list(BODY_SECTIONS)
+    for _ in range(SECTION_ATTEMPTS):
+        calls = [
+            partial(
+                client.generate_json,
+                SYSTEM_PROMPT,
+                with_feedback(prompts[name], problems[name]),
+                SECTION_FORMATS[name] if structured else None,
+                validate=partial(section_errors, name),
+            )
+            for name in pending
+        ]
+        results = run_ordered(calls, max_workers=max_workers, per_key=max_workers)
+        failed = []
+        for name, result in zip(pending, results):
+            if not result.ok:
+                problems[name] = []
+                call_errors[name] = str(result.error)
+                failed.append(name)
+                continue
+            call_errors.pop(name, None)
+            value = unwrap_section(name, result.value)
+            problems[name] = validate_section(name, value)
+            if problems[name]:
+                failed.append(name)
+                continue
+            sections[name] = value
+            if on_section is not None:
+                on_section(name, value)
+        pending = failed
+        if not pending:
+            break
+    if pending:
+        details = [
+            f"{name}: {call_errors.get(name) or '; '.join(problems[name])}" for name in pending
+        ]
+        raise ValueError(f"Sections failed validation: {' | '.join(details)}")
+
+    return {
+        "title": outline["title"],
+        "pageIndex": "",
+        "pageTag": outline["pageTag"],
+        "hero": outline["hero"],
+        **{name: sections[name] for name in BODY_SECTIONS},
+        "cta": outline["cta"],
+    }
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from agent.cache import cache_dir
+from agent.ratelimit import RateLimiter
+from agent.sanity_client import api_url, sanity_request
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+FULL_REFRESH_AFTER = 3600.0
+RESERVATION_TTL = 900.0
+SECTOR_FIELDS = '{_id, "slug": slug.current, _createdAt, _updatedAt}'
+
+
+class SlugIndex:
+    # Local mirror of `*[_type == "sector"] | order(_createdAt asc)` used to
+    # assign pageIndex values without re-reading every slug on each publish.
+    # Refreshes only fetch documents updated since the last one seen; a count
+    # mismatch (deleted documents) or an old snapshot triggers a full resync.
+    # New slugs get reserved indexes so concurrent publishers, in this process
+    # or others sharing the cache file, never hand out the same number.
+    def __init__(
+        self,
+        project_id: str,
+        dataset: str,
+        api_version: str,
+        token: str,
+        path: Optional[str] = None,
+        full_refresh_after: float = FULL_REFRESH_AFTER,
+    ):
+        self.project_id = project_id
+        self.dataset = dataset
+        self.api_version = api_version
+        self.token = token
+        self.path = path or os.path.join(cache_dir(), f"slug-index-{project_id}-{dataset}.json")
+        self.full_refresh_after = full_refresh_after
+        self.lock = threading.RLock()
+        self.documents: Dict[str, Dict[str, str]] = {}
+        self.reserved: Dict[str, Dict[str, Any]] = {}
+        self.last_updated = ""
+        self.full_at = 0.0
+        self.positions: Dict[str, int] = {}
+        self.length = 0
+
+    def query(
+        self,
+        query: str,
+        params: Optional[Dict[str, str]] = None,
+        limiter: Optional[RateLimiter] = None,
+    ) -> Any:
+        url = api_url(self.project_id, self.api_version, "query", self.dataset)
+        request_params = {"query": query}
+        for key, value in (params or {}).items():
+            request_params[f"${key}"] = json.dumps(value)
+        response = sanity_request(
+            "query",
+            "GET",
+            url,
+            limiter=limiter,
+            headers={"Authorization": f"Bearer {self.token}"},
+            params=request_params,
+            timeout=30,
+        )
+        if not response.ok:
+            raise RuntimeError(f"Sanity query failed: {response.status_code} {response.text}")
+        return response.json().get("result")
+
+    @contextlib.contextmanager
+    def locked(self) -> Iterator[None]:
+        with self.lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path + ".lock", "a") as handle:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_EX)
+                try:
+                    self.load()
+                    yield
+                    self.save()
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as handle:
+                state = json.load(handle)
+        except (OSError, ValueError):
+            return
+        self.documents = state.get("documents", {})
+        self.reserved = state.get("reserved", {})
+        self.last_updated = state.get("lastUpdated", "")
+        self.full_at = state.get("fullAt", 0.0)
+        self.rebuild()
+
+    def save(self) -> None:
+        state = {
+            "documents": self.documents,
+            "reserved": self.reserved,
+            "lastUpdated": self.last_updated,
+            "fullAt": self.full_at,
+        }
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(state, handle)
+        os.replace(tmp_path, self.path)
+
+    def rebuild(self) -> None:
+        ordered: List[Tuple[str, str, str]] = sorted(
+            (doc.get("createdAt", ""), doc_id, doc.get("slug") or "")
+            for doc_id, doc in self.documents.items()
+        )
+        positions: Dict[str, int] = {}
+        for position, (_, _, slug) in enumerate(ordered, start=1):
+            if slug and slug not in positions:
+                positions[slug] = position
+        self.positions = positions
+        self.length = len(ordered)
+        # Drop reservations that Sanity has caught up with, that expired, or
+        # whose number is now taken by a document created in the meantime.
+        now = time.time()
+        self.reserved = {
+            slug: reservation
+            for slug, reservation in self.reserved.items()
+            if slug not in positions
+            and reservation["index"] > self.length
+            and now - reservation["at"] < RESERVATION_TTL
+        }
+
+    def merge(self, rows: List[Dict[str, Any]]) -> None:
+        for row in rows:
+            if not row.get("slug"):
+                self.documents.pop(row["_id"], None)
+                continue
+            self.documents[row["_id"]] = {
+                "slug": row["slug"],
+                "createdAt": row.get("_createdAt", ""),
+            }
+            self.last_updated = max(self.last_updated, row.get("_updatedAt", ""))
+
+    def full_refresh(self, limiter: Optional[RateLimiter] = None) -> None:
+        rows = self.query(f'*[_type == "sector"]{SECTOR_FIELDS}', limiter=limiter) or []
+        self.documents = {}
+        self.last_updated = ""
+        self.merge(rows)
+        self.full_at = time.time()
+
+    def incremental_refresh(self, limiter: Optional[RateLimiter] = None) -> None:
+        result = self.query(
+            '{"count": count(*[_type == "sector" && defined(slug.current)]),'
+            f' "changed": *[_type == "sector" && _updatedAt > $since]{SECTOR_FIELDS}}}',
+            {"since": self.last_updated},
+            limiter=limiter,
+        ) or {}
+        self.merge(result.get("changed") or [])
+        if result.get("count") != len(self.documents):
+            self.full_refresh(limiter)
+
+    def refresh_locked(self, limiter: Optional[RateLimiter] = None) -> None:
+        if not self.documents or time.time() - self.full_at > self.full_refresh_after:
+            self.full_refresh(limiter)
+        else:
+            self.incremental_refresh(limiter)
+        self.rebuild()
+
+    def refresh(self) -> None:
+        with self.locked():
+            self.refresh_locked()
+
+    def assign(
+        self,
+        slugs: List[str],
+        refresh: bool = True,
+        limiter: Optional[RateLimiter] = None,
+    ) -> Dict[str, int]:
+        # Returns 1-based page indexes for every slug, reserving the next free
+        # index for slugs Sanity has not seen yet.
+        with self.locked():
+            if refresh:
+                self.refresh_locked(limiter)
+            assigned: Dict[str, int] = {}
+            for slug in slugs:
+                if slug in self.positions:
+                    assigned[slug] = self.positions[slug]
+                    continue
+                reservation = self.reserved.get(slug)
+                if reservation is None:
+                    taken = [item["index"] for item in self.reserved.values()]
+                    index = max([self.length, *taken]) + 1
+                    reservation = {"index": index, "at": time.time()}
+                    self.reserved[slug] = reservation
+                reservation["at"] = time.time()
+                assigned[slug] = reservation["index"]
+            return assigned
+
+    def page_index(self, slug: str, refresh: bool = True) -> int:
+        return self.assign([slug], refresh=refresh)[slug]
+
+
+_indexes: Dict[Tuple[str, str], SlugIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_slug_index(project_id: str, dataset: str, api_version: str, token: str) -> SlugIndex:
+    with _indexes_lock:
+        key = (project_id, dataset)
+        index = _indexes.get(key)
+        if index is None:
+            index = SlugIndex(project_id, dataset, api_version, token)
+            _indexes[key] = index
+        return index
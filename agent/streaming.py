@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from agent.openai_client import OpenAIClient, parse_json
+from agent.schema import SECTION_FIELDS, Counts, validate_payload, validate_section
+from agent.sections import with_feedback
+
+STREAM_ATTEMPTS = 2
+# Give up on a response that has not opened its JSON object by this point.
+MAX_PREAMBLE_CHARS = 200
+
+SectionCallback = Callable[[str, Any], None]
+
+
+class StreamAbort(ValueError):
+    def __init__(self, problems: List[str]):
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+
+class JsonObjectStream:
+    # Incremental scanner for a single top-level JSON object. `feed` returns
+    # the (key, value) members that completed within the new text, so callers
+    # can act on each section as soon as its closing brace arrives.
+    def __init__(self) -> None:
+        self.buffer = ""
+        self.position = 0
+        self.start = -1
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.key: Optional[str] = None
+        self.key_start = -1
+        self.value_start = -1
+        self.end = -1
+        self.done = False
+
+    @property
+    def text(self) -> str:
+        if self.start < 0:
+            return ""
+        return self.buffer[self.start : self.end] if self.done else self.buffer[self.start :]
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self.buffer += chunk
+        members: List[Tuple[str, Any]] = []
+        buffer = self.buffer
+        while self.position < len(buffer) and not self.done:
+            index = self.position
+            char = buffer[index]
+            self.position += 1
+            if self.start < 0:
+                if char == "{":
+                    self.start = index
+                    self.depth = 1
+                continue
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1 and self.key_start >= 0:
+                        self.key = json.loads(buffer[self.key_start : index + 1])
+                        self.key_start = -1
+                continue
+            if char == '"':
+                self.in_string = True
+                if self.depth == 1 and self.key is None and self.value_start < 0:
+                    self.key_start = index
+                elif self.depth == 1 and self.value_start < 0:
+                    self.value_start = index
+            elif char == ":" and self.depth == 1:
+                self.value_start = -1
+            elif char in "{[":
+                if self.depth == 1 and self.value_start < 0:
+                    self.value_start = index
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 1:
+                    continue
+                if self.depth == 0:
+                    self.flush(index, members)
+                    self.end = index + 1
+                    self.done = True
+            elif char == "," and self.depth == 1:
+                self.flush(index, members)
+            elif self.depth == 1 and self.key is not None and self.value_start < 0 and not char.isspace():
+                # Bare scalar (number, true/false/null).
+                self.value_start = index
+        return members
+
+    def flush(self, end: int, members: List[Tuple[str, Any]]) -> None:
+        if self.key is not None and self.value_start >= 0:
+            members.append((self.key, json.loads(self.buffer[self.value_start : end])))
+        self.key = None
+        self.value_start = -1
+
+
+def stream_json(
+    client: OpenAIClient,
+    system_prompt: str,
+    user_prompt: str,
+    on_section: Optional[SectionCallback] = None,
+    attempts: int = STREAM_ATTEMPTS,
+    text_format: Optional[Dict[str, Any]] = None,
+    counts: Optional[Counts] = None,
+) -> dict:
+    # Sections are validated as they complete. The first off-schema section
+    # stops the stream (no more output tokens are paid for) and the request
+    # is retried with the validation errors appended to the prompt.
+    problems: List[str] = []
+    for _ in range(attempts):
+        try:
+            return stream_once(
+                client,
+                system_prompt,
+                with_feedback(user_prompt, problems),
+                on_section,
+                text_format,
+                counts,
+            )
+        except StreamAbort as exc:
+            problems = exc.problems
+    raise ValueError(f"Model output failed validation: {'; '.join(problems)}")
+
+
+def stream_once(
+    client: OpenAIClient,
+    system_prompt: str,
+    user_prompt: str,
+    on_section: Optional[SectionCallback],
+    text_format: Optional[Dict[str, Any]] = None,
+    counts: Optional[Counts] = None,
+) -> dict:
+    cached = client.lookup(system_prompt, user_prompt, text_format)
+    if cached is not None:
+        if on_section is not None:
+            for name, value in cached.items():
+                on_section(name, value)
+        return cached
+
+    parser = JsonObjectStream()
+    deltas = client.stream_text(system_prompt, user_prompt, text_format)
+    try:
+        for delta in deltas:
+            try:
+                members = parser.feed(delta)
+            except ValueError as exc:
+                raise StreamAbort([f"invalid JSON: {exc}"])
+            if parser.start < 0 and len(parser.buffer) > MAX_PREAMBLE_CHARS:
+                raise StreamAbort(["response must be a single JSON object"])
+            for name, value in members:
+                if name in SECTION_FIELDS:
+                    section_problems = validate_section(name, value, counts)
+                    if section_problems:
+                        raise StreamAbort(section_problems)
+                if on_section is not None:
+                    on_section(name, value)
+        # The stream is drained after the object closes so the final
+        # `response.completed` event (token usage) is still recorded.
+    finally:
+        deltas.close()
+
+    if not parser.done:
+        raise StreamAbort(["response ended before the JSON object was complete"])
+    payload = parse_json(parser.text)
+    missing = validate_payload(payload, counts)
+    if missing:
+        raise StreamAbort(missing)
+    client.remember(system_prompt, user_prompt, payload, text_format)
+    return payload
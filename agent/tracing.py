@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from typing import IO, Any, Callable, Dict, Iterator, Optional, Tuple
+
+from agent.usage import usage_numbers
+
+Sink = Callable[[Dict[str, Any]], None]
+
+# USD per million tokens: (input, cached input, output). Matched on the
+# longest model-name prefix; OPENAI_PRICE_PER_MTOK="in,cached,out" overrides.
+MODEL_PRICES: Dict[str, Tuple[float, float, float]] = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-5-nano": (0.05, 0.005, 0.40),
+    "gpt-5-mini": (0.25, 0.025, 2.00),
+    "gpt-5": (1.25, 0.125, 10.00),
+}
+
+
+def model_prices(model: str) -> Optional[Tuple[float, float, float]]:
+    override = os.getenv("OPENAI_PRICE_PER_MTOK", "").strip()
+    if override:
+        try:
+            prices = tuple(float(part) for part in override.split(","))
+        except ValueError:
+            return None
+        return prices if len(prices) == 3 else None  # type: ignore[return-value]
+    matches = [prefix for prefix in MODEL_PRICES if model.startswith(prefix)]
+    return MODEL_PRICES[max(matches, key=len)] if matches else None
+
+
+def estimate_cost(
+    model: str, input_tokens: int, cached_tokens: int, output_tokens: int
+) -> Optional[float]:
+    prices = model_prices(model)
+    if prices is None:
+        return None
+    input_price, cached_price, output_price = prices
+    cost = (
+        (input_tokens - cached_tokens) * input_price
+        + cached_tokens * cached_price
+        + output_tokens * output_price
+    ) / 1_000_000
+    return round(cost, 6)
+
+
+def token_attrs(
+    model: str, input_tokens: int, cached_tokens: int, output_tokens: int
+) -> Dict[str, Any]:
+    return {
+        "inputTokens": input_tokens,
+        "cachedTokens": cached_tokens,
+        "outputTokens": output_tokens,
+        "costUsd": estimate_cost(model, input_tokens, cached_tokens, output_tokens),
+    }
+
+
+def usage_attrs(model: str, usage: Any) -> Dict[str, Any]:
+    # Span attributes for a Responses API `usage` object.
+    if usage is None:
+        return {}
+    return token_attrs(model, *usage_numbers(usage))
+
+
+class Tracer:
+    # Receives one dict per event; writes are serialised so lines from pool
+    # threads never interleave.
+    def __init__(self, sink: Sink):
+        self.sink = sink
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def emit(self, record: Dict[str, Any]) -> None:
+        with self.lock:
+            self.sink(record)
+
+
+def stream_sink(stream: IO[str]) -> Sink:
+    def write(record: Dict[str, Any]) -> None:
+        stream.write(json.dumps(record, default=str) + "\n")
+        stream.flush()
+
+    return write
+
+
+# Like agent.usage, the active tracer travels with the context, so spans
+# recorded in to_thread and run_ordered workers reach the run that started them.
+_current: contextvars.ContextVar[Optional[Tracer]] = contextvars.ContextVar(
+    "agent_tracer", default=None
+)
+
+
+@contextlib.contextmanager
+def tracing(tracer: Optional[Tracer]) -> Iterator[None]:
+    token = _current.set(tracer)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+class Span:
+    __slots__ = ("name", "attrs")
+
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+@contextlib.contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span]:
+    # Emits {"event": "span", "name", "startMs", "ms", ...attrs} when the
+    # block exits. Without an active tracer this only builds the Span.
+    current = Span(name, attrs)
+    tracer = _current.get()
+    if tracer is None:
+        yield current
+        return
+    started = time.perf_counter()
+    error: Optional[str] = None
+    try:
+        yield current
+    except Exception as exc:
+        error = type(exc).__name__
+        raise
+    finally:
+        record: Dict[str, Any] = {
+            "event": "span",
+            "name": name,
+            "startMs": round((started - tracer.started) * 1000, 2),
+            "ms": round((time.perf_counter() - started) * 1000, 2),
+            **current.attrs,
+        }
+        if error is not None:
+            record["error"] = error
+        tracer.emit(record)
+
+
+@contextlib.contextmanager
+def event_log(path: str) -> Iterator[Tracer]:
+    # NDJSON events to `path`, or to stderr for "-". Appends, so several runs
+    # can share one log.
+    if path == "-":
+        tracer = Tracer(stream_sink(sys.stderr))
+        with tracing(tracer):
+            yield tracer
+        return
+    with open(path, "a", encoding="utf-8") as handle:
+        tracer = Tracer(stream_sink(handle))
+        with tracing(tracer):
+            yield tracer
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from agent.cache import cache_enabled, get_cache
+from agent.tracing import span
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_JITTER = 0.5
+DEFAULT_MAX_BYTES = 5_000_000
+CHUNK_SIZE = 64 * 1024
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+USER_AGENT = "EdubaSectorAgent/1.0 (+https://eduba.io)"
+
+# Freshness windows (seconds) for crawled content, keyed by media type.
+CACHE_TTLS: Dict[str, float] = {
+    "text/html": 24 * 3600,
+    "application/xml": 24 * 3600,
+    "text/xml": 24 * 3600,
+    "application/x-gzip": 24 * 3600,
+    "application/gzip": 24 * 3600,
+}
+DEFAULT_CACHE_TTL = 6 * 3600
+CACHED_HEADERS = ("content-type", "etag", "last-modified")
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def accept_encoding() -> str:
+    # urllib3 only decodes brotli when one of these packages is installed.
+    for module in ("brotli", "brotlicffi"):
+        try:
+            __import__(module)
+            return "gzip, deflate, br"
+        except ImportError:
+            continue
+    return "gzip, deflate"
+
+
+def build_retry(retries: int, backoff: float, jitter: float) -> Retry:
+    options: Dict[str, Any] = {
+        "total": retries,
+        "connect": retries,
+        "read": retries,
+        "status": retries,
+        "backoff_factor": backoff,
+        "status_forcelist": RETRY_STATUSES,
+        # Sanity mutations use createOrReplace/patch, which are safe to replay.
+        "allowed_methods": frozenset(Retry.DEFAULT_ALLOWED_METHODS | {"POST"}),
+        "respect_retry_after_header": True,
+        "raise_on_status": False,
+    }
+    try:
+        return Retry(backoff_jitter=jitter, **options)
+    except TypeError:
+        # urllib3 < 2 has no jitter support.
+        return Retry(**options)
+
+
+def build_session(
+    pool_size: int = DEFAULT_POOL_SIZE,
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = DEFAULT_BACKOFF,
+    jitter: float = DEFAULT_JITTER,
+) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=build_retry(retries, backoff, jitter),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(
+        {"User-Agent": USER_AGENT, "Accept-Encoding": accept_encoding()}
+    )
+    return session
+
+
+def get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session(
+                    pool_size=int(os.getenv("AGENT_HTTP_POOL_SIZE", DEFAULT_POOL_SIZE)),
+                    retries=int(os.getenv("AGENT_HTTP_RETRIES", DEFAULT_RETRIES)),
+                    backoff=float(os.getenv("AGENT_HTTP_BACKOFF", DEFAULT_BACKOFF)),
+                )
+    return _session
+
+
+def configure_session(**options: Any) -> requests.Session:
+    global _session
+    with _session_lock:
+        _session = build_session(**options)
+    return _session
+
+
+def request(method: str, url: str, timeout: float = 30, **kwargs: Any) -> requests.Response:
+    return get_session().request(method, url, timeout=timeout, **kwargs)
+
+
+@dataclass
+class HttpResult:
+    url: str
+    status_code: int
+    headers: Dict[str, str] = field(default_factory=dict)
+    content: bytes = b""
+    truncated: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def encoding(self) -> str:
+        content_type = self.headers.get("content-type", "")
+        for part in content_type.split(";")[1:]:
+            key, _, value = part.strip().partition("=")
+            if key.lower() == "charset" and value:
+                return value.strip("\"'")
+        return "utf-8"
+
+    @property
+    def text(self) -> str:
+        try:
+            return self.content.decode(self.encoding, errors="replace")
+        except LookupError:
+            return self.content.decode("utf-8", errors="replace")
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} error for url: {self.url}")
+
+
+def fetch(
+    url: str,
+    timeout: float = 15,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    headers: Optional[Dict[str, str]] = None,
+) -> HttpResult:
+    with get_session().get(url, timeout=timeout, headers=headers, stream=True) as response:
+        chunks = []
+        size = 0
+        truncated = False
+        for chunk in response.iter_content(CHUNK_SIZE):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes:
+                truncated = True
+                break
+        body = b"".join(chunks)[:max_bytes]
+        return HttpResult(
+            url=response.url,
+            status_code=response.status_code,
+            headers={key.lower(): value for key, value in response.headers.items()},
+            content=body,
+            truncated=truncated,
+        )
+
+
+def cache_ttl(content_type: str) -> float:
+    media_type = content_type.split(";")[0].strip().lower()
+    return CACHE_TTLS.get(media_type, DEFAULT_CACHE_TTL)
+
+
+def cached_fetch(
+    url: str,
+    timeout: float = 15,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> HttpResult:
+    with span("http.fetch", url=url) as current:
+        response, cache_state = fetch_through_cache(url, timeout, max_bytes)
+        current.set(status=response.status_code, bytes=len(response.content), cache=cache_state)
+        return response
+
+
+def fetch_through_cache(url: str, timeout: float, max_bytes: int) -> Tuple[HttpResult, str]:
+    # Returns the response and how the cache served it: off, hit,
+    # revalidated (304) or miss.
+    if not cache_enabled("http"):
+        return fetch(url, timeout=timeout, max_bytes=max_bytes), "off"
+
+    cache = get_cache("http")
+    entry = cache.get(url, allow_stale=True)
+    if entry is not None:
+        stored = HttpResult(
+            url=entry.meta.get("url", url),
+            status_code=200,
+            headers=entry.meta.get("headers", {}),
+            content=entry.value,
+        )
+        if entry.fresh:
+            return stored, "hit"
+        validators: Dict[str, str] = {}
+        if stored.headers.get("etag"):
+            validators["If-None-Match"] = stored.headers["etag"]
+        if stored.headers.get("last-modified"):
+            validators["If-Modified-Since"] = stored.headers["last-modified"]
+        if validators:
+            response = fetch(url, timeout=timeout, max_bytes=max_bytes, headers=validators)
+            if response.status_code == 304:
+                cache.touch(url, cache_ttl(stored.headers.get("content-type", "")))
+                return stored, "revalidated"
+            store_response(url, response)
+            return response, "miss"
+
+    response = fetch(url, timeout=timeout, max_bytes=max_bytes)
+    store_response(url, response)
+    return response, "miss"
+
+
+def store_response(url: str, response: HttpResult) -> None:
+    if response.status_code != 200 or response.truncated:
+        return
+    if "no-store" in response.headers.get("cache-control", "").lower():
+        return
+    headers = {
+        key: response.headers[key] for key in CACHED_HEADERS if key in response.headers
+    }
+    get_cache("http").set(
+        url,
+        response.content,
+        ttl=cache_ttl(headers.get("content-type", "")),
+        meta={"url": response.url, "headers": headers},
+    )
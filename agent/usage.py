@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, Optional
+
+
+@dataclass
+class TokenUsage:
+    calls: int = 0
+    input_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, input_tokens: int, cached_tokens: int, output_tokens: int) -> None:
+        with self.lock:
+            self.calls += 1
+            self.input_tokens += input_tokens
+            self.cached_tokens += cached_tokens
+            self.output_tokens += output_tokens
+
+    @property
+    def cache_hit_rate(self) -> float:
+        return self.cached_tokens / self.input_tokens if self.input_tokens else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "inputTokens": self.input_tokens,
+            "cachedTokens": self.cached_tokens,
+            "outputTokens": self.output_tokens,
+            "cacheHitRate": round(self.cache_hit_rate, 4),
+        }
+
+
+# Per-run accumulator. asyncio.to_thread copies the context, so usage from
+# model calls made in worker threads still lands on the run that started them.
+_current: contextvars.ContextVar[Optional[TokenUsage]] = contextvars.ContextVar(
+    "agent_token_usage", default=None
+)
+
+
+@contextlib.contextmanager
+def track_usage(usage: Optional[TokenUsage]) -> Iterator[None]:
+    token = _current.set(usage)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def usage_numbers(usage: Any) -> tuple:
+    # Works for SDK objects and plain dicts.
+    def read(obj: Any, name: str) -> Any:
+        return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+    details = read(usage, "input_tokens_details")
+    cached = read(details, "cached_tokens") if details is not None else 0
+    return (read(usage, "input_tokens") or 0, cached or 0, read(usage, "output_tokens") or 0)
+
+
+def record_usage(usage: Any, total: Optional[TokenUsage] = None) -> None:
+    if usage is None:
+        return
+    numbers = usage_numbers(usage)
+    if total is not None:
+        total.add(*numbers)
+    current = _current.get()
+    if current is not None:
+        current.add(*numbers)
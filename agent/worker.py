@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from agent.cli import build_parser, run
+from agent.config import Settings, get_settings
+from agent.discovery import DEFAULT_DISCOVERY_LIMIT, discover_category_urls
+from agent.discovery_manifest import save_manifest
+from agent.openai_client import OpenAIClient
+from agent.pipeline import build_client
+from agent.tracing import Tracer, tracing
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MAX_JOBS = 4
+# /cli is unauthenticated, so CLI flags that write files wherever the worker
+# can are refused; events come back in the response instead.
+BLOCKED_FLAGS = ("report", "events", "profile")
+
+
+def parse_cli_args(argv: List[str]) -> argparse.Namespace:
+    # argparse prints usage to stderr and exits with status 2; raise the
+    # usage and message instead so /cli can return them.
+    parser = build_parser()
+    parser.prog = "agent.cli"
+
+    def error(message: str) -> None:
+        raise SystemExit(f"{parser.format_usage().strip()}\n{parser.prog}: error: {message}")
+
+    parser.error = error  # type: ignore[method-assign]
+    return parser.parse_args(argv)
+
+
+def check_worker_args(args: argparse.Namespace, doc_roots: List[str]) -> None:
+    blocked = [f"--{name}" for name in BLOCKED_FLAGS if getattr(args, name, None)]
+    if blocked:
+        raise SystemExit(f"Not allowed through the worker: {', '.join(blocked)}")
+    # Documents are read and sent to the model, so only uploads saved under
+    # the document roots (the routes use the system temp dir) are accepted.
+    for doc in args.doc:
+        path = os.path.realpath(doc)
+        if not any(path.startswith(root + os.sep) for root in doc_roots):
+            raise SystemExit(f"Documents must be under {', '.join(doc_roots)}: {doc}")
+
+
+class AgentWorker:
+    def __init__(
+        self,
+        settings: Settings,
+        max_jobs: int = DEFAULT_MAX_JOBS,
+        doc_roots: Optional[List[str]] = None,
+    ):
+        self.settings = settings
+        self.client: OpenAIClient = build_client(settings)
+        self.slots = threading.BoundedSemaphore(max_jobs)
+        self.doc_roots = [
+            os.path.realpath(root).rstrip(os.sep) for root in doc_roots or [tempfile.gettempdir()]
+        ]
+
+    def run_cli(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        argv = [str(item) for item in body.get("args", [])]
+        args = parse_cli_args(argv)
+        check_worker_args(args, self.doc_roots)
+        # Span events are collected per job and returned with the result.
+        events: List[Dict[str, Any]] = []
+        with self.slots, tracing(Tracer(events.append)):
+            output = run(args, self.settings, self.client)
+        url = None
+        if output.startswith("Published:"):
+            url = output.replace("Published:", "", 1).strip()
+        return {"output": output, "url": url, "events": events}
+
+    def discover(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        website = str(body.get("website", "")).strip()
+        if not website:
+            raise SystemExit("website is required")
+        limit = int(body.get("limit", DEFAULT_DISCOVERY_LIMIT)) or None
+        with self.slots:
+            categories = discover_category_urls(website, limit=limit)
+        manifest = save_manifest(website, categories)
+        return {"manifestId": manifest.manifest_id, "categories": categories}
+
+
+def make_handler(worker: AgentWorker) -> type:
+    routes: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+        "/cli": worker.run_cli,
+        "/discover": worker.discover,
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            if self.path == "/health":
+                cache = worker.client.cache
+                self.send_json(
+                    200,
+                    {
+                        "ok": True,
+                        "llmCache": cache.stats.as_dict() if cache else None,
+                        "usage": worker.client.usage.as_dict(),
+                    },
+                )
+            else:
+                self.send_json(404, {"error": "Not found"})
+
+        def do_POST(self) -> None:
+            route = routes.get(self.path)
+            if route is None:
+                self.send_json(404, {"error": "Not found"})
+                return
+            status, data = self.dispatch(route)
+            self.send_json(status, data)
+
+        def dispatch(
+            self, route: Callable[[Dict[str, Any]], Dict[str, Any]]
+        ) -> Tuple[int, Dict[str, Any]]:
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                return 400, {"error": "Invalid JSON body"}
+            try:
+                return 200, route(body)
+            except SystemExit as exc:
+                # argparse and cli.run signal bad arguments with SystemExit.
+                return 400, {"error": str(exc.code or "Invalid arguments")}
+            except Exception as exc:
+                return 500, {"error": str(exc), "details": traceback.format_exc()}
+
+        def send_json(self, status: int, data: Dict[str, Any]) -> None:
+            encoded = json.dumps(data).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(encoded)))
+            self.end_headers()
+            self.wfile.write(encoded)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            return
+
+    return Handler
+
+
+def serve(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    max_jobs: int = DEFAULT_MAX_JOBS,
+    settings: Optional[Settings] = None,
+    doc_roots: Optional[List[str]] = None,
+) -> None:
+    worker = AgentWorker(settings or get_settings(), max_jobs=max_jobs, doc_roots=doc_roots)
+    server = ThreadingHTTPServer((host, port), make_handler(worker))
+    server.daemon_threads = True
+    print(f"Agent worker listening on http://{host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the resident Eduba agent worker")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Bind address")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Bind port")
+    parser.add_argument(
+        "--max-jobs",
+        type=int,
+        default=DEFAULT_MAX_JOBS,
+        help="Maximum jobs running at once",
+    )
+    parser.add_argument(
+        "--doc-root",
+        action="append",
+        default=[],
+        help="Directory --doc paths must be under (default: the system temp dir)",
+    )
+    args = parser.parse_args()
+    serve(args.host, args.port, args.max_jobs, doc_roots=args.doc_root or None)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@ import { spawn } from "child_process";
 import { promises as fs } from "fs";
 import os from "os";
 import path from "path";
+import { AgentEvent, splitAgentEvents, summarizeAgentEvents } from "@/lib/agentEvents";
+import { callAgentWorker } from "@/lib/agentWorker";
 
 export const runtime = "nodejs";
 export const dynamic = "force-dynamic";
@@ -29,6 +31,7 @@ export async function POST(request: Request) {
   const sector = formData.get("sector")?.toString().trim();
   const slug = formData.get("slug")?.toString().trim();
   const website = formData.get("website")?.toString().trim();
+  const discovery = formData.get("discovery")?.toString().trim();
   const context = formData.get("context")?.toString().trim() || "";
   const links = parseLinks(formData.get("links")?.toString() || "");
   const autoLinks = formData
@@ -76,6 +79,9 @@ export async function POST(request: Request) {
 
     if (website) {
       args.push("--website", website);
+      if (discovery) {
+        args.push("--discovery", discovery);
+      }
     }
 
     include.forEach((category) => args.push("--include", category));
@@ -86,6 +92,28 @@ export async function POST(request: Request) {
       args.push("--link", link)
     );
 
+    const worker = await callAgentWorker<{
+      output: string;
+      url: string | null;
+      events?: AgentEvent[];
+    }>("/cli", { args: args.slice(2) });
+    if (worker) {
+      if (!worker.ok) {
+        return NextResponse.json(
+          { error: "Agent run failed", details: worker.data.error },
+          { status: 500 }
+        );
+      }
+      const timings = summarizeAgentEvents(worker.data.events || []);
+      console.info("create-page timings", JSON.stringify(timings));
+      return NextResponse.json({
+        url: worker.data.url,
+        output: worker.data.output,
+        timings,
+      });
+    }
+
+    args.push("--events", "-");
     const pythonBin = process.env.PYTHON_BIN || "python3";
     const child = spawn(pythonBin, args, {
       cwd: process.cwd(),
@@ -100,11 +128,13 @@ export async function POST(request: Request) {
     });
 
     const stdout = getStdout();
-    const stderr = getStderr();
+    const { events, log } = splitAgentEvents(getStderr());
+    const timings = summarizeAgentEvents(events);
+    console.info("create-page timings", JSON.stringify(timings));
 
     if (exitCode !== 0) {
       return NextResponse.json(
-        { error: "Agent run failed", details: stderr || stdout },
+        { error: "Agent run failed", details: log || stdout, timings },
         { status: 500 }
       );
     }
@@ -115,7 +145,7 @@ export async function POST(request: Request) {
       .find((line) => line.startsWith("Published:"));
     const url = publishedLine ? publishedLine.replace("Published:", "").trim() : null;
 
-    return NextResponse.json({ url, output: stdout });
+    return NextResponse.json({ url, output: stdout, timings });
   } catch (error) {
     const message = error instanceof Error ? error.message : "Unknown error";
     return NextResponse.json({ error: message }, { status: 500 });
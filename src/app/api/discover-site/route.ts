@@ -1,9 +1,15 @@
 import { NextResponse } from "next/server";
 import { spawn } from "child_process";
+import { callAgentWorker } from "@/lib/agentWorker";
 
 export const runtime = "nodejs";
 export const dynamic = "force-dynamic";
 
+type DiscoveryResult = {
+  manifestId: string;
+  categories: Record<string, string[]>;
+};
+
 function collectOutput(stream: NodeJS.ReadableStream) {
   let data = "";
   stream.on("data", (chunk) => {
@@ -23,6 +29,19 @@ export async function POST(request: Request) {
     );
   }
 
+  const worker = await callAgentWorker<DiscoveryResult>("/discover", {
+    website,
+  });
+  if (worker) {
+    if (!worker.ok) {
+      return NextResponse.json(
+        { error: "Discovery failed", details: worker.data.error },
+        { status: 500 }
+      );
+    }
+    return NextResponse.json(worker.data);
+  }
+
   const pythonBin = process.env.PYTHON_BIN || "python3";
   const child = spawn(
     pythonBin,
@@ -48,8 +67,8 @@ export async function POST(request: Request) {
   }
 
   try {
-    const data = JSON.parse(stdout);
-    return NextResponse.json({ categories: data });
+    const data: DiscoveryResult = JSON.parse(stdout);
+    return NextResponse.json(data);
   } catch (err) {
     return NextResponse.json(
       { error: "Invalid discovery output", details: stdout },
@@ -16,6 +16,7 @@ export default function CreatePage() {
   const [discovering, setDiscovering] = useState(false);
   const [discoveryError, setDiscoveryError] = useState<string | null>(null);
   const [discovered, setDiscovered] = useState<Record<string, string[]>>({});
+  const [discoveryId, setDiscoveryId] = useState<string | null>(null);
   const [selectedPaths, setSelectedPaths] = useState<Record<string, boolean>>({});
 
   const handleSubmit = async (event: React.FormEvent<HTMLFormElement>) => {
@@ -27,6 +28,10 @@ export default function CreatePage() {
     const form = event.currentTarget;
     const formData = new FormData(form);
 
+    if (discoveryId) {
+      formData.set("discovery", discoveryId);
+    }
+
     selectedPaths &&
       Object.entries(selectedPaths).forEach(([url, selected]) => {
         if (selected) {
@@ -72,6 +77,7 @@ export default function CreatePage() {
         return;
       }
       setDiscovered(data.categories || {});
+      setDiscoveryId(data.manifestId || null);
       setSelectedPaths({});
     } catch (err) {
       setDiscoveryError(
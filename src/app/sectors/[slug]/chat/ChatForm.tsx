@@ -19,6 +19,7 @@ export function ChatForm({ slug, title, pageTag }: ChatFormProps) {
   const [discovering, setDiscovering] = useState(false);
   const [discoveryError, setDiscoveryError] = useState<string | null>(null);
   const [discovered, setDiscovered] = useState<Record<string, string[]>>({});
+  const [discoveryId, setDiscoveryId] = useState<string | null>(null);
   const [selectedPaths, setSelectedPaths] = useState<Record<string, boolean>>({});
 
   const handleSubmit = async (event: React.FormEvent<HTMLFormElement>) => {
@@ -31,6 +32,10 @@ export function ChatForm({ slug, title, pageTag }: ChatFormProps) {
     const formData = new FormData(form);
     formData.set("slug", slug);
 
+    if (discoveryId) {
+      formData.set("discovery", discoveryId);
+    }
+
     selectedPaths &&
       Object.entries(selectedPaths).forEach(([url, selected]) => {
         if (selected) {
@@ -76,6 +81,7 @@ export function ChatForm({ slug, title, pageTag }: ChatFormProps) {
         return;
       }
       setDiscovered(data.categories || {});
+      setDiscoveryId(data.manifestId || null);
       setSelectedPaths({});
     } catch (err) {
       setDiscoveryError(
@@ -0,0 +1,59 @@
+import "server-only";
+
+export type AgentEvent = {
+  event: string;
+  name?: string;
+  ms?: number;
+  costUsd?: number | null;
+  [key: string]: unknown;
+};
+
+export type AgentTimings = {
+  totalMs: number | null;
+  costUsd: number | null;
+  stages: Record<string, number>;
+};
+
+// The agent writes NDJSON events (`--events -`) to stderr alongside its
+// regular log output; split the two.
+export function splitAgentEvents(stderr: string) {
+  const events: AgentEvent[] = [];
+  const log: string[] = [];
+  for (const line of stderr.split("\n")) {
+    const trimmed = line.trim();
+    if (!trimmed) continue;
+    if (trimmed.startsWith("{")) {
+      try {
+        const parsed = JSON.parse(trimmed);
+        if (parsed && typeof parsed.event === "string") {
+          events.push(parsed as AgentEvent);
+          continue;
+        }
+      } catch {
+        // Not an event line.
+      }
+    }
+    log.push(line);
+  }
+  return { events, log: log.join("\n") };
+}
+
+// Total milliseconds per span name plus the run total, for logging and the
+// route response.
+export function summarizeAgentEvents(events: AgentEvent[]): AgentTimings {
+  const stages: Record<string, number> = {};
+  let run: AgentEvent | undefined;
+  for (const item of events) {
+    if (item.event !== "span" || !item.name || typeof item.ms !== "number") continue;
+    if (item.name === "run") {
+      run = item;
+      continue;
+    }
+    stages[item.name] = Math.round(((stages[item.name] || 0) + item.ms) * 100) / 100;
+  }
+  return {
+    totalMs: run?.ms ?? null,
+    costUsd: run?.costUsd ?? null,
+    stages,
+  };
+}
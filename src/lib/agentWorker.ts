@@ -0,0 +1,37 @@
+import "server-only";
+
+const AGENT_WORKER_URL = process.env.AGENT_WORKER_URL?.replace(/\/$/, "");
+
+export type AgentWorkerResult<T> = {
+  ok: boolean;
+  status: number;
+  data: T & { error?: string; details?: string };
+};
+
+// Returns null when no resident worker is configured or it cannot be
+// reached, so callers can fall back to spawning `python -m agent.*` per
+// request.
+export async function callAgentWorker<T>(
+  route: string,
+  body: unknown
+): Promise<AgentWorkerResult<T> | null> {
+  if (!AGENT_WORKER_URL) {
+    return null;
+  }
+
+  let res: Response;
+  try {
+    res = await fetch(`${AGENT_WORKER_URL}${route}`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(body),
+      cache: "no-store",
+    });
+  } catch (error) {
+    const message = error instanceof Error ? error.message : String(error);
+    console.warn(`Agent worker unreachable at ${AGENT_WORKER_URL}, spawning instead: ${message}`);
+    return null;
+  }
+  const data = (await res.json()) as AgentWorkerResult<T>["data"];
+  return { ok: res.ok, status: res.status, data };
+}